@@ -1,122 +1,333 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import argparse
+import os
 import shlex
 from getpass import getpass
+from hashlib import md5
+from time import perf_counter
 
-from sys import argv
+from sys import argv, stderr
 import signal
 
+from utils import statements
 from utils import (
   User, InvalidUser, SuperUser, Author, Editor, Reviewer,
-  DBParseError, DBConnectError, connect, warn, info, build_database
+  DBParseError, DBConnectError, get_pool, close_pools, warn, info, build_database,
+  apply_migrations, schema_is_current, verify_indexes, export_tables, import_tables,
+  capture_baseline, check_plans, serve, read_db_config, SESSIONS
 )
 
 
-def user_login(user_id: int) -> User:
-  """Login user"""
+# environment variable holding the password for non-interactive runs.
+PASSWORD_ENV = "RELATIONAL_PASSWORD"
 
-  try:
-    conn = connect()
-  except (DBParseError, DBConnectError) as err:
-    print(err)
-    exit(1)
+# database configuration file, set with --config.
+CONFIG_FILE = "dbconfig.ini"
+
+
+def make_user(user_id: int, user_type: str, type_id: int, conn, greeting: str = None) -> User:
+  """Build the role object for a verified user; releases `conn` on failure"""
+  if user_type == "Admin":
+    return SuperUser(user_id, conn)
+  elif user_type == "Author":
+    return Author(type_id, conn, greeting)
+  elif user_type == "Editor":
+    return Editor(type_id, conn, greeting)
+  elif user_type == "Reviewer":
+    return Reviewer(type_id, conn, greeting)
+  else:
+    conn.release()
+    warn("Invalid user type, please contact the system administrator.")
+    return InvalidUser()
 
-  cursor = conn.cursor()
-  user_pass = ""
+
+def user_login(user_id: int, user_pass: str = None, resume: bool = True) -> User:
+  """
+    Login user.
+
+    With `resume`, a user with an unexpired session from an earlier
+    login in this process is let back in without a password or query.
+    Otherwise the password is prompted for unless `user_pass` is given,
+    hashed locally, and checked by the same query that fetches the
+    user's greeting.
+
+    The returned user borrows a connection from the shared pool;
+    call `release()` on it once it is no longer the active user.
+
+    Raises
+    ------
+    DBParseError, DBConnectError
+      if no connection can be borrowed; the caller decides whether
+      that ends the process (see `cli_login`).
+  """
+
+  conn = get_pool(CONFIG_FILE).checkout()
+
+  claims = SESSIONS.resume(user_id) if resume else None
+  if claims is not None:
+    return make_user(
+      user_id, claims["user_type"], claims["type_id"], conn, claims["greeting"])
 
   def timeout(signum, frame):
     """Timeout handler"""
     print("Password prompt timed out.")
     raise TimeoutError()
 
-  try:
-    signal.signal(signal.SIGALRM, timeout)
-    signal.alarm(5)
-    user_pass = getpass("Enter password: ")
-    signal.alarm(0)
-  except TimeoutError:
-    pass
+  if user_pass is None:
+    user_pass = ""
+    try:
+      signal.signal(signal.SIGALRM, timeout)
+      signal.alarm(5)
+      user_pass = getpass("Enter password: ")
+      signal.alarm(0)
+    except TimeoutError:
+      pass
 
-  # get user password and encrypt
-  cursor.execute(
-    f"""
-      SELECT MD5('{user_pass}') AS encrypted_password
-    """
-  )
-  encrypted_password = cursor.fetchone()[0]
-
-  cursor.execute(
-    f"""
-      SELECT user_type, type_id, password
-      FROM credentials
-      WHERE user_id = {user_id}
-    """
-  )
-  row = cursor.fetchone()
+  # passwords are stored as MySQL MD5() hex digests.
+  encrypted_password = md5(user_pass.encode()).hexdigest()
+
+  row = statements.fetchone(conn, "login.credentials", (encrypted_password, user_id))
 
   # if no record matched, user is nonexistent.
   if row is None:
+    conn.release()
     warn("User not found")
     return InvalidUser()
-  else:
-    user_type, type_id, password = row
-
-    # password exists & does not match --> invalid attempt
-    if password and password != encrypted_password:
-      warn("Incorrect password!\nPlease try again.")
-      return InvalidUser()
-    elif user_type == "Admin":
-      cursor.close()
-      return SuperUser(user_id, conn)
-    elif user_type == "Author":
-      cursor.close()
-      return Author(type_id, conn)
-    elif user_type == "Editor":
-      cursor.close()
-      return Editor(type_id, conn)
-    elif user_type == "Reviewer":
-      cursor.close()
-      return Reviewer(type_id, conn)
-    else:
-      warn("Invalid user type, please contact the system administrator.")
-      return InvalidUser()
+
+  user_type, type_id, authorized, greeting = row
+
+  # password exists & does not match --> invalid attempt
+  if not authorized:
+    conn.release()
+    warn("Incorrect password!\nPlease try again.")
+    return InvalidUser()
+
+  user = make_user(user_id, user_type, type_id, conn, greeting)
+  if user:
+    SESSIONS.remember(user_id, user_type, type_id, greeting)
+  return user
     
 
-def handle_user_login(request: str) -> User:
+def cli_login(user_id: int, user_pass: str = None) -> User:
+  """Log in from the command line, exiting if the database is unreachable"""
+  try:
+    return user_login(user_id, user_pass)
+  except (DBParseError, DBConnectError) as err:
+    print(err)
+    exit(1)
+
+
+def handle_user_login(request: str, credentials: "Credentials" = None) -> User:
   """Handle user login"""
   request_tokens = shlex.split(request)
   if len(request_tokens) == 2:
     user_id = int(request_tokens[1])
-    return user_login(user_id)
+    user_pass = credentials.password(user_id) if credentials else None
+    return cli_login(user_id, user_pass)
   else:
     warn("Invalid command: too few or too many arguments")
     return InvalidUser()
 
 
+class Credentials:
+  """
+    Passwords for non-interactive runs.
+
+    Read from a password file, whose lines are either `<user_id>:<password>`
+    or a single bare password used for every user, falling back to the
+    RELATIONAL_PASSWORD environment variable (or no password).
+  """
+
+  def __init__(self, path: str = None):
+    self.default = os.environ.get(PASSWORD_ENV, "")
+    self.by_user = {}
+    if path:
+      with open(path) as f:
+        for line in f:
+          line = line.rstrip("\n")
+          user_id, sep, password = line.partition(":")
+          if sep and user_id.strip().isnumeric():
+            self.by_user[int(user_id)] = password
+          elif line:
+            self.default = line
+
+  def password(self, user_id: int) -> str:
+    return self.by_user.get(user_id, self.default)
+
+
+def run_script(path: str, user_id: int, credentials: Credentials) -> int:
+  """
+    Run the commands in a script file, one per line, as `user_id`.
+
+    Commands go through the same handlers as the interactive prompt,
+    without prompting. Blank lines and lines starting with `#` are
+    skipped. Each command's exit code (0 ok, 1 failed) and time are
+    reported on stderr.
+
+    Returns
+    -------
+    int: 0 if every command succeeded, 1 otherwise.
+  """
+  user: User = cli_login(user_id, credentials.password(user_id))
+  if not user:
+    return 1
+
+  def report(line_number, code, elapsed, request):
+    print(f"[{line_number:>5}] exit={code} {elapsed * 1000:10.2f} ms  {request}", file=stderr)
+
+  commands, failures, total = 0, 0, 0.0
+  with open(path) as f:
+    for line_number, line in enumerate(f, start=1):
+      request = line.strip()
+      if not request or request.startswith("#"):
+        continue
+
+      start = perf_counter()
+      try:
+        if request.startswith("login"):
+          new_user = handle_user_login(request, credentials)
+          ok = bool(new_user)
+          if ok:
+            user.release()
+            user = new_user
+          else:
+            new_user.release()
+        else:
+          ok = user.handle_request(request) is not False
+      except SystemExit:
+        report(line_number, 0, perf_counter() - start, request)
+        break
+      except Exception as err:
+        warn(f"{type(err).__name__}: {err}")
+        ok = False
+      elapsed = perf_counter() - start
+
+      commands += 1
+      total += elapsed
+      failures += 0 if ok else 1
+      report(line_number, 0 if ok else 1, elapsed, request)
+
+  user.release()
+  mean = total / commands * 1000 if commands else 0.0
+  print(f"{commands} command(s), {failures} failed, "
+    f"{total:.3f} s total, {mean:.2f} ms mean", file=stderr)
+  return 1 if failures else 0
+
+
+def check_schema():
+  """Warn if the database has migrations pending"""
+  try:
+    with get_pool(CONFIG_FILE).checkout() as conn:
+      if not schema_is_current(conn):
+        warn("Database schema is out of date; run `./main.py /migrate`.")
+  except (DBParseError, DBConnectError) as err:
+    print(err)
+    exit(1)
+
+
+def parse_args():
+  """Parse batch-mode options; `/rebuild`-style flags are left in argv"""
+  parser = argparse.ArgumentParser(
+    description="Journal manuscript system.",
+    epilog="Other flags: /rebuild [/populate], /migrate, /verify-indexes, "
+      "/capture-plans, /check-plans, /export DIR, /import DIR"
+  )
+  parser.add_argument("--script", metavar="FILE",
+    help="run the commands in FILE non-interactively, then exit")
+  parser.add_argument("--as", dest="user_id", type=int, metavar="USER_ID",
+    help="user to log in as for --script")
+  parser.add_argument("--password-file", metavar="FILE",
+    help=f"passwords for --script ('<user_id>:<password>' lines or one password); "
+      f"defaults to ${PASSWORD_ENV}")
+  parser.add_argument("--config", default=CONFIG_FILE, metavar="FILE",
+    help="database configuration file (default: %(default)s)")
+  parser.add_argument("--serve", metavar="[HOST:]PORT",
+    help="serve sessions over TCP instead of the interactive prompt")
+  parser.add_argument("--workers", type=int, metavar="N",
+    help="threads running database calls for --serve (default: pool size)")
+  args, _ = parser.parse_known_args()
+  return args
+
+
 def main():
   """Main function"""
 
+  global CONFIG_FILE
+  args = parse_args()
+  CONFIG_FILE = args.config
+  try:
+    SESSIONS.configure(read_db_config(CONFIG_FILE, 'session'))
+  except DBParseError:
+    pass
+
   if len(argv) >= 2 and argv[1] == "/rebuild":
     if len(argv) >= 3 and argv[2] == "/populate":
-      build_database(load_data=True)
+      build_database(CONFIG_FILE, load_data=True)
     else:
-      build_database()
+      build_database(CONFIG_FILE, load_data=False)
+  elif len(argv) >= 2 and argv[1] == "/migrate":
+    apply_migrations(config_file=CONFIG_FILE)
+  elif len(argv) >= 2 and argv[1] == "/verify-indexes":
+    failures = verify_indexes(config_file=CONFIG_FILE)
+    if failures:
+      warn(f"{len(failures)} full table scan(s) found.")
+    exit(1 if failures else 0)
+  elif len(argv) >= 2 and argv[1] == "/capture-plans":
+    capture_baseline(config_file=CONFIG_FILE)
+    exit(0)
+  elif len(argv) >= 2 and argv[1] == "/check-plans":
+    regressions = check_plans(config_file=CONFIG_FILE)
+    if regressions:
+      warn(f"{len(regressions)} plan regression(s) found.")
+    exit(1 if regressions else 0)
+  elif len(argv) >= 3 and argv[1] == "/export":
+    export_tables(argv[2], config_file=CONFIG_FILE)
+    exit(0)
+  elif len(argv) >= 3 and argv[1] == "/import":
+    import_tables(argv[2], config_file=CONFIG_FILE)
+    exit(0)
+
+  check_schema()
+
+  if args.script:
+    if args.user_id is None:
+      warn("--script needs --as <user_id>")
+      exit(2)
+    status = run_script(args.script, args.user_id, Credentials(args.password_file))
+    close_pools()
+    exit(status)
+
+  if args.serve:
+    host, _, port = args.serve.rpartition(":")
+    # sessions share this process, so never resume another client's login.
+    login = lambda user_id, user_pass: user_login(user_id, user_pass, resume=False)
+    serve(login, host or "127.0.0.1", int(port), args.workers, get_pool(CONFIG_FILE))
+    close_pools()
+    exit(0)
 
   user_id = int(input("Enter User ID: "))
-  user: User = user_login(user_id)
+  user: User = cli_login(user_id)
   while user:
     try:
       request = input(f"{user.prompt} ").strip()
       if request.startswith("login"):
         new_user = handle_user_login(request)
         if new_user:
+          # hand the previous session's connection back before switching.
+          user.release()
           user = new_user
+        else:
+          new_user.release()
       else:
         user.handle_request(request)
     except EOFError:
       warn("Reached end of stream, exiting...")
       break
 
+  user.release()
+  close_pools()
+
 if __name__ == '__main__':
   main()
@@ -9,4 +9,5 @@ read -r -d '' commands <<EOF
   status
 EOF
 
-./main.py /rebuild /populate <<< "$commands"
+# optional database configuration file, e.g. sqlite.ini
+./main.py /rebuild /populate --config "${1:-dbconfig.ini}" <<< "$commands"
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""
+  Checks run against the embedded SQLite database (sqlite.ini):
+
+    python3 -m unittest discover -s tests -t .
+
+  or `make test-sqlite`, which also runs test.sh on it.
+"""
+
+import io
+import os
+from contextlib import redirect_stdout
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQLITE_INI = os.path.join(ROOT_PATH, "sqlite.ini")
+
+
+def build_sqlite(load_data=True):
+  """
+    Rebuild the SQLite database, keeping its progress output quiet.
+  """
+  from utils import build_database
+  with redirect_stdout(io.StringIO()):
+    build_database(SQLITE_INI, load_data=load_data)
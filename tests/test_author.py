@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+  Co-authors of a submission resolve to existing authors whatever the
+  case and accents they are given with.
+"""
+
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from utils import connect
+from utils.author import Author
+
+from . import SQLITE_INI, build_sqlite
+
+
+class ResolveCoAuthorsTest(unittest.TestCase):
+
+  def setUp(self):
+    build_sqlite()
+    self.addCleanup(build_sqlite)
+    self.conn = connect(SQLITE_INI)
+    self.addCleanup(self.conn.close)
+    self.cursor = self.conn.cursor()
+    self.addCleanup(self.cursor.close)
+    self.ke_lou = self.register("Ke", "Lou")
+    self.author = Author(1, self.conn, greeting="Hello")
+
+  def register(self, f_name: str, l_name: str) -> int:
+    self.cursor.execute(
+      "INSERT INTO Author (f_name, l_name, email) VALUES (%s, %s, '')", (f_name, l_name))
+    self.conn.commit()
+    return self.cursor.lastrowid
+
+  def scalar(self, sql: str, params=None):
+    self.cursor.execute(sql, params)
+    return self.cursor.fetchone()[0]
+
+  def submit(self, *co_authors) -> int:
+    with redirect_stdout(io.StringIO()):
+      self.assertTrue(self.author.submit_manuscript("Folding", 1, 1, *co_authors))
+    return self.scalar("SELECT MAX(manuscript_number) FROM Manuscript")
+
+  def co_author_ids(self, manuscript_number: int) -> list:
+    self.cursor.execute(
+      """
+        SELECT Author_author_ID FROM Manuscript_Author
+        WHERE Manuscript_manuscript_number = %s AND author_ordinal > 1
+        ORDER BY author_ordinal
+      """,
+      (manuscript_number,))
+    return [row[0] for row in self.cursor.fetchall()]
+
+  def test_lower_case_name_finds_existing_author(self):
+    authors = self.scalar("SELECT COUNT(*) FROM Author")
+    manuscript_number = self.submit("ke lou")
+    self.assertEqual(self.scalar("SELECT COUNT(*) FROM Author"), authors)
+    self.assertEqual(self.co_author_ids(manuscript_number), [self.ke_lou])
+
+  def test_accents_ignored(self):
+    zoe = self.register("Zoë", "Étienne")
+    authors = self.scalar("SELECT COUNT(*) FROM Author")
+    manuscript_number = self.submit("zoe etienne", "KE LOU")
+    self.assertEqual(self.scalar("SELECT COUNT(*) FROM Author"), authors)
+    self.assertEqual(self.co_author_ids(manuscript_number), [zoe, self.ke_lou])
+
+  def test_new_co_author_registered_once(self):
+    authors = self.scalar("SELECT COUNT(*) FROM Author")
+    manuscript_number = self.submit("Ada Lovelace", "ada lovelace")
+    self.assertEqual(self.scalar("SELECT COUNT(*) FROM Author"), authors + 1)
+    self.assertEqual(len(self.co_author_ids(manuscript_number)), 1)
+
+
+if __name__ == "__main__":
+  unittest.main()
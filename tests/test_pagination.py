@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+  Keyset pagination of the editor's status listing, including
+  manuscripts without a status (which sort first).
+"""
+
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from utils import connect
+from utils.pagination import StatusPager
+
+from . import SQLITE_INI, build_sqlite
+
+
+def page_numbers(render) -> list:
+  """
+    Manuscript numbers of a TSV page written by `render(out)`.
+  """
+  out = io.StringIO()
+  with redirect_stdout(io.StringIO()):
+    render(out)
+  lines = out.getvalue().splitlines()[1:]
+  return [int(line.split("\t")[0]) for line in lines]
+
+
+class StatusPagerTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    build_sqlite()
+    cls.conn = connect(SQLITE_INI)
+    cursor = cls.conn.cursor()
+    # a run of NULL statuses longer than a page, so paging has to continue
+    # inside the NULLs and then step out of them.
+    cursor.execute("UPDATE Manuscript SET status = NULL WHERE manuscript_number % 9 = 0")
+    cls.conn.commit()
+    cursor.execute("SELECT manuscript_number, status FROM Manuscript ORDER BY status, manuscript_number")
+    cls.expected = cursor.fetchall()
+    cursor.close()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.conn.close()
+
+  def read_all(self, pager: StatusPager, page_size: int, status=None) -> tuple:
+    numbers = page_numbers(
+      lambda out: pager.first(self.conn, page_size, status, mode="tsv", out=out))
+    pages = 1
+    while not pager.exhausted:
+      numbers += page_numbers(lambda out: pager.next(self.conn, mode="tsv", out=out))
+      pages += 1
+    return numbers, pages
+
+  def test_nulls_present(self):
+    nulls = [number for number, status in self.expected if status is None]
+    self.assertGreater(len(nulls), 7)
+    self.assertIsNone(self.expected[0][1])
+
+  def test_every_manuscript_once_in_order(self):
+    for page_size in (1, 7, 25, len(self.expected), len(self.expected) + 1):
+      with self.subTest(page_size=page_size):
+        numbers, pages = self.read_all(StatusPager(), page_size)
+        self.assertEqual(numbers, [number for number, _ in self.expected])
+        self.assertEqual(pages, len(self.expected) // page_size + 1)
+
+  def test_status_filter(self):
+    expected = [number for number, status in self.expected if status == "under review"]
+    self.assertTrue(expected)
+    numbers, _ = self.read_all(StatusPager(), 4, "Under Review")
+    self.assertEqual(numbers, expected)
+
+  def test_next_after_last_page(self):
+    pager = StatusPager()
+    self.read_all(pager, 50)
+    self.assertEqual(page_numbers(lambda out: pager.next(self.conn, mode="tsv", out=out)), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
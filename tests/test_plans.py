@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+  The full-scan rule of `/verify-indexes` and `/check-plans`,
+  on canned `EXPLAIN FORMAT=JSON` output.
+"""
+
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from utils import plans
+from utils.plans import QueryTemplate, is_full_scan, normalize_plan, verify_indexes
+
+
+def explain_json(access_type: str, table="Manuscript", key=None, filesort=False) -> dict:
+  """
+    EXPLAIN output of a one-table query, ordered like MySQL reports ORDER BY.
+  """
+  access = {"table_name": table, "access_type": access_type, "rows_examined_per_scan": 1000}
+  if key:
+    access["key"] = key
+  return {"query_block": {
+    "cost_info": {"query_cost": "100.0"},
+    "ordering_operation": {"using_filesort": filesort, "table": access},
+  }}
+
+
+class FakeCursor:
+  """
+    Answers `EXPLAIN FORMAT=JSON <sql>` with the plan registered for `sql`.
+  """
+
+  def __init__(self, plans_by_sql):
+    self.plans_by_sql = plans_by_sql
+
+  def execute(self, statement, params=()):
+    self.sql = statement[len("EXPLAIN FORMAT=JSON "):]
+
+  def fetchone(self):
+    return (json.dumps(self.plans_by_sql[self.sql]),)
+
+  def close(self):
+    pass
+
+
+class FakeConnection:
+  backend = "mysql"
+
+  def __init__(self, plans_by_sql):
+    self.plans_by_sql = plans_by_sql
+
+  def cursor(self, **kwargs):
+    return FakeCursor(self.plans_by_sql)
+
+
+class FullScanTest(unittest.TestCase):
+
+  def access(self, plan):
+    return plan["accesses"][0]
+
+  def test_table_scan(self):
+    plan = normalize_plan(explain_json("ALL"), "SELECT * FROM Manuscript LIMIT 10")
+    self.assertTrue(is_full_scan(self.access(plan), plan))
+
+  def test_ordered_index_read_under_limit(self):
+    sql = "SELECT manuscript_number, status FROM Manuscript ORDER BY status, manuscript_number LIMIT %s"
+    plan = normalize_plan(explain_json("index", key="Manuscript_status"), sql)
+    self.assertFalse(is_full_scan(self.access(plan), plan))
+
+  def test_index_scan_without_limit(self):
+    sql = "SELECT manuscript_number, status FROM Manuscript ORDER BY status, manuscript_number"
+    plan = normalize_plan(explain_json("index", key="Manuscript_status"), sql)
+    self.assertTrue(is_full_scan(self.access(plan), plan))
+
+  def test_index_scan_with_filesort(self):
+    sql = "SELECT manuscript_number FROM Manuscript ORDER BY title LIMIT 5"
+    plan = normalize_plan(explain_json("index", key="PRIMARY", filesort=True), sql)
+    self.assertTrue(is_full_scan(self.access(plan), plan))
+
+  def test_limit_in_subquery_only(self):
+    sql = "SELECT * FROM Manuscript WHERE manuscript_number IN (SELECT 1 LIMIT 1) ORDER BY status"
+    plan = normalize_plan(explain_json("index", key="Manuscript_status"), sql)
+    self.assertTrue(is_full_scan(self.access(plan), plan))
+
+  def test_lookups_and_bounded_tables(self):
+    for access_type in ("const", "eq_ref", "ref", "range"):
+      plan = normalize_plan(explain_json(access_type, key="PRIMARY"), "SELECT 1")
+      self.assertFalse(is_full_scan(self.access(plan), plan), access_type)
+    plan = normalize_plan(explain_json("ALL", table="manuscript_status_counts"), "SELECT 1")
+    self.assertFalse(is_full_scan(self.access(plan), plan))
+
+
+class VerifyIndexesTest(unittest.TestCase):
+
+  def setUp(self):
+    self.collect = plans.collect_templates
+    self.addCleanup(setattr, plans, "collect_templates", self.collect)
+
+  def verify(self, templates, plans_by_sql):
+    plans.collect_templates = lambda: templates
+    with redirect_stdout(io.StringIO()):
+      return verify_indexes(FakeConnection(plans_by_sql))
+
+  def test_paged_listing_and_views_pass(self):
+    page = QueryTemplate("manuscript.status_page_first",
+      "SELECT manuscript_number, status FROM Manuscript ORDER BY status, manuscript_number LIMIT %s",
+      (25,), "statements.py")
+    view = QueryTemplate("view.WhatsLeft", "SELECT * FROM WhatsLeft", (), "views.sql")
+    failures = self.verify([page, view], {
+      page.sql: explain_json("index", key="Manuscript_status"),
+      view.sql: explain_json("ALL"),
+    })
+    self.assertEqual(failures, [])
+
+  def test_role_module_scan_fails(self):
+    query = QueryTemplate("Reviewer.status",
+      "SELECT manuscript_number FROM Manuscript WHERE title = 1", (), "reviewer.py:1")
+    failures = self.verify([query], {query.sql: explain_json("ALL")})
+    self.assertEqual(failures, [("Reviewer.status", "Manuscript")])
+
+  def test_real_templates_keep_views_out(self):
+    templates = [template for template in self.collect() if not plans.is_listing(template)]
+    self.assertTrue(templates)
+    self.assertFalse([template for template in templates if template.source == "views.sql"])
+    self.assertIn("manuscript.status_page_first", [template.name for template in templates])
+
+  def test_placeholder_lists_planned_for_one_row(self):
+    templates = {template.name: template for template in self.collect()}
+    lookup = templates["Author.resolve_co_authors"]
+    self.assertIn("WHERE (f_name = %s COLLATE", " ".join(lookup.sql.split()))
+    self.assertEqual(lookup.params, (plans.SAMPLE_VALUE,) * 2)
+
+
+if __name__ == "__main__":
+  unittest.main()
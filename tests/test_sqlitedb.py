@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""
+  The SQLite backend: statement translation, error mapping, emulated
+  MySQL statements and the procedures written in Python.
+"""
+
+import sqlite3
+import threading
+import unittest
+
+from mysql.connector import (
+  Error, IntegrityError, NotSupportedError, OperationalError, ProgrammingError
+)
+
+from utils import connect, statements
+from utils.sqlitedb import (
+  SQLiteConnection, translate, translate_error, make_decision,
+  ER_DUP_ENTRY, ER_NO_REFERENCED_ROW, ER_CHECK_CONSTRAINT_VIOLATED, ER_BAD_NULL,
+  ER_NO_SUCH_TABLE, ER_PARSE_ERROR, ER_SP_DOES_NOT_EXIST, ER_SIGNAL_EXCEPTION,
+  ER_NOT_ALLOWED_COMMAND, ER_LOCK_WAIT_TIMEOUT
+)
+
+from . import SQLITE_INI, build_sqlite
+
+
+class TranslateTest(unittest.TestCase):
+
+  def test_placeholders_only_when_bound(self):
+    self.assertEqual(translate("SELECT %s, '%%'", True), "SELECT ?, '%'")
+    self.assertEqual(translate("SELECT '%s'", False), "SELECT '%s'")
+
+  def test_insert_ignore(self):
+    self.assertEqual(
+      translate("insert  ignore INTO t (a) VALUES (%s)", True),
+      "INSERT OR IGNORE INTO t (a) VALUES (?)")
+
+  def test_locking_reads(self):
+    self.assertEqual(translate("SELECT a FROM t WHERE b = 1\n  FOR UPDATE", False),
+      "SELECT a FROM t WHERE b = 1")
+    self.assertEqual(translate("SELECT a FROM t LOCK IN SHARE MODE", False), "SELECT a FROM t")
+
+  def test_named_statement_override(self):
+    sql = translate(statements.STATEMENTS["reviewer.set_opinion"], True)
+    self.assertNotIn("JOIN", sql)
+    self.assertEqual(sql.count("?"), 7)
+
+
+class TranslateErrorTest(unittest.TestCase):
+
+  def setUp(self):
+    self.db = sqlite3.connect(":memory:")
+    self.db.execute("PRAGMA foreign_keys = ON")
+    self.db.executescript("""
+      CREATE TABLE parent (id INTEGER PRIMARY KEY);
+      CREATE TABLE child (
+        id INTEGER PRIMARY KEY,
+        parent_id INTEGER NOT NULL REFERENCES parent(id),
+        score INTEGER CHECK (score > 0)
+      );
+      CREATE TRIGGER guard BEFORE DELETE ON parent
+      BEGIN SELECT RAISE(ABORT, 'parent is locked'); END;
+      INSERT INTO parent (id) VALUES (1);
+    """)
+
+  def tearDown(self):
+    self.db.close()
+
+  def error(self, sql: str) -> Error:
+    with self.assertRaises(sqlite3.Error) as raised:
+      self.db.execute(sql)
+    return translate_error(raised.exception)
+
+  def test_integrity_errors(self):
+    for sql, errno in (
+      ("INSERT INTO parent (id) VALUES (1)", ER_DUP_ENTRY),
+      ("INSERT INTO child (parent_id) VALUES (2)", ER_NO_REFERENCED_ROW),
+      ("INSERT INTO child (parent_id, score) VALUES (1, 0)", ER_CHECK_CONSTRAINT_VIOLATED),
+      ("INSERT INTO child (parent_id) VALUES (NULL)", ER_BAD_NULL),
+    ):
+      with self.subTest(sql=sql):
+        err = self.error(sql)
+        self.assertIsInstance(err, IntegrityError)
+        self.assertEqual(err.errno, errno)
+
+  def test_trigger_abort_is_signal(self):
+    err = self.error("DELETE FROM parent")
+    self.assertEqual(err.errno, ER_SIGNAL_EXCEPTION)
+    self.assertEqual(err.msg, "parent is locked")
+
+  def test_programming_errors(self):
+    self.assertEqual(self.error("SELECT * FROM missing").errno, ER_NO_SUCH_TABLE)
+    self.assertEqual(self.error("SELEC 1").errno, ER_PARSE_ERROR)
+
+
+class SQLiteConnectionTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    build_sqlite()
+
+  def setUp(self):
+    self.conn = connect(SQLITE_INI)
+    self.cursor = self.conn.cursor()
+
+  def tearDown(self):
+    self.cursor.close()
+    self.conn.rollback()
+    self.conn.close()
+
+  def scalar(self, sql: str, params=None):
+    self.cursor.execute(sql, params)
+    return self.cursor.fetchone()[0]
+
+  def test_set_session_variables(self):
+    self.cursor.execute("SET @rev_id = 3, @label = 'x'")
+    self.assertEqual(self.scalar("SELECT session_variable('rev_id')"), 3)
+    self.assertEqual(self.scalar("SELECT session_variable('label')"), "x")
+    self.cursor.execute("SET @rev_id = NULL")
+    self.assertIsNone(self.scalar("SELECT session_variable('rev_id')"))
+    self.assertIsNone(self.cursor.fetchone())
+
+  def test_foreign_key_checks(self):
+    self.cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    self.assertEqual(self.scalar("PRAGMA foreign_keys"), 0)
+    self.cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    self.assertEqual(self.scalar("PRAGMA foreign_keys"), 1)
+
+  def test_duplicate_key_errno(self):
+    with self.assertRaises(IntegrityError) as raised:
+      self.cursor.execute(
+        "INSERT INTO credentials (password, user_type, type_id) VALUES (NULL, %s, %s)",
+        ("Admin", 1))
+    self.assertEqual(raised.exception.errno, ER_DUP_ENTRY)
+
+  def test_case_insensitive_collation(self):
+    self.assertEqual(
+      self.scalar("SELECT COUNT(*) FROM Manuscript WHERE status = %s", ("UNDER REVIEW",)),
+      self.scalar("SELECT COUNT(*) FROM Manuscript WHERE status = %s", ("under review",)))
+
+  def test_mysql_functions(self):
+    self.assertEqual(self.scalar("SELECT CONCAT('a', 1, 'b')"), "a1b")
+    self.assertIsNone(self.scalar("SELECT CONCAT('a', NULL)"))
+    self.assertEqual(self.scalar("SELECT CONCAT_WS('-', 2024, NULL, 1)"), "2024-1")
+    self.assertEqual(self.scalar("SELECT MD5('password')"), "5f4dcc3b5aa765d61d8327deb882cf99")
+    self.assertEqual(self.scalar("SELECT FIELD('b', 'a', 'b', 'c')"), 2)
+
+  def test_insert_trigger_indexes_credentials(self):
+    self.cursor.execute("INSERT INTO Editor (f_name, l_name) VALUES (%s, %s)", ("Test", "Editor"))
+    editor_id = self.cursor.lastrowid
+    self.assertEqual(self.scalar(
+      "SELECT COUNT(*) FROM credentials WHERE user_type = 'Editor' AND type_id = %s",
+      (editor_id,)), 1)
+
+  def test_truncate_skips_triggers_and_restarts_ids(self):
+    self.addCleanup(build_sqlite)
+    for table in ("Reviewer_has_Manuscript", "Reviewer_has_RICodes", "Reviewer", "credentials"):
+      self.cursor.execute(f"TRUNCATE TABLE {table}")
+    # the resignation trigger would have reset manuscripts under review.
+    self.assertGreater(
+      self.scalar("SELECT COUNT(*) FROM Manuscript WHERE status = 'under review'"), 0)
+    self.cursor.execute("INSERT INTO Reviewer (f_name, l_name) VALUES ('New', 'Reviewer')")
+    self.assertEqual(self.cursor.lastrowid, 1)
+
+  def test_load_data_not_supported(self):
+    with self.assertRaises(NotSupportedError) as raised:
+      self.cursor.execute("LOAD DATA LOCAL INFILE 'x.csv' INTO TABLE Issue")
+    self.assertEqual(raised.exception.errno, ER_NOT_ALLOWED_COMMAND)
+
+  def test_unknown_procedure(self):
+    with self.assertRaises(ProgrammingError) as raised:
+      self.cursor.callproc("NoSuchProcedure", ())
+    self.assertEqual(raised.exception.errno, ER_SP_DOES_NOT_EXIST)
+
+  def test_make_decision(self):
+    db = sqlite3.connect(":memory:")
+    db.executescript("""
+      CREATE TABLE Reviewer_has_Manuscript (
+        Manuscript_manuscript_number INTEGER,
+        appropriateness INTEGER, clarity INTEGER, methodology INTEGER, experimental INTEGER
+      );
+      -- averages 39.5, which MySQL rounds up to 40.
+      INSERT INTO Reviewer_has_Manuscript VALUES (1, 10, 10, 10, 10), (1, 10, 10, 10, 9);
+      -- averages 39.25.
+      INSERT INTO Reviewer_has_Manuscript VALUES
+        (2, 10, 10, 10, 10), (2, 10, 10, 10, 10), (2, 10, 10, 10, 10), (2, 10, 10, 10, 7);
+    """)
+    self.assertEqual(make_decision(db, 1), (1, "Accepted"))
+    self.assertEqual(make_decision(db, 2), (2, "Rejected"))
+    self.assertEqual(make_decision(db, 3), (3, "Rejected"))
+    db.close()
+
+  def test_schedule_and_publish(self):
+    self.addCleanup(build_sqlite)
+    self.cursor.execute("SELECT year, period, issue_ID FROM Issue ORDER BY issue_ID LIMIT 1")
+    year, period, issue_id = self.cursor.fetchone()
+    self.cursor.execute(
+      "UPDATE Manuscript SET status = 'ready', page_count = 1 WHERE manuscript_number = 1")
+    self.cursor.execute(
+      "UPDATE Issue SET publication_date = NULL, pages_scheduled = 0 WHERE issue_ID = %s",
+      (issue_id,))
+    self.conn.commit()
+
+    self.assertEqual(self.cursor.callproc("ScheduleManuscript", (1, year, period, 100, None))[4],
+      "scheduled")
+    self.assertEqual(self.cursor.callproc("ScheduleManuscript", (1, year, period, 100, None))[4],
+      "not ready")
+    self.assertEqual(self.scalar("SELECT pages_scheduled FROM Issue WHERE issue_ID = %s",
+      (issue_id,)), 1)
+    published = self.cursor.callproc("PublishIssue", (year, period, "2030-01-01", 0))[3]
+    self.assertGreaterEqual(published, 1)
+    self.assertEqual(self.scalar("SELECT status FROM Manuscript WHERE manuscript_number = 1"),
+      "published")
+    self.assertIsNone(self.cursor.callproc("PublishIssue", (1900, 1, "2030-01-01", 0))[3])
+
+
+class SharedMemoryLockTest(unittest.TestCase):
+  """
+    Connections to the shared in-memory database never see each other's
+    uncommitted writes; they wait for the writer's table lock instead.
+  """
+
+  @classmethod
+  def setUpClass(cls):
+    build_sqlite()
+
+  def setUp(self):
+    self.writer = SQLiteConnection()
+    self.addCleanup(self.writer.close)
+    self.cursor = self.writer.cursor()
+    self.addCleanup(self.cursor.close)
+    self.cursor.execute("SELECT title FROM Manuscript WHERE manuscript_number = 1")
+    self.title = self.cursor.fetchone()[0]
+    self.cursor.execute(
+      "UPDATE Manuscript SET title = 'uncommitted' WHERE manuscript_number = 1")
+    self.addCleanup(self.writer.rollback)
+
+  def read_title(self, timeout: float):
+    reader = SQLiteConnection(timeout=timeout)
+    cursor = reader.cursor()
+    try:
+      cursor.execute("SELECT title FROM Manuscript WHERE manuscript_number = 1")
+      return cursor.fetchone()[0]
+    finally:
+      cursor.close()
+      reader.close()
+
+  def test_reader_waits_for_writer(self):
+    timer = threading.Timer(0.1, self.writer.rollback)
+    timer.start()
+    self.addCleanup(timer.join)
+    self.assertEqual(self.read_title(timeout=5), self.title)
+
+  def test_lock_wait_timeout(self):
+    with self.assertRaises(OperationalError) as raised:
+      self.read_title(timeout=0.05)
+    self.assertEqual(raised.exception.errno, ER_LOCK_WAIT_TIMEOUT)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+  `iter_sql_statements` against the line-based reader it replaced.
+"""
+
+import glob
+import os
+import unittest
+
+from utils.dbutils import iter_sql_statements, read_sql_file
+
+from . import ROOT_PATH
+
+SQL_PATH = os.path.join(ROOT_PATH, "utils", "sql")
+
+# scripts with `--` comments after code on a line, which the old reader
+# kept as part of the statement; see `test_trailing_comment`.
+TRAILING_COMMENTS = {"triggertest.sql"}
+
+
+def legacy_read_sql_file(path: str):
+  """
+    The line-concatenating reader used before the tokenizer.
+  """
+  commands = []
+  delim = ';'
+  block_comment = False
+  with open(path, 'r') as f:
+    command = ""
+    for line in f:
+      line = line.strip()
+      if line == '':
+        continue
+      elif block_comment and line.endswith("*/"):
+        block_comment = False
+        continue
+      elif line.startswith('/*'):
+        block_comment = True
+        continue
+      elif block_comment:
+        continue
+      elif line.startswith('--'):
+        continue
+      elif line.startswith("DELIMITER"):
+        delim = line.split(" ")[1]
+        if len(command) > 0:
+          commands.append(command)
+          command = ""
+      else:
+        command += f"\n{line}"
+        if command.endswith(delim):
+          commands.append(command.replace(delim, ""))
+          command = ""
+  return commands
+
+
+def normalized(statements):
+  return [" ".join(statement.split()) for statement in statements if statement.strip()]
+
+
+def split(script: str):
+  return list(iter_sql_statements(script.splitlines(keepends=True)))
+
+
+class TokenizerTest(unittest.TestCase):
+
+  def test_repo_scripts_match_legacy_reader(self):
+    scripts = sorted(
+      glob.glob(os.path.join(SQL_PATH, "*.sql"))
+      + glob.glob(os.path.join(SQL_PATH, "migrations", "*.sql"))
+      + glob.glob(os.path.join(SQL_PATH, "sqlite", "*.sql"))
+    )
+    self.assertTrue(scripts)
+    for path in scripts:
+      if os.path.basename(path) in TRAILING_COMMENTS:
+        continue
+      with self.subTest(script=os.path.relpath(path, SQL_PATH)):
+        self.assertEqual(
+          normalized(read_sql_file(path)), normalized(legacy_read_sql_file(path)))
+
+  def test_delimiter_inside_string(self):
+    self.assertEqual(
+      split("INSERT INTO t VALUES ('a;b', \"c;d\");\nSELECT 1;\n"),
+      ["INSERT INTO t VALUES ('a;b', \"c;d\")", "SELECT 1"])
+
+  def test_comment_markers_inside_string(self):
+    self.assertEqual(
+      split("SELECT '/* not -- a comment */', 'it''s # fine';\n"),
+      ["SELECT '/* not -- a comment */', 'it''s # fine'"])
+
+  def test_comments_dropped_hints_kept(self):
+    statements = split(
+      "/* header\n   spanning lines; */\n"
+      "SELECT 1 -- trailing; comment\n"
+      "  /*+ NO_INDEX_MERGE(t) */ FROM t # another\n;\n"
+      "SELECT /*!80000 SQL_NO_CACHE */ 2;\n"
+    )
+    self.assertEqual(normalized(statements), [
+      "SELECT 1 /*+ NO_INDEX_MERGE(t) */ FROM t",
+      "SELECT /*!80000 SQL_NO_CACHE */ 2",
+    ])
+
+  def test_double_dash_needs_whitespace(self):
+    self.assertEqual(split("SELECT 1--1;\n"), ["SELECT 1--1"])
+
+  def test_delimiter_blocks(self):
+    statements = split(
+      "DELIMITER $$\n"
+      "CREATE TRIGGER t BEFORE INSERT ON x FOR EACH ROW\n"
+      "BEGIN\n  SET @a = ';';\n  SET @b = 2;\nEND$$\n"
+      "DELIMITER ;\n"
+      "SELECT 3;\n"
+    )
+    self.assertEqual(len(statements), 2)
+    self.assertTrue(statements[0].startswith("CREATE TRIGGER"))
+    self.assertIn("SET @a = ';';", statements[0])
+    self.assertTrue(statements[0].endswith("END"))
+    self.assertEqual(statements[1], "SELECT 3")
+
+  def test_trailing_comment(self):
+    # the old reader kept these; the tokenizer drops them.
+    statements = split("INSERT INTO t VALUES\n(1), -- first\n(2); -- second\n")
+    self.assertEqual(normalized(statements), ["INSERT INTO t VALUES (1), (2)"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -8,8 +8,21 @@ from .editor import Editor
 from .reviewer import Reviewer
 from .superuser import SuperUser
 
-from .dbconfig import connect, DBParseError, DBConnectError, ConnectionHandler
-from .dbutils import build_database
+from .dbconfig import (
+  connect, read_db_config, get_pool, close_pools, DBParseError, DBConnectError,
+  ConnectionHandler, ConnectionPool, register_backend
+)
+from .sqlitedb import SQLiteConnection
+from .dbutils import (
+  build_database, apply_migrations, schema_is_current,
+  export_tables, import_tables
+)
+from .server import SessionServer, serve
+from .session import SessionStore, SESSIONS
+from .cache import StatusCache, STATUS_CACHE
+from .metrics import QueryMetrics, METRICS
+from .plans import capture_baseline, check_plans, verify_indexes
+from .commands import CommandRegistry, Arg, add_hook, remove_hook
 
 __all__ = [
   'User', 'SuperUser',
@@ -17,9 +30,17 @@ __all__ = [
   'Author',
   'Editor',
   'Reviewer',
-  'connect',
+  'connect', 'read_db_config', 'get_pool', 'close_pools', 'ConnectionPool',
+  'register_backend', 'SQLiteConnection',
   'DBParseError',
   'Logging',
   'DBConnectError',
-  'warn', 'info', 'build_database'
+  'warn', 'info', 'build_database',
+  'apply_migrations', 'schema_is_current', 'verify_indexes',
+  'export_tables', 'import_tables',
+  'capture_baseline', 'check_plans',
+  'SessionServer', 'serve',
+  'CommandRegistry', 'Arg', 'add_hook', 'remove_hook',
+  'StatusCache', 'STATUS_CACHE', 'QueryMetrics', 'METRICS',
+  'SessionStore', 'SESSIONS'
 ]
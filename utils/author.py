@@ -4,17 +4,36 @@
 from mysql.connector import MySQLConnection, Error, errorcode, FieldType
 from getpass import getpass
 from datetime import date
-import shlex
+from itertools import chain
 from .dbconfig import read_db_config
+from . import statements
+from .render import TableRenderer, MANUSCRIPT_STATUS_COLUMNS
 from .user import User
+from .cache import STATUS_CACHE, collect
+from .summary import summary
+from .commands import CommandRegistry, Arg
 from .logging import Logging, warn
+from .sqlitedb import fold
+
+# stored for accounts that must not log in: no MD5 digest equals it,
+# and it is neither NULL nor empty (which `login.credentials` accepts).
+UNUSABLE_PASSWORD = "!"
+
+def fold_name(f_name: str, l_name: str):
+  """
+    Fold a name for comparison: case and accents are ignored,
+    as in the `utf8mb4_0900_ai_ci` lookups of `resolve_co_authors`.
+  """
+  return fold(f_name), fold(l_name)
 
 # Author Functionalities
 class Author(User):
-  def __init__(self, author_id: int, conn: MySQLConnection):
+  commands = CommandRegistry("Author")
+
+  def __init__(self, author_id: int, conn: MySQLConnection, greeting: str = None):
     self.author_id = author_id
     self.conn = conn
-    self.is_valid = self.login()
+    self.is_valid = self.login(greeting)
 
   def __bool__(self):
     return self.is_valid
@@ -28,14 +47,15 @@ class Author(User):
 
 
   # 3. author login.
-  def login(self):
+  def login(self, greeting: str = None):
     """
       Author login.
       
       Params
       ------
-      `author_id`: int
-        Author ID.
+      `greeting`: str
+        Greeting already fetched along with the credentials;
+        queried here if not given.
 
       Returns
       -------
@@ -49,69 +69,68 @@ class Author(User):
     success = False
 
     try:
-      cursor = self.conn.cursor()
-      cursor.execute(query)
-      result = cursor.fetchone()
-      cursor.close()
-      if result:
+      if greeting is None:
+        cursor = self.conn.cursor()
+        cursor.execute(query)
+        result = cursor.fetchone()
+        cursor.close()
+        greeting = result[0] if result else None
+      if greeting:
         success = True
-        print(result[0], "\n")
-        print(f"Status:\n{self.status()}\n")
+        print(greeting, "\n")
+        print("Summary:")
+        self.summary()
+        print()
     except Error as error:
       print(error)
 
     return success
 
   # 2. author status.
-  def status(self):
+  def status(self, mode="plain", out=None):
     """
-      Return a status of the current author's manuscripts.
+      Print the status of the current author's manuscripts.
 
       Parameters
       ----------
-      `author_id`: int
-        Author ID.
+      `mode`: str
+        Output format: "plain", "tsv" or "json".
+      `out`:
+        Text stream to write to (default: stdout).
 
       Returns
       -------
-        String value representing the status of all manuscripts
-        where author is primary author.
+        int: number of manuscripts where author is primary author.
+
+      The rendered listing is cached (see `STATUS_CACHE`) until a write
+      touches one of its manuscripts or the author submits another.
     """
-    query = f"""
-      SELECT LeadAuthorManuscripts.manuscript_number, Manuscript.status
-      FROM LeadAuthorManuscripts, Manuscript
-      WHERE LeadAuthorManuscripts.author_id = {self.author_id}
-      AND LeadAuthorManuscripts.manuscript_number = Manuscript.manuscript_number
+    def render(buffer, manuscripts):
+      # every row carries the last change date; read it off the first
+      # row so it can head the listing.
+      cursor = statements.execute(self.conn, "author.status", (self.author_id,))
+      first = cursor.fetchone()
+      last_change_date = first[2] if first is not None else None
+      rows = chain([first], cursor) if first is not None else ()
+      return TableRenderer(MANUSCRIPT_STATUS_COLUMNS, mode, buffer).render(
+        collect(((number, status) for number, status, _ in rows), manuscripts),
+        empty="Author has no manuscripts.",
+        preamble=f"Last Change: {last_change_date}"
+      )
+
+    return STATUS_CACHE.render(("Author", self.author_id, mode), out, render)
+
+
+  def summary(self, mode="plain", out=None):
     """
+      Print the author's lead-author manuscript counts by status,
+      read from the summary counters.
 
-    time_stamp = f"""
-      SELECT MAX(Manuscript.status_change_date)
-      FROM Manuscript, LeadAuthorManuscripts
-      WHERE LeadAuthorManuscripts.author_id = {self.author_id}
-      AND LeadAuthorManuscripts.manuscript_number = Manuscript.manuscript_number
+      Returns
+      -------
+        int: number of manuscripts where author is primary author.
     """
-
-    cursor = self.conn.cursor()
-    cursor.execute(query)
-    
-    title = "Status"
-    title = f"| Manuscript #### | {title:>30} |"
-    delim = "-" * len(title)
-
-    results = ""
-    for row in cursor:
-      manuscript_number, status = row
-      results += f"| Manuscript {manuscript_number:4d} | {status:>30} |\n{delim}\n"
-    if len(results) == 0:
-      results = "Author has no manuscripts."
-    else:
-      cursor.execute(time_stamp)
-      last_change_date = cursor.fetchone()[0]
-      title = f"\nLast Change: {last_change_date}\n\n{delim}\n" + title
-      results = f"{delim}\n{title}\n{delim}\n{results}"
-    cursor.close()
-
-    return Logging.info(results)
+    return summary(self.conn, "author", self.author_id, mode, out)
 
     
   # 4. author submit
@@ -128,10 +147,12 @@ class Author(User):
         Affiliation (organization) of the author.
       `i_code`: str
         Institutional code of the author.
-      `author_two`: int
-        Author ID of the second author.
-      `author_three`: int
-        Author ID of the third author.
+      `author_two`: str
+        Name ("<first name> <last name>") of the second author.
+      `author_three`: str
+        Name of the third author.
+      `author_four`: str
+        Name of the fourth author.
       `filename`: str
         Filename of the manuscript.
 
@@ -139,67 +160,140 @@ class Author(User):
       -------
       bool: True if the manuscript was submitted successfully, False otherwise.
     """
-    author_one = self.author_id
-
-    queries = [
-      f"""
-        INSERT INTO Manuscript (title, date_received, status, RICodes_code)
-        VALUES ('{title}', \"{date.today()}\", "submitted", '{i_code}')
-      """,
-      f"""
-        INSERT INTO Manuscript_Author (Author_author_id, Manuscript_manuscript_number, author_ordinal)
-        VALUES ({author_one}, (SELECT MAX(manuscript_number) FROM Manuscript), 1)
-      """
-    ]
-
-    if author_two:
-      author_two_tokens = author_two.split(" ")
-      author_two_fname = author_two_tokens[0]
-      author_two_lname = author_two_tokens[1] if len(author_two_tokens) > 1 else ""
-      print(f"Author two is:  --> {author_two_fname}, {author_two_lname}")
-      self.register_author_if_nonexistent(author_two_fname, author_two_lname, "", affiliation)
-      author_two_id = self.get_author_id(author_two_fname, author_two_lname)
-      queries.append(f"""
-        INSERT INTO Manuscript_Author (Author_author_id, Manuscript_manuscript_number, author_ordinal)
-        VALUES ({author_two_id}, (SELECT MAX(manuscript_number) FROM Manuscript), 2)
-      """)
-    if author_three:
-      author_three_tokens = author_three.split(" ")
-      author_three_fname = author_three_tokens[0]
-      author_three_lname = author_three_tokens[1] if len(author_three_tokens) > 1 else ""
-      self.register_author_if_nonexistent(author_three_fname, author_three_lname, "", affiliation)
-      author_three_id = self.get_author_id(author_three_fname, author_three_lname)
-      queries.append(f"""
-        INSERT INTO Manuscript_Author (Author_author_id, Manuscript_manuscript_number, author_ordinal)
-        VALUES ({author_three_id}, (SELECT MAX(manuscript_number) FROM Manuscript), 3)
-      """)
-
-    if author_four:
-      author_four_tokens = author_four.split(" ")
-      author_four_fname = author_four_tokens[0]
-      author_four_lname = author_four_tokens[1] if len(author_four_tokens) > 1 else ""
-      self.register_author_if_nonexistent(author_four_fname, author_four_lname, "", affiliation)
-      author_four_id = self.get_author_id(author_four_fname, author_four_lname)
-      queries.append(f"""
-        INSERT INTO Manuscript_Author (Author_author_id, Manuscript_manuscript_number, author_ordinal)
-        VALUES ({author_four_id}, (SELECT MAX(manuscript_number) FROM Manuscript), 4)
-      """)
+    # co-authors are given as "<first name> <last name>", in author order.
+    co_authors = []
+    for name in (author_two, author_three, author_four):
+      if name:
+        name_tokens = name.split(" ")
+        co_authors.append(
+          (name_tokens[0], name_tokens[1] if len(name_tokens) > 1 else ""))
 
     success = False
 
+    # everything below is one transaction: committed once at the end,
+    # rolled back as a whole if any statement fails.
     try:
       cursor = self.conn.cursor()
-      for query in queries:
-        cursor.execute(query)
-        self.conn.commit()
+      cursor.execute(
+        """
+          INSERT INTO Manuscript (title, date_received, status, RICodes_code)
+          VALUES (%s, %s, 'submitted', %s)
+        """,
+        (title, date.today(), i_code)
+      )
+      manuscript_number = cursor.lastrowid
+
+      author_ids = self.resolve_co_authors(cursor, co_authors, affiliation)
+
+      cursor.executemany(
+        """
+          INSERT INTO Manuscript_Author (Author_author_id, Manuscript_manuscript_number, author_ordinal)
+          VALUES (%s, %s, %s)
+        """,
+        [
+          (author_id, manuscript_number, ordinal)
+          # an author named twice keeps their first position.
+          for ordinal, author_id in enumerate(dict.fromkeys([self.author_id] + author_ids), start=1)
+        ]
+      )
+      self.conn.commit()
+      STATUS_CACHE.invalidate(owners=[("Author", self.author_id)])
       success = True
     except Error as error:
+      self.conn.rollback()
       print(error)
     finally:
       cursor.close()
 
     return success
 
+  def resolve_co_authors(self, cursor, names: "list[tuple[str, str]]", affiliation: str):
+    """
+      Look up the author IDs of co-authors, registering the missing ones.
+
+      Existing authors are found with a single query; missing ones are
+      inserted in one batch and looked up again. Names are matched
+      case- and accent-insensitively in the query, so "ada lovelace"
+      resolves to an existing "Ada Lovelace" on every backend.
+      Runs inside the caller's transaction.
+
+      Co-authors registered here get an unusable password: they cannot
+      log in until a password is set for them.
+
+      Parameters
+      ----------
+      `cursor`:
+        cursor of the caller's transaction.
+      `names`: list of (str, str)
+        first and last names of the co-authors.
+      `affiliation`: str
+        Affiliation of newly registered co-authors.
+
+      Returns
+      -------
+      list of int: Author IDs, in the same order as `names`.
+    """
+    if not names:
+      return []
+
+    def lookup(pending):
+      # the collation is given explicitly, so names match case- and
+      # accent-insensitively whatever the columns were declared with;
+      # with MySQL's default collation the Author_name index still applies.
+      matches = " OR ".join([
+        "(f_name = %s COLLATE utf8mb4_0900_ai_ci AND l_name = %s COLLATE utf8mb4_0900_ai_ci)"
+      ] * len(pending))
+      cursor.execute(
+        f"""
+          SELECT f_name, l_name, author_ID
+          FROM Author
+          WHERE {matches}
+          ORDER BY author_ID DESC
+        """,
+        [part for name in pending for part in name]
+      )
+      # keyed by the folded name, so each input finds its row whatever
+      # spelling the database returned; the lowest ID wins.
+      return {fold_name(*row[:2]): row[2] for row in cursor.fetchall()}
+
+    # one entry per distinct folded name, keeping the first spelling given.
+    unique_names = {}
+    for name in names:
+      unique_names.setdefault(fold_name(*name), name)
+    found = lookup(list(unique_names.values()))
+
+    missing = [name for key, name in unique_names.items() if key not in found]
+    if missing:
+      cursor.executemany(
+        """
+          INSERT INTO Author (f_name, l_name, email, Affiliation_affiliation_ID)
+          VALUES (%s, %s, '', %s)
+        """,
+        [(f_name, l_name, affiliation) for f_name, l_name in missing]
+      )
+      registered = lookup(missing)
+      found.update(registered)
+      if registered:
+        placeholders = ", ".join(["%s"] * len(registered))
+        cursor.execute(
+          f"""
+            UPDATE credentials
+            SET password = '{UNUSABLE_PASSWORD}'
+            WHERE user_type = 'Author' AND type_id IN ({placeholders})
+          """,
+          list(registered.values())
+        )
+      for f_name, l_name in missing:
+        print(f"Registered co-author {f_name} {l_name} (no login until a password is set).")
+
+    author_ids = []
+    for name in names:
+      author_id = found.get(fold_name(*name))
+      if author_id is None:
+        raise Error(msg=f"co-author {' '.join(name)} could not be registered.")
+      author_ids.append(author_id)
+    return author_ids
+
   def get_author_id(self, fname: str, lname: str):
     """
       Get the author ID of an author.
@@ -215,15 +309,7 @@ class Author(User):
       -------
       int: Author ID.
     """
-    query = f"""
-      SELECT author_id FROM Author
-      WHERE f_name = '{fname}'
-      AND l_name = '{lname}'
-    """
-
-    cursor = self.conn.cursor()
-    cursor.execute(query)
-    row = cursor.fetchone()
+    row = statements.fetchone(self.conn, "author.by_name", (fname, lname))
     return int(row[0])
 
 
@@ -310,81 +396,47 @@ class Author(User):
       bool: True if the author was registered successfully, False otherwise.
     """
 
-    query = f"""
-      SELECT * FROM Author
-      WHERE f_name = '{f_name}'
-      AND l_name = '{l_name}'
-    """
-
-    cursor = self.conn.cursor()
-    cursor.execute(query)
-    row = cursor.fetchone()
+    row = statements.fetchone(self.conn, "author.by_name", (f_name, l_name))
     if row:
       return False
     else:
       return self.register_author(f_name, l_name, email, affiliation)
 
-  def handle_request(self, request: str):
-    """
-      Handle a request
-
-      Parameters
-      ----------
-      `request`: str
-        The request to handle.
-        Possible values:
-
-        - `register author <fname> <lname> <email> <affiliation>`
-        - `login <id>`
-        - `submit <title> <Affiliation> <ICode> <author2> <author3> <author4> <filename>`
-        - `status`
-    """
-
-    request_tokens  = shlex.split(request)
-    request_type = request_tokens[0].lower() if len(request_tokens) > 0 else ""
-
-    if request_type == "status":
-      print(f"Author ID: {self.author_id}\n{self.status()}")
-
-    elif request_type == "register":
-      if len(request_tokens) < 6:
-        print("Invalid request: too few arguments.")
-        return
-      if request_tokens[1].lower() != "author":
-        print("Invalid request.")
-        return
-
-      f_name = request_tokens[2]
-      l_name = request_tokens[3]
-      email = request_tokens[4]
-      affiliation = request_tokens[5]
-
-      if self.register_author_if_nonexistent(f_name, l_name, email, affiliation):
-        print("Author registered successfully.")
-      else:
-        print("Author registration failed.")
-    elif request_type == "submit":
-      if len(request_tokens) < 4:
-        print("Invalid request: not enough arguments.")
-        return
-
-      title = request_tokens[1]
-      affiliation = request_tokens[2]
-      i_code = request_tokens[3]
-      
-      author_two = request_tokens[4] if len(request_tokens) > 4 else ""
-      author_three = request_tokens[5] if len(request_tokens) > 5 else ""
-      author_four = request_tokens[6] if len(request_tokens) > 6 else ""
-      filename = request_tokens[7] if len(request_tokens) > 7 else ""
-      
-
-      if self.submit_manuscript(title, affiliation, i_code, author_two, author_three, author_four, filename):
-        print("Manuscript submitted successfully.")
-      else:
-        print("Manuscript submission failed.")
-
-    else:
-      print("Invalid request.")
+  @commands.command("status", options=("format",),
+    help="List your manuscripts and their statuses.")
+  def status_command(self, mode):
+    if mode == "plain":
+      print(f"Author ID: {self.author_id}")
+    return self.status(mode)
+
+  @commands.command("summary", options=("format",),
+    help="Count your manuscripts by status.")
+  def summary_command(self, mode):
+    return self.summary(mode)
+
+  @commands.command("register",
+    Arg("role", choices=("author",)), Arg("f_name"), Arg("l_name"), Arg("email"), Arg("affiliation"),
+    help="Register a new author.")
+  def register_command(self, role, f_name, l_name, email, affiliation):
+    if self.register_author_if_nonexistent(f_name, l_name, email, affiliation):
+      print("Author registered successfully.")
+      return True
+    print("Author registration failed.")
+    return False
+
+  @commands.command("submit",
+    Arg("title"), Arg("affiliation"), Arg("i_code"),
+    Arg("author_two", required=False, default=""),
+    Arg("author_three", required=False, default=""),
+    Arg("author_four", required=False, default=""),
+    Arg("filename", required=False, default=""),
+    help="Submit a manuscript, with up to three co-authors.")
+  def submit_command(self, title, affiliation, i_code, author_two, author_three, author_four, filename):
+    if self.submit_manuscript(title, affiliation, i_code, author_two, author_three, author_four, filename):
+      print("Manuscript submitted successfully.")
+      return True
+    print("Manuscript submission failed.")
+    return False
     
 
 def test_author():
@@ -437,15 +489,18 @@ def test_author():
     author_two = input("Author two: ") or None
     author_three = input("Author three: ") or None
     author_four = input("Author four: ") or None
-    print(f"Current status: \n{author.status()}")
+    print("Current status:")
+    author.status()
     success = author.submit_manuscript(title, affiliation, icode, author_two, author_three, author_four)
     if success:
       print("Manuscript submitted successfully.")
-      print(f"New status: {author.status()}")
+      print("New status:")
+      author.status()
     else:
       print("Manuscript submission failed.")
 
-    print(f"Author status: \n{author.status()}")
+    print("Author status:")
+    author.status()
 
 def test_author_handle_request():
   print("\n\nTesting author handle request...\n")
@@ -460,7 +515,8 @@ def test_author_handle_request():
   while True:
     request = input("Enter request: ")
     author.handle_request(request)
-    print(f"Author status: \n{author.status()}")
+    print("Author status:")
+    author.status()
   return
 
 if __name__ == "__main__":
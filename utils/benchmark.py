@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Latency and throughput benchmarks for the role methods.
+
+  Runs each journal workflow operation (status listings, summaries,
+  submissions, assignments, scheduling, publishing) through the same
+  role classes the prompt uses, against the database in dbconfig.ini,
+  and reports p50/p95/p99 latency and throughput:
+
+    python -m utils.datagen --scale 100 --load
+    python -m utils.benchmark --iterations 500 -o results.json
+
+  Write operations change the data; run against a disposable database.
+  Results are saved as JSON so runs can be compared between releases.
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from .dbconfig import get_pool, ConnectionHandler
+from .cache import STATUS_CACHE
+from .author import Author
+from .editor import Editor
+from .reviewer import Reviewer
+from .superuser import SuperUser
+from .logging import info, warn
+
+
+def percentile(samples: List[float], p: float) -> float:
+  """
+    Nearest-rank percentile of sorted `samples`.
+  """
+  if not samples:
+    return 0.0
+  rank = max(1, min(len(samples), round(p / 100 * len(samples) + 0.5)))
+  return samples[rank - 1]
+
+
+# returned by an operation that has run out of work; measuring stops there.
+SKIPPED = object()
+
+
+def measure(operation: Callable[[int], object], iterations: int, cached=False) -> dict:
+  """
+    Call `operation(i)` for i in range(iterations) and summarize its latency.
+
+    A call that raises or returns False counts as an error. A call that
+    returns `SKIPPED` ends the run early and is not timed, so `iterations`
+    in the result is the number of calls actually measured. The status
+    cache is cleared before every call unless `cached` is set, so listings
+    are measured against the database.
+  """
+  samples, errors = [], 0
+  sink = io.StringIO()
+  started = perf_counter()
+  for i in range(iterations):
+    if not cached:
+      STATUS_CACHE.clear()
+    start = perf_counter()
+    try:
+      with redirect_stdout(sink):
+        result = operation(i)
+      ok = result is not False
+    except Exception:
+      result, ok = None, False
+    if result is SKIPPED:
+      break
+    samples.append(perf_counter() - start)
+    errors += 0 if ok else 1
+    # role methods print; keep the sink from growing without bound.
+    sink.seek(0)
+    sink.truncate()
+  elapsed = perf_counter() - started
+
+  samples.sort()
+  return {
+    "iterations": len(samples),
+    "errors": errors,
+    "p50_ms": percentile(samples, 50) * 1000,
+    "p95_ms": percentile(samples, 95) * 1000,
+    "p99_ms": percentile(samples, 99) * 1000,
+    "max_ms": samples[-1] * 1000 if samples else 0.0,
+    "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+    "ops_per_s": len(samples) / elapsed if elapsed > 0 else 0.0,
+  }
+
+
+def _ids(conn: ConnectionHandler, query: str, limit: int) -> List:
+  cursor = conn.cursor()
+  cursor.execute(f"{query} LIMIT {int(limit)}")
+  rows = cursor.fetchall()
+  cursor.close()
+  return [row[0] if len(row) == 1 else row for row in rows]
+
+
+def table_sizes(conn: ConnectionHandler) -> Dict[str, int]:
+  """
+    Row counts of the tables the workload touches.
+  """
+  sizes = {}
+  cursor = conn.cursor()
+  for table in ("Author", "Editor", "Reviewer", "Issue", "Manuscript",
+    "Manuscript_Author", "Reviewer_has_Manuscript"):
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    sizes[table] = cursor.fetchone()[0]
+  cursor.close()
+  return sizes
+
+
+def run(conn: ConnectionHandler, iterations=200, seed=0, cached=False,
+  only: List[str] = None) -> Dict[str, dict]:
+  """
+    Benchmark every operation, or those named in `only`.
+
+    Users and manuscripts are sampled from the database, so any populated
+    database works; operations without suitable rows are skipped.
+  """
+  rng = random.Random(seed)
+  sample = max(iterations, 100)
+
+  authors = _ids(conn, "SELECT DISTINCT Author_author_ID FROM Manuscript_Author WHERE author_ordinal = 1", sample)
+  editors = _ids(conn, "SELECT editor_ID FROM Editor", sample)
+  reviewers = _ids(conn, "SELECT DISTINCT Reviewer_reviewer_ID FROM Reviewer_has_Manuscript", sample)
+  codes = _ids(conn, "SELECT DISTINCT RICodes_code FROM Reviewer_has_RICodes", sample)
+  # (manuscript, reviewer) pairs not yet assigned, matched on RICode.
+  assignable = _ids(conn, """
+    SELECT Manuscript.manuscript_number, Reviewer_has_RICodes.Reviewer_reviewer_ID
+    FROM Manuscript
+    JOIN Reviewer_has_RICodes ON Reviewer_has_RICodes.RICodes_code = Manuscript.RICodes_code
+    LEFT JOIN Reviewer_has_Manuscript
+      ON Reviewer_has_Manuscript.Manuscript_manuscript_number = Manuscript.manuscript_number
+      AND Reviewer_has_Manuscript.Reviewer_reviewer_ID = Reviewer_has_RICodes.Reviewer_reviewer_ID
+    WHERE Manuscript.status = 'submitted'
+    AND Reviewer_has_Manuscript.Reviewer_reviewer_ID IS NULL
+  """, iterations)
+  under_review = _ids(conn, """
+    SELECT Reviewer_has_Manuscript.Reviewer_reviewer_ID, Manuscript.manuscript_number
+    FROM Reviewer_has_Manuscript
+    JOIN Manuscript ON Manuscript.manuscript_number = Reviewer_has_Manuscript.Manuscript_manuscript_number
+    WHERE Manuscript.status = 'under review'
+    AND Reviewer_has_Manuscript.recommendation IS NULL
+  """, iterations)
+  ready = _ids(conn, "SELECT manuscript_number FROM Manuscript WHERE status = 'ready'", iterations)
+  open_issues = _ids(conn, """
+    SELECT CONCAT(year, '-', period) FROM Issue
+    WHERE publication_date IS NULL ORDER BY year, period
+  """, iterations)
+  scheduled_issues = _ids(conn, """
+    SELECT DISTINCT CONCAT(Issue.year, '-', Issue.period) FROM Issue
+    JOIN Manuscript ON Manuscript.Issue_issue_ID = Issue.issue_ID
+    WHERE Manuscript.status = 'schedule for publication'
+  """, iterations)
+
+  # one role object per user, built quietly (login prints a banner).
+  with redirect_stdout(io.StringIO()):
+    author_roles = [Author(author_id, conn) for author_id in authors[:20]]
+    editor_roles = [Editor(editor_id, conn) for editor_id in editors[:20]]
+    reviewer_roles = [Reviewer(reviewer_id, conn) for reviewer_id in reviewers[:20]]
+    opinions = [(Reviewer(reviewer_id, conn), number) for reviewer_id, number in under_review]
+  admin = SuperUser(1, conn)
+
+  def pick(roles):
+    return roles[rng.randrange(len(roles))]
+
+  def limited(items, operation):
+    """
+      Run `operation` on each item once; later iterations are skipped.
+    """
+    return lambda i: operation(items[i]) if i < len(items) else SKIPPED
+
+  operations = {
+    "author.status": (author_roles, lambda i: pick(author_roles).status()),
+    "author.summary": (author_roles, lambda i: pick(author_roles).summary()),
+    "author.submit": (author_roles and codes, lambda i: pick(author_roles).submit_manuscript(
+      f"benchmark manuscript {i}", "1", str(rng.choice(codes)))),
+    "editor.status": (editor_roles, lambda i: pick(editor_roles).status()),
+    "editor.next": (editor_roles, lambda i: editor_roles[0].next_page()
+      if i % 4 else editor_roles[0].status()),
+    "editor.summary": (editor_roles, lambda i: pick(editor_roles).summary()),
+    "editor.assign": (editor_roles and assignable, limited(assignable,
+      lambda pair: editor_roles[0].assign_reviewer(*pair))),
+    "editor.schedule": (editor_roles and ready and open_issues, limited(ready,
+      lambda number: editor_roles[0].schedule_manuscript(number, rng.choice(open_issues)))),
+    "editor.publish": (editor_roles and scheduled_issues, limited(scheduled_issues,
+      lambda issue: editor_roles[0].publish_issue(issue) is not None)),
+    "reviewer.status": (reviewer_roles, lambda i: pick(reviewer_roles).status()),
+    "reviewer.reviews": (reviewer_roles, lambda i: pick(reviewer_roles).reviews()),
+    "reviewer.opinion": (opinions, limited(opinions,
+      lambda pair: pair[0].accept_manuscript(pair[1], 8, 8, 8, 8))),
+    "admin.status": (True, lambda i: admin.status()),
+  }
+
+  results = {}
+  for name, (available, operation) in operations.items():
+    if only and name not in only:
+      continue
+    if not available:
+      warn(f"  skipped    {name:<20} no suitable rows")
+      continue
+    result = measure(operation, iterations, cached)
+    results[name] = result
+    info(f"  {name:<20} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+      f"p99 {result['p99_ms']:8.2f} ms  {result['ops_per_s']:10,.1f} ops/s"
+      + (f"  ({result['iterations']} calls)" if result["iterations"] < iterations else "")
+      + (f"  ({result['errors']} errors)" if result["errors"] else ""))
+  return results
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the journal workflow.")
+  parser.add_argument("--iterations", type=int, default=200,
+    help="calls per operation (default: 200)")
+  parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+  parser.add_argument("--cached", action="store_true",
+    help="let status listings hit the status cache")
+  parser.add_argument("--only", nargs="+", metavar="OPERATION",
+    help="run only these operations, e.g. author.status editor.assign")
+  parser.add_argument("-o", "--output", metavar="FILE", help="save results as JSON")
+  parser.add_argument("--config", default="dbconfig.ini", help="database configuration file")
+  args = parser.parse_args()
+
+  with get_pool(args.config).checkout() as conn:
+    sizes = table_sizes(conn)
+    info("Dataset: " + ", ".join(f"{table} {rows:,}" for table, rows in sizes.items()))
+    results = run(conn, args.iterations, args.seed, args.cached, args.only)
+    server_version = ".".join(str(part) for part in conn.get_server_version())
+
+  report = {
+    "started": datetime.now().isoformat(timespec="seconds"),
+    "iterations": args.iterations,
+    "seed": args.seed,
+    "cached": args.cached,
+    "mysql": server_version,
+    "python": platform.python_version(),
+    "dataset": sizes,
+    "results": results,
+  }
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(report, f, indent=2)
+      f.write("\n")
+  else:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Per-process cache of rendered status listings.
+
+  Authors and reviewers run `status` far more often than anything they
+  look at changes, so their rendered output is kept, keyed by
+  (role, id, output mode), for up to `ttl` seconds. Write paths in this
+  process invalidate the entries listing the manuscripts they touch;
+  the TTL bounds how stale a listing can get through writes made by
+  other processes.
+
+  Listings are streamed to the caller as they render; only those small
+  enough to be worth keeping are copied into the cache.
+"""
+
+import sys
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterable, Optional
+
+
+class StatusCache:
+  """
+    A thread-safe LRU cache with a TTL and tag-based invalidation.
+
+    Every entry is tagged with the manuscripts it lists and with its
+    owner, `(role, id)`, so writes can drop exactly the entries they
+    make stale.
+
+    Parameters
+    ----------
+    `max_entries`: int
+      entries kept before the least recently used is evicted.
+    `ttl`: float
+      seconds an entry stays valid.
+    `max_entry_size`: int
+      characters of output a listing may have and still be cached;
+      longer listings are streamed but rendered afresh every time.
+  """
+
+  def __init__(self, max_entries=1024, ttl=30.0, max_entry_size=64 * 1024):
+    self.max_entries = max_entries
+    self.ttl = ttl
+    self.max_entry_size = max_entry_size
+    self.hits = 0
+    self.misses = 0
+
+    # key -> (value, expires at, tags); least recently used first.
+    self._entries = OrderedDict()
+    # tag -> keys of the entries carrying it.
+    self._tagged = {}
+    # bumped by every invalidation, so a listing rendered while a write
+    # was committing is not cached over the write.
+    self._generation = 0
+    self._lock = Lock()
+
+  def get(self, key):
+    """
+      The cached value for `key`, or None on a miss.
+    """
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and entry[1] > monotonic():
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+      if entry is not None:
+        self._remove(key)
+      self.misses += 1
+      return None
+
+  def put(self, key, value, manuscripts: Iterable[int] = (), generation: Optional[int] = None):
+    """
+      Cache `value` under `key`, tagged with the manuscripts it lists.
+
+      If `generation` is given and anything was invalidated since it was
+      read, the value may already be stale and is not cached.
+    """
+    tags = {("manuscript", number) for number in manuscripts}
+    tags.add(key[:2])
+    with self._lock:
+      if generation is not None and generation != self._generation:
+        return
+      if key in self._entries:
+        self._remove(key)
+      self._entries[key] = (value, monotonic() + self.ttl, tags)
+      for tag in tags:
+        self._tagged.setdefault(tag, set()).add(key)
+      while len(self._entries) > self.max_entries:
+        self._remove(next(iter(self._entries)))
+
+  @property
+  def generation(self) -> int:
+    return self._generation
+
+  def invalidate(self, manuscripts: Iterable[int] = (), owners: Iterable[tuple] = ()):
+    """
+      Drop entries listing any of `manuscripts` or owned by any of `owners`,
+      given as `(role, id)` pairs.
+    """
+    tags = [("manuscript", number) for number in manuscripts] + list(owners)
+    with self._lock:
+      self._generation += 1
+      for tag in tags:
+        for key in list(self._tagged.get(tag, ())):
+          self._remove(key)
+
+  def clear(self):
+    """
+      Drop every entry, e.g. after writes whose reach is not known.
+    """
+    with self._lock:
+      self._generation += 1
+      self._entries.clear()
+      self._tagged.clear()
+
+  def stats(self) -> dict:
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        "entries": len(self._entries),
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": self.hits / lookups if lookups else 0.0,
+      }
+
+  def render(self, key, out, render: Callable) -> int:
+    """
+      Write the listing cached under `key` to `out` (default: stdout),
+      rendering it on a miss.
+
+      `render(stream, manuscripts)` writes the listing to `stream`, adds
+      the manuscript numbers it lists to the `manuscripts` set, and
+      returns the row count, which is returned here too. On a miss the
+      listing reaches `out` as it renders, and is cached only if it fits
+      in `max_entry_size`.
+    """
+    out = out if out is not None else sys.stdout
+    cached = self.get(key)
+    if cached is not None:
+      text, count = cached
+      out.write(text)
+      out.flush()
+      return count
+
+    generation = self.generation
+    tee, manuscripts = Tee(out, self.max_entry_size), set()
+    count = render(tee, manuscripts)
+    if tee.copy is not None:
+      self.put(key, ("".join(tee.copy), count), manuscripts, generation)
+    return count
+
+  def _remove(self, key):
+    """
+      Drop one entry and its tag references. Must hold the lock.
+    """
+    _, _, tags = self._entries.pop(key)
+    for tag in tags:
+      keys = self._tagged.get(tag)
+      if keys is not None:
+        keys.discard(key)
+        if not keys:
+          del self._tagged[tag]
+
+
+class Tee:
+  """
+    A text stream writing through to `out` and keeping a copy of what
+    was written, until the copy would exceed `limit` characters.
+
+    `copy` is the list of chunks written, or None once over the limit.
+  """
+
+  def __init__(self, out, limit: int):
+    self.out = out
+    self.limit = limit
+    self.copy = []
+    self._size = 0
+
+  def write(self, text: str) -> int:
+    if self.copy is not None:
+      self._size += len(text)
+      if self._size > self.limit:
+        self.copy = None
+      else:
+        self.copy.append(text)
+    return self.out.write(text)
+
+  def flush(self):
+    self.out.flush()
+
+
+def collect(rows: Iterable, manuscripts: set):
+  """
+    Pass `(manuscript_number, ...)` rows through, noting their manuscripts.
+  """
+  for row in rows:
+    manuscripts.add(row[0])
+    yield row
+
+
+# the cache shared by every role in this process.
+STATUS_CACHE = StatusCache()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Table-driven request dispatch for the role prompts.
+
+  Each role declares its commands once, with a typed argument schema:
+
+    commands = CommandRegistry("Editor")
+
+    @commands.command("assign", Arg("manuscript", int), Arg("reviewer", int),
+      help="Assign a reviewer to a manuscript.")
+    def assign_command(self, manuscript, reviewer):
+      ...
+
+  `User.handle_request` looks the command up by name, converts its
+  arguments against the schema and calls the handler with them as
+  keyword arguments. `help` is built in for every role.
+"""
+
+import re
+import shlex
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .logging import warn
+from .metrics import METRICS, tagged
+from .render import parse_format
+from .pagination import parse_page_options
+
+# requests without quotes or escapes split the same with str.split,
+# which is much cheaper than shlex.
+_SHELL_CHARS = re.compile(r"[\"'\\]")
+
+# callables run after every command: hook(role, command, elapsed, ok).
+HOOKS: List[Callable] = []
+
+
+def add_hook(hook: Callable):
+  """
+    Call `hook(role, command, elapsed_seconds, ok)` after every command.
+  """
+  HOOKS.append(hook)
+
+
+def remove_hook(hook: Callable):
+  """
+    Stop calling a hook added with `add_hook`.
+  """
+  if hook in HOOKS:
+    HOOKS.remove(hook)
+
+
+# per-command latency histograms for the admin `stats` command.
+add_hook(METRICS.record_command)
+
+
+def tokenize(request: str) -> List[str]:
+  """
+    Split a request into tokens, using shlex only when quoting is present.
+  """
+  if _SHELL_CHARS.search(request) is None:
+    return request.split()
+  return shlex.split(request)
+
+
+class Arg(NamedTuple):
+  """
+    A positional argument.
+
+    `type` converts the token (e.g. `int`); `choices` restricts it to
+    fixed words (matched case-insensitively); `many` collects up to that
+    many tokens into a list. Optional arguments default to `default`.
+  """
+  name: str
+  type: Callable = str
+  required: bool = True
+  default: object = None
+  choices: Optional[tuple] = None
+  many: int = 0
+
+  @property
+  def usage(self) -> str:
+    label = "|".join(self.choices) if self.choices else f"<{self.name}>"
+    if self.many:
+      label = f"{label}..."
+    return label if self.required else f"[{label}]"
+
+  def convert(self, token: str):
+    if self.choices:
+      if token.lower() not in self.choices:
+        raise ValueError(f"{self.name} must be one of: {', '.join(self.choices)}")
+      return token.lower()
+    try:
+      return self.type(token)
+    except ValueError:
+      kind = "an integer" if self.type is int else self.type.__name__
+      raise ValueError(f"{self.name} must be {kind}") from None
+
+
+class Command:
+  """
+    A command: its handler, argument schema and help text.
+
+    `options` names the shared flags the command accepts:
+    "format" (`--format`) and "page" (`--page-size`, `--status`).
+  """
+
+  def __init__(self, name: str, handler: Callable, args=(), help="", options=()):
+    self.name = name
+    self.handler = handler
+    self.args = tuple(args)
+    self.help = help
+    self.options = frozenset(options)
+
+    # arity bounds are fixed by the schema, so work them out once.
+    self.min_args = sum(1 for arg in self.args if arg.required)
+    self.max_args = sum(arg.many or 1 for arg in self.args)
+
+  @property
+  def usage(self) -> str:
+    parts = [self.name] + [arg.usage for arg in self.args]
+    if "format" in self.options:
+      parts.append("[--format plain|tsv|json]")
+    if "page" in self.options:
+      parts.append("[--page-size <n>] [--status <status>]")
+    return " ".join(parts)
+
+  def parse(self, tokens: List[str]) -> dict:
+    """
+      Convert argument tokens to handler keyword arguments.
+
+      Raises ValueError with a user-facing message on bad input.
+    """
+    kwargs = {}
+    if "format" in self.options:
+      kwargs["mode"], tokens = parse_format(tokens)
+    if "page" in self.options:
+      kwargs["page_size"], kwargs["status"], tokens = parse_page_options(tokens)
+
+    if not self.min_args <= len(tokens) <= self.max_args:
+      expected = (f"{self.min_args}" if self.min_args == self.max_args
+        else f"{self.min_args} to {self.max_args}")
+      raise ValueError(f"`{self.name}` takes {expected} argument(s), got {len(tokens)}")
+
+    position = 0
+    for arg in self.args:
+      if arg.many:
+        values = [arg.convert(token) for token in tokens[position:position + arg.many]]
+        if arg.required and not values:
+          raise ValueError(f"missing {arg.name}")
+        kwargs[arg.name] = values
+        position += len(values)
+      elif position < len(tokens):
+        kwargs[arg.name] = arg.convert(tokens[position])
+        position += 1
+      else:
+        kwargs[arg.name] = arg.default
+    return kwargs
+
+
+class CommandRegistry:
+  """
+    The commands one role understands, keyed by name.
+  """
+
+  def __init__(self, role: str):
+    self.role = role
+    self.commands: Dict[str, Command] = {}
+
+  def command(self, name: str, *args: Arg, help="", options=()):
+    """
+      Decorator registering a role method as the handler for `name`.
+    """
+    def register(handler):
+      self.commands[name] = Command(name, handler, args, help, options)
+      return handler
+    return register
+
+  def help(self, name: Optional[str] = None) -> str:
+    """
+      Usage for one command, or a summary of all of them.
+    """
+    if name is not None:
+      command = self.commands.get(name.lower())
+      if command is None:
+        return f"Unknown command: {name}"
+      return f"Usage: {command.usage}\n  {command.help}"
+    width = max(len(name) for name in self.commands)
+    lines = [f"{self.role} commands (`help <command>` for usage):"]
+    for command in self.commands.values():
+      lines.append(f"  {command.name:<{width}}  {command.help}")
+    lines.append(f"  {'login':<{width}}  Switch to another user: login <user id>")
+    return "\n".join(lines)
+
+  def dispatch(self, user, request: str):
+    """
+      Run a request against `user`.
+
+      Returns
+      -------
+      The handler's result, or False if the request was malformed.
+    """
+    try:
+      tokens = tokenize(request)
+    except ValueError as err:
+      warn(f"Invalid request: {err}")
+      return False
+    if not tokens:
+      return None
+
+    name = tokens[0].lower()
+    if name == "help":
+      print(self.help(tokens[1] if len(tokens) > 1 else None))
+      return None
+
+    command = self.commands.get(name)
+    if command is None:
+      warn(f"Invalid request: unknown command `{tokens[0]}`; type `help` for a list.")
+      return False
+
+    try:
+      kwargs = command.parse(tokens[1:])
+    except ValueError as err:
+      warn(f"Invalid request: {err}")
+      print(f"Usage: {command.usage}")
+      return False
+
+    ok = False
+    start = perf_counter()
+    try:
+      with tagged(f"{self.role}.{name}"):
+        result = command.handler(user, **kwargs)
+      ok = result is not False
+      return result
+    finally:
+      elapsed = perf_counter() - start
+      for hook in HOOKS:
+        hook(self.role, name, elapsed, ok)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Synthetic journal datasets at any scale.
+
+  Generates a consistent dataset (affiliations, RICodes, journals, issues,
+  editors, reviewers, authors, manuscripts, authorships and reviews) as a
+  stream of INSERT statements in the foreign-key order of tables.sql, for
+  `bulk_load` or for writing out as a .sql script. The same scale and seed
+  always give the same data.
+
+  Scale 1 is 1,000 manuscripts; other tables grow in proportion:
+
+    python -m utils.datagen --scale 100 --load        # 10^5 manuscripts
+    python -m utils.datagen --scale 10 -o big.sql
+
+  Rows carry explicit ids, so load into an empty database
+  (`./main.py /rebuild` without `/populate`).
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, List
+
+from .dbconfig import connect
+from .dbutils import bulk_load
+
+MANUSCRIPTS_PER_SCALE = 1000
+
+# status mix, roughly that of data.sql.
+STATUS_WEIGHTS = {
+  "submitted": 10,
+  "under review": 20,
+  "rejected": 20,
+  "accepted": 10,
+  "in typesetting": 10,
+  "ready": 10,
+  "schedule for publication": 5,
+  "published": 15,
+}
+
+# statuses past the review stage carry scores from every reviewer.
+REVIEWED = {"rejected", "accepted", "in typesetting", "ready",
+  "schedule for publication", "published"}
+
+# manuscripts placed in an issue.
+IN_ISSUE = {"schedule for publication", "published"}
+
+WORDS = (
+  "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+  "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+  "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo "
+  "consequat duis aute irure in reprehenderit voluptate velit esse cillum"
+).split()
+
+FIRST_NAMES = (
+  "Ada Alan Barbara Claude Donald Edsger Frances Grace Hedy John Katherine "
+  "Leslie Margaret Niklaus Radia Shafi Sophie Tim Vint Yukihiro"
+).split()
+
+LAST_NAMES = (
+  "Allen Backus Cerf Dijkstra Floyd Hamilton Hopper Johnson Kay Knuth "
+  "Lamport Liskov Lovelace Perlman Ritchie Shannon Turing Wilson Wirth Zuse"
+).split()
+
+START_DATE = date(2000, 1, 1)
+
+
+def dataset_sizes(scale: float) -> Dict[str, int]:
+  """
+    Row counts of the main tables at a scale factor.
+  """
+  manuscripts = max(1, int(MANUSCRIPTS_PER_SCALE * scale))
+  return {
+    "RICodes": 40,
+    "Affiliation": max(10, manuscripts // 100),
+    "Journal": 2,
+    "Issue": max(4, manuscripts // 40),
+    "Editor": max(2, manuscripts // 500),
+    "Reviewer": max(40, manuscripts // 20),
+    "Author": max(10, manuscripts // 3),
+    "Manuscript": manuscripts,
+  }
+
+
+def _values(row) -> str:
+  """
+    Format one row as a VALUES tuple. Generated text never needs escaping.
+  """
+  cells = []
+  for value in row:
+    if value is None:
+      cells.append("NULL")
+    elif isinstance(value, (int, float)):
+      cells.append(str(value))
+    else:
+      cells.append(f"'{value}'")
+  return f"({','.join(cells)})"
+
+
+def _insert(table: str, columns: str, rows: List[tuple]) -> str:
+  return f"INSERT INTO {table} ({columns}) VALUES {', '.join(_values(row) for row in rows)}"
+
+
+def _chunks(table: str, columns: str, rows: Iterator[tuple], size: int) -> Iterator[str]:
+  """
+    Group generated rows into multi-row INSERT statements.
+  """
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) >= size:
+      yield _insert(table, columns, batch)
+      batch = []
+  if batch:
+    yield _insert(table, columns, batch)
+
+
+def generate(scale=1.0, seed=0, batch_size=1000) -> Iterator[str]:
+  """
+    Stream the INSERT statements of a dataset.
+
+    Manuscripts are generated a batch at a time, each batch followed by
+    its authorships and reviews, so memory use does not grow with scale.
+
+    Parameters
+    ----------
+    `scale`: float
+      dataset size; 1 is 1,000 manuscripts.
+    `seed`: int
+      random seed; the same seed gives the same dataset.
+    `batch_size`: int
+      rows per INSERT statement.
+  """
+  rng = random.Random(seed)
+  sizes = dataset_sizes(scale)
+
+  def name():
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+  def words(low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+  def day(low=0, high=365 * 20):
+    return (START_DATE + timedelta(days=rng.randint(low, high))).isoformat()
+
+  codes = sizes["RICodes"]
+  yield from _chunks("RICodes", "code,interest",
+    ((code, words(1, 3)) for code in range(1, codes + 1)), batch_size)
+
+  yield from _chunks("Affiliation", "affiliation_ID,name",
+    ((i, f"{words(1, 2)} institute {i}") for i in range(1, sizes["Affiliation"] + 1)), batch_size)
+
+  yield from _chunks("Journal", "journal_ID,journal_name",
+    ((i, f"journal of {words(1, 2)}") for i in range(1, sizes["Journal"] + 1)), batch_size)
+
+  yield from _chunks("Journal_has_RICodes", "Journal_journal_ID,RICodes_code",
+    ((1 + (code - 1) % sizes["Journal"], code) for code in range(1, codes + 1)), batch_size)
+
+  # issues run four a year from START_DATE; all but the last year are out.
+  issues = sizes["Issue"]
+  published_issues = max(1, issues - 4)
+  yield from _chunks("Issue", "issue_ID,year,period,publication_date,Journal_journal_ID",
+    (
+      (i, START_DATE.year + (i - 1) // 4, 1 + (i - 1) % 4,
+        date(START_DATE.year + (i - 1) // 4, 3 * (1 + (i - 1) % 4), 1).isoformat()
+          if i <= published_issues else None,
+        1 + i % sizes["Journal"])
+      for i in range(1, issues + 1)
+    ), batch_size)
+
+  editors = sizes["Editor"]
+  yield from _chunks("Editor", "editor_ID,email,f_name,l_name,Journal_journal_ID",
+    (
+      (i, f"editor{i}@example.org", *name(), 1 + i % sizes["Journal"])
+      for i in range(1, editors + 1)
+    ), batch_size)
+
+  reviewers = sizes["Reviewer"]
+  yield from _chunks("Reviewer", "reviewer_ID,email,f_name,l_name,Affiliation_affiliation_ID",
+    (
+      (i, f"reviewer{i}@example.org", *name(), rng.randint(1, sizes["Affiliation"]))
+      for i in range(1, reviewers + 1)
+    ), batch_size)
+
+  # every code gets reviewers (reviewer i covers code i mod codes and up to
+  # two more), so no manuscript is auto-rejected for lack of reviewers.
+  reviewers_by_code: Dict[int, List[int]] = {code: [] for code in range(1, codes + 1)}
+  reviewer_codes = []
+  for reviewer in range(1, reviewers + 1):
+    own = {1 + (reviewer - 1) % codes}
+    own.update(rng.randint(1, codes) for _ in range(rng.randint(0, 2)))
+    for code in sorted(own):
+      reviewers_by_code[code].append(reviewer)
+      reviewer_codes.append((reviewer, code))
+  yield from _chunks("Reviewer_has_RICodes", "Reviewer_reviewer_ID,RICodes_code",
+    iter(reviewer_codes), batch_size)
+
+  authors = sizes["Author"]
+  yield from _chunks("Author", "author_ID,Affiliation_affiliation_ID,f_name,l_name,email",
+    (
+      (i, rng.randint(1, sizes["Affiliation"]), *name(), f"author{i}@example.org")
+      for i in range(1, authors + 1)
+    ), batch_size)
+
+  statuses = list(STATUS_WEIGHTS)
+  weights = list(STATUS_WEIGHTS.values())
+  next_page = [1] * (issues + 1)
+
+  for first in range(1, sizes["Manuscript"] + 1, batch_size):
+    manuscripts, authorships, reviews = [], [], []
+    for number in range(first, min(first + batch_size, sizes["Manuscript"] + 1)):
+      status = rng.choices(statuses, weights)[0]
+      code = rng.randint(1, codes)
+      received = day()
+      changed = day()
+      page_count = rng.randint(4, 30)
+      issue = page_number = accepted = None
+      if status in IN_ISSUE:
+        issue = (rng.randint(1, published_issues) if status == "published"
+          else rng.randint(min(published_issues + 1, issues), issues))
+        page_number = next_page[issue]
+        next_page[issue] += page_count
+      if status in REVIEWED and status != "rejected":
+        accepted = changed
+      manuscripts.append((
+        number, words(4, 10), received, status, page_number, page_count,
+        accepted, changed, code, rng.randint(1, editors), issue,
+      ))
+
+      for ordinal, author in enumerate(rng.sample(range(1, authors + 1), min(authors, rng.randint(1, 4))), start=1):
+        authorships.append((number, author, ordinal))
+
+      if status != "submitted":
+        candidates = reviewers_by_code[code]
+        for reviewer in rng.sample(candidates, min(len(candidates), rng.randint(1, 3))):
+          scores = ((rng.randint(1, 10) for _ in range(5)) if status in REVIEWED
+            else (None,) * 5)
+          reviews.append((reviewer, number, received, *scores,
+            changed if status in REVIEWED else None))
+
+    yield _insert("Manuscript",
+      "manuscript_number,title,date_received,status,page_number,page_count,"
+      "date_accepted,status_change_date,RICodes_code,Editor_editor_ID,Issue_issue_ID",
+      manuscripts)
+    yield _insert("Manuscript_Author",
+      "Manuscript_manuscript_number,Author_author_ID,author_ordinal", authorships)
+    if reviews:
+      yield _insert("Reviewer_has_Manuscript",
+        "Reviewer_reviewer_ID,Manuscript_manuscript_number,date_sent,appropriateness,"
+        "clarity,methodology,experimental,recommendation,feedback_date", reviews)
+
+
+def write_dataset(path: str, scale=1.0, seed=0) -> int:
+  """
+    Write a dataset as a .sql script. Returns the number of statements.
+  """
+  count = 0
+  with open(path, "w") as f:
+    for command in generate(scale, seed):
+      f.write(command)
+      f.write(";\n")
+      count += 1
+  return count
+
+
+def load_dataset(conn, scale=1.0, seed=0, batch_size=1000, relax_checks=False):
+  """
+    Generate a dataset straight into the database with `bulk_load`.
+  """
+  return bulk_load(conn, generate(scale, seed, batch_size), batch_size, relax_checks)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Generate a synthetic journal dataset.")
+  parser.add_argument("--scale", type=float, default=1.0,
+    help=f"dataset size; 1 is {MANUSCRIPTS_PER_SCALE} manuscripts (default: 1)")
+  parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+  parser.add_argument("-o", "--output", metavar="FILE", help="write a .sql script to FILE")
+  parser.add_argument("--load", action="store_true",
+    help="load into the database in dbconfig.ini (should be empty)")
+  parser.add_argument("--relax-checks", action="store_true",
+    help="turn off unique and foreign-key checks while loading")
+  parser.add_argument("--config", default="dbconfig.ini", help="database configuration file")
+  args = parser.parse_args()
+
+  if not args.output and not args.load:
+    parser.error("nothing to do: give --output and/or --load")
+
+  for table, rows in dataset_sizes(args.scale).items():
+    print(f"  {table:<12} {rows:>10,}")
+  if args.output:
+    write_dataset(args.output, args.scale, args.seed)
+  if args.load:
+    with connect(filename=args.config) as conn:
+      load_dataset(conn, args.scale, args.seed, relax_checks=args.relax_checks)
+
+
+if __name__ == "__main__":
+  main()
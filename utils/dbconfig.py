@@ -1,6 +1,12 @@
+from collections import deque
 from configparser import ConfigParser
+from threading import Condition
+from time import monotonic
+
 from mysql.connector import MySQLConnection, Error
 
+from .metrics import InstrumentedCursor, METRICS
+
 class DBParseError(Exception):
   """
     Exception raised for errors in reading Database Config.
@@ -15,17 +21,231 @@ class DBConnectError(Exception):
 
 class ConnectionHandler(MySQLConnection):
   """
-    A context manager for MySQLConnection
+    A context manager for MySQLConnection.
+
+    Connections handed out by a `ConnectionPool` remember their pool,
+    so leaving the context (or calling `release`) returns them to it
+    instead of closing the socket.
   """
+
+  backend = "mysql"
+
   def __init__(self, *args, **kwargs):
+    self.pool = None
+    # prepared-statement cursors, keyed by statement name (see `statements`).
+    self.statements = {}
     super().__init__(*args, **kwargs)
 
   def __enter__(self):
     return self
 
+  def cursor(self, *args, **kwargs):
+    """
+      A cursor whose statements are recorded in `metrics.METRICS`.
+    """
+    return InstrumentedCursor(super().cursor(*args, **kwargs))
+
+  def close(self):
+    """
+      Close the connection, forgetting statements prepared on it.
+    """
+    self.statements.clear()
+    super().close()
+
   def __exit__(self, exc_type, exc_val, exc_tb):
-    self.close()
-  
+    self.release()
+
+  def release(self):
+    """
+      Return the connection to its pool, or close it if it is not pooled.
+    """
+    if self.pool is not None:
+      self.pool.checkin(self)
+    else:
+      self.close()
+
+
+class ConnectionPool:
+  """
+    A bounded pool of `ConnectionHandler` instances.
+
+    Parameters
+    ----------
+    `filename`: str
+      database configuration file.
+    `section`: str
+      section of the configuration file holding connection parameters.
+    `size`: int
+      maximum number of connections open at any time (idle + checked out).
+    `idle_timeout`: float
+      seconds an idle connection may sit in the pool before it is evicted.
+    `health_check_interval`: float
+      idle connections older than this are pinged before being handed out.
+    `checkout_timeout`: float
+      seconds to wait for a free connection before giving up.
+  """
+
+  def __init__(self, filename='dbconfig.ini', section='mysql', size=4,
+    idle_timeout=300.0, health_check_interval=30.0, checkout_timeout=10.0):
+    self.filename = filename
+    self.section = section
+    self.size = max(1, int(size))
+    self.idle_timeout = float(idle_timeout)
+    self.health_check_interval = float(health_check_interval)
+    self.checkout_timeout = float(checkout_timeout)
+
+    # idle connections as (connection, time returned); newest on the right.
+    self._idle = deque()
+    self._checked_out = 0
+    self._closed = False
+    self._cond = Condition()
+
+  @property
+  def open_connections(self) -> int:
+    """
+      Number of connections currently owned by the pool.
+    """
+    with self._cond:
+      return self._checked_out + len(self._idle)
+
+  def checkout(self, timeout=None) -> ConnectionHandler:
+    """
+      Borrow a connection from the pool.
+
+      Reuses the most recently returned idle connection when one is healthy,
+      opens a new one while under `size`, and otherwise waits for a checkin.
+
+      Raises
+      ------
+      DBConnectError
+        if the pool is closed, exhausted past `timeout`, or the server
+        refuses a new connection.
+    """
+    timeout = self.checkout_timeout if timeout is None else timeout
+    deadline = monotonic() + timeout
+
+    with self._cond:
+      while True:
+        if self._closed:
+          raise DBConnectError('connection pool is closed.')
+
+        self._evict_idle()
+
+        if self._idle:
+          conn, returned_at = self._idle.pop()
+          self._checked_out += 1
+          break
+
+        if self._checked_out < self.size:
+          conn, returned_at = None, None
+          self._checked_out += 1
+          break
+
+        remaining = deadline - monotonic()
+        if remaining <= 0 or not self._cond.wait(remaining):
+          raise DBConnectError(
+            f'connection pool exhausted ({self.size} connections in use).')
+
+    # health checks and new connections happen outside the lock
+    # so slow network calls do not serialize other borrowers.
+    try:
+      if conn is not None and not self._is_healthy(conn, returned_at):
+        self._discard(conn)
+        conn = None
+      if conn is None:
+        conn = self._open()
+    except Exception:
+      with self._cond:
+        self._checked_out -= 1
+        self._cond.notify()
+      raise
+
+    return conn
+
+  def checkin(self, conn: ConnectionHandler):
+    """
+      Return a borrowed connection to the pool.
+
+      Any transaction left open by the borrower is rolled back, so the next
+      borrower always starts from a clean session.
+    """
+    reusable = not self._closed
+    try:
+      if reusable and conn.is_connected():
+        if conn.in_transaction:
+          conn.rollback()
+      else:
+        reusable = False
+    except Error:
+      reusable = False
+
+    if not reusable:
+      self._discard(conn)
+
+    with self._cond:
+      self._checked_out -= 1
+      if reusable:
+        self._idle.append((conn, monotonic()))
+      self._cond.notify()
+
+  def close(self):
+    """
+      Close every idle connection and refuse further checkouts.
+
+      Connections still checked out are closed when they are returned.
+    """
+    with self._cond:
+      self._closed = True
+      idle = [conn for conn, _ in self._idle]
+      self._idle.clear()
+      self._cond.notify_all()
+    for conn in idle:
+      self._discard(conn)
+
+  def _open(self) -> ConnectionHandler:
+    """
+      Open a new connection owned by this pool.
+    """
+    conn = connect(self.filename, self.section)
+    conn.pool = self
+    return conn
+
+  def _is_healthy(self, conn: ConnectionHandler, returned_at: float) -> bool:
+    """
+      Check an idle connection before handing it out.
+
+      Recently used connections are trusted; older ones are pinged.
+    """
+    if monotonic() - returned_at < self.health_check_interval:
+      return True
+    try:
+      conn.ping(reconnect=False)
+      return True
+    except Error:
+      return False
+
+  def _evict_idle(self):
+    """
+      Drop idle connections that have exceeded `idle_timeout`.
+
+      Must be called with the pool lock held.
+    """
+    now = monotonic()
+    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+      conn, _ = self._idle.popleft()
+      self._discard(conn)
+
+  @staticmethod
+  def _discard(conn: ConnectionHandler):
+    """
+      Close a connection for good, ignoring errors from a dead socket.
+    """
+    conn.pool = None
+    try:
+      conn.close()
+    except Error:
+      pass
+
 def read_db_config(filename='dbconfig.ini', section='mysql'):
   """
     Read database configuration file and return a dictionary object.
@@ -60,13 +280,85 @@ def read_db_config(filename='dbconfig.ini', section='mysql'):
  
   return dbconfig
 
-def connect(filename='dbconfig.ini', section='mysql'):
+# connection classes by the `backend` setting of a database section.
+BACKENDS = {'mysql': ConnectionHandler}
+
+def register_backend(name, connection_class):
   """
-    Connect to MySQL database.
+    Open connections of sections with `backend = <name>` with `connection_class`.
+
+    It is called with the section's other settings as keyword arguments,
+    and must offer the `ConnectionHandler` interface the role modules use:
+    `cursor`, `commit`, `rollback`, `close`, `release`, `is_connected`,
+    `ping`, `in_transaction` and the `pool` and `statements` attributes.
+  """
+  BACKENDS[name] = connection_class
+
+def connect(filename='dbconfig.ini', section='mysql', **options):
+  """
+    Connect to the database.
+
+    The section's `backend` setting picks the connection class (see
+    `register_backend`); MySQL by default, or `sqlite` (see `sqlitedb`).
+    `options` are extra connection arguments, overriding the file's,
+    e.g. `allow_local_infile=True`.
   """
-  db_config = read_db_config(filename)
-  conn = ConnectionHandler(**db_config)
+  db_config = read_db_config(filename, section)
+  db_config.update(options)
+  backend = db_config.pop('backend', 'mysql')
+  if backend not in BACKENDS:
+    raise DBParseError(f'unknown backend {backend} in the {filename} file')
+  try:
+    conn = BACKENDS[backend](**db_config)
+  except Error as err:
+    raise DBConnectError(f'connection failed: {err}')
   if conn.is_connected():
     return conn
   else:
     raise DBConnectError('connection failed.')
+
+# one pool per (config file, section), created on first use.
+_pools = {}
+
+def get_pool(filename='dbconfig.ini', section='mysql') -> ConnectionPool:
+  """
+    Get the shared connection pool for a database configuration.
+
+    Pool settings are read from the optional `[pool]` section
+    of the configuration file:
+
+      size                  = 4
+      idle_timeout          = 300
+      health_check_interval = 30
+      checkout_timeout      = 10
+
+    Query metrics are configured from its `[metrics]` section
+    (see `metrics`) when the first pool is created.
+  """
+  key = (filename, section)
+  if key not in _pools:
+    if not _pools:
+      try:
+        METRICS.configure(read_db_config(filename, 'metrics'))
+      except DBParseError:
+        pass
+    try:
+      pool_config = read_db_config(filename, 'pool')
+    except DBParseError:
+      pool_config = {}
+    _pools[key] = ConnectionPool(
+      filename, section,
+      size=int(pool_config.get('size', 4)),
+      idle_timeout=float(pool_config.get('idle_timeout', 300)),
+      health_check_interval=float(pool_config.get('health_check_interval', 30)),
+      checkout_timeout=float(pool_config.get('checkout_timeout', 10)),
+    )
+  return _pools[key]
+
+def close_pools():
+  """
+    Close every connection pool opened by this process.
+  """
+  for pool in _pools.values():
+    pool.close()
+  _pools.clear()
@@ -5,95 +5,720 @@
   Utilities for the database
 """
 
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Tuple
+from time import perf_counter
 from mysql.connector import DatabaseError
 
 from .dbconfig import connect, DBParseError, DBConnectError, ConnectionHandler
 from .logging import warn, info
 
+import csv
+import hashlib
 import os
+import re
 
-def read_sql_file(path: str) -> List[str]:
+# `DELIMITER <token>` client command at the start of a line.
+DELIMITER_PATTERN = re.compile(r"^\s*DELIMITER\s+(\S+)", re.IGNORECASE)
+
+# end of a quoted string: an escape sequence, a doubled quote, or the quote itself.
+QUOTE_END_PATTERNS = {
+  "'": re.compile(r"\\.|''|'", re.DOTALL),
+  '"': re.compile(r'\\.|""|"', re.DOTALL),
+  "`": re.compile(r"``|`"),
+}
+
+def _special_pattern(delim: str):
   """
-    Read a SQL file and return its contents.
+    Pattern for the next token that changes tokenizer state
+    outside of strings and comments.
   """
-  commands = []
-  delim = ';'
-  block_comment = False
-  with open(path, 'r') as f:
+  return re.compile(f"{re.escape(delim)}|['\"`#]|--|/\\*")
 
-    command = ""
-    for line in f:
-      line = line.strip()
+def iter_sql_statements(lines: Iterable[str]) -> Iterator[str]:
+  """
+    Split SQL script lines into statements, one at a time.
 
-      # ignore empty lines
-      if line == '':
-        continue
+    Tracks quoted strings, `--`, `#` and `/* */` comments and `DELIMITER`
+    changes in a single pass, so delimiters or comment markers inside string
+    literals are left alone. Comments are dropped, except `/*! */` and
+    `/*+ */` which MySQL executes. Only the statement being built is held
+    in memory.
 
-      # ignore block comments
-      elif block_comment and line.endswith("*/"):
-        block_comment = False
-        continue
-      elif line.startswith('/*'):
-        block_comment = True
-        continue
-      elif block_comment:
-        continue
+    Parameters
+    ----------
+    `lines`: iterable of str
+      script lines, including their line endings (e.g. an open file).
 
-      # ignore single line comments
-      elif line.startswith('--'):
+    Yields
+    ------
+    str: each statement, stripped and without its delimiter.
+  """
+  delim = ";"
+  special = _special_pattern(delim)
+
+  pieces = []             # chunks of the statement being built
+  quote = None            # quote character of the open string, if any
+  block_comment = False   # inside /* ... */
+  keep_comment = False    # the open block comment is part of the statement
+
+  for line in lines:
+    if quote is None and not block_comment:
+      match = DELIMITER_PATTERN.match(line)
+      if match:
+        statement = "".join(pieces).strip()
+        if statement:
+          yield statement
+        pieces = []
+        delim = match.group(1)
+        special = _special_pattern(delim)
         continue
 
-      # handle delimiters
-      elif line.startswith("DELIMITER"):
-        delim = line.split(" ")[1]
-        if len(command) > 0:
-          commands.append(command)
-          command = ""
+    pos, end = 0, len(line)
+    while pos < end:
+      if block_comment:
+        close = line.find("*/", pos)
+        stop = end if close == -1 else close + 2
+        if keep_comment:
+          pieces.append(line[pos:stop])
+        if close != -1:
+          block_comment = False
+        pos = stop
+
+      elif quote is not None:
+        pattern = QUOTE_END_PATTERNS[quote]
+        match = pattern.search(line, pos)
+        while match and match.group() != quote:
+          match = pattern.search(line, match.end())
+        stop = end if match is None else match.end()
+        pieces.append(line[pos:stop])
+        if match is not None:
+          quote = None
+        pos = stop
 
-      # handle normal commands
       else:
-        command += f"\n{line}"
-        if command.endswith(delim):
-          commands.append(command.replace(delim, ""))
-          command = ""
-  return commands
+        match = special.search(line, pos)
+        if match is None:
+          pieces.append(line[pos:])
+          break
+
+        pieces.append(line[pos:match.start()])
+        token = match.group()
+        pos = match.end()
+
+        if token == delim:
+          statement = "".join(pieces).strip()
+          if statement:
+            yield statement
+          pieces = []
+        elif token in ("'", '"', "`"):
+          pieces.append(token)
+          quote = token
+        elif token == "#" or (token == "--" and line[pos:pos + 1] in ("", " ", "\t", "\r", "\n")):
+          # comment runs to the end of the line.
+          pieces.append("\n")
+          break
+        elif token == "/*":
+          block_comment = True
+          keep_comment = line[pos:pos + 1] in ("!", "+")
+          if keep_comment:
+            pieces.append(token)
+        else:
+          pieces.append(token)
+
+  statement = "".join(pieces).strip()
+  if statement:
+    yield statement
+
+def iter_sql_file(path: str) -> Iterator[str]:
+  """
+    Stream the statements of a SQL file; see `iter_sql_statements`.
+  """
+  with open(path, 'r') as f:
+    yield from iter_sql_statements(f)
+
+def read_sql_file(path: str) -> List[str]:
+  """
+    Read a SQL file and return its statements.
+  """
+  return list(iter_sql_file(path))
+
+# INSERT INTO <table> (<columns>) VALUES ...
+INSERT_PATTERN = re.compile(
+  r"^\s*INSERT\s+INTO\s+`?(\w+)`?\s*(\([^)]*\))\s*VALUES\s*",
+  re.IGNORECASE
+)
+
+def split_insert_rows(values: str) -> List[str]:
+  """
+    Split the VALUES list of an INSERT statement into its row tuples.
+
+    Parentheses and commas inside quoted strings are left alone,
+    so `("a, (b)", 1), ("c", 2)` yields two rows.
+  """
+  rows = []
+  depth = 0
+  start = 0
+  quote = None
+  escaped = False
+  for i, char in enumerate(values):
+    if quote:
+      if escaped:
+        escaped = False
+      elif char == "\\":
+        escaped = True
+      elif char == quote:
+        quote = None
+    elif char in "'\"`":
+      quote = char
+    elif char == "(":
+      if depth == 0:
+        start = i
+      depth += 1
+    elif char == ")":
+      depth -= 1
+      if depth == 0:
+        rows.append(values[start:i + 1])
+  return rows
+
+class BulkLoader:
+  """
+    Load a stream of SQL statements, coalescing consecutive INSERTs
+    into the same table and columns into multi-row batches.
+
+    A batch that fails with a `DatabaseError` is retried row by row,
+    so only the inconsistent rows are skipped.
+
+    Parameters
+    ----------
+    `cursor`:
+      cursor to execute on; the caller owns the transaction.
+    `batch_size`: int
+      maximum number of rows per INSERT statement.
+  """
+
+  def __init__(self, cursor, batch_size=500):
+    self.cursor = cursor
+    self.batch_size = batch_size
+
+    # (table, columns) of the pending batch and its row tuples.
+    self._target = None
+    self._rows = []
+
+    # per-table counters: rows inserted, rows skipped, seconds spent.
+    self.inserted: Dict[str, int] = {}
+    self.skipped: Dict[str, int] = {}
+    self.elapsed: Dict[str, float] = {}
 
-def build_database(config_file="dbconfig.ini", load_data=True):
+  def add(self, command: str):
+    """
+      Queue an INSERT for batching, or run any other statement directly.
+    """
+    match = INSERT_PATTERN.match(command)
+    if match is None:
+      self.flush()
+      try:
+        self.cursor.execute(command)
+      except DatabaseError:
+        warn("Some data was skipped due to inconsistency.")
+      return
+
+    table, columns = match.group(1), re.sub(r"\s+", "", match.group(2))
+    if self._target != (table, columns):
+      self.flush()
+      self._target = (table, columns)
+
+    for row in split_insert_rows(command[match.end():]):
+      self._rows.append(row)
+      if len(self._rows) >= self.batch_size:
+        self.flush()
+
+  def flush(self):
+    """
+      Send the pending batch, if any.
+    """
+    if not self._rows:
+      return
+    table, columns = self._target
+    rows, self._rows = self._rows, []
+
+    start = perf_counter()
+    inserted = self._insert(table, columns, rows)
+    self.elapsed[table] = self.elapsed.get(table, 0.0) + perf_counter() - start
+
+    self.inserted[table] = self.inserted.get(table, 0) + inserted
+    if inserted < len(rows):
+      self.skipped[table] = self.skipped.get(table, 0) + len(rows) - inserted
+      warn(f"Some data was skipped due to inconsistency: "
+        f"{len(rows) - inserted} row(s) in {table}.")
+
+  def _insert(self, table: str, columns: str, rows: List[str]) -> int:
+    """
+      Insert `rows` in one statement, falling back to one row at a time
+      when the batch is rejected. Returns the number of rows inserted.
+    """
+    try:
+      self.cursor.execute(f"INSERT INTO {table} {columns} VALUES {', '.join(rows)}")
+      return len(rows)
+    except DatabaseError:
+      if len(rows) == 1:
+        return 0
+    return sum(self._insert(table, columns, [row]) for row in rows)
+
+  def report(self):
+    """
+      Print rows per second for every table loaded.
+    """
+    for table, inserted in self.inserted.items():
+      elapsed = self.elapsed.get(table, 0.0)
+      rate = inserted / elapsed if elapsed > 0 else float("inf")
+      skipped = self.skipped.get(table, 0)
+      info(f"  {table:<25} {inserted:>8} rows  {elapsed:8.3f}s  "
+        f"{rate:>12,.0f} rows/s" + (f"  ({skipped} skipped)" if skipped else ""))
+
+def bulk_load(conn: ConnectionHandler, commands: Iterable[str],
+  batch_size=500, relax_checks=False):
+  """
+    Load data statements in a single transaction.
+
+    Parameters
+    ----------
+    `conn`: ConnectionHandler
+      open connection; committed on success, rolled back on failure.
+    `commands`: iterable of str
+      statements to run, typically streamed from data.sql.
+    `batch_size`: int
+      maximum number of rows coalesced into one INSERT.
+    `relax_checks`: bool
+      turn off unique and foreign-key checks for the duration of the load.
+      Only use this for data known to be consistent: with the checks off,
+      rows with dangling references are loaded instead of skipped.
+  """
+  cursor = conn.cursor(buffered=True)
+  loader = BulkLoader(cursor, batch_size)
+
+  if relax_checks:
+    cursor.execute("SET unique_checks = 0, foreign_key_checks = 0")
+  try:
+    for command in commands:
+      loader.add(command)
+    loader.flush()
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    if relax_checks:
+      cursor.execute("SET unique_checks = 1, foreign_key_checks = 1")
+    cursor.close()
+
+  loader.report()
+  return loader
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(__file__), "sql", "migrations")
+
+# migration files are named <version>_<description>.sql, e.g. 0001_add_indexes.sql
+MIGRATION_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+SCHEMA_VERSION_TABLE = """
+  CREATE TABLE IF NOT EXISTS schema_version
+    (
+      version     INT           NOT NULL  PRIMARY KEY,
+      name        VARCHAR(255)  NOT NULL,
+      checksum    CHAR(32)      NOT NULL,
+      applied_at  DATETIME      NOT NULL  DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# MySQL error raised when schema_version does not exist yet.
+ER_NO_SUCH_TABLE = 1146
+
+def list_migrations(path=MIGRATIONS_PATH) -> List[Tuple[int, str, str]]:
+  """
+    List migration files in version order.
+
+    Returns
+    -------
+    list of (version, name, file path)
+  """
+  migrations = []
+  if os.path.isdir(path):
+    for filename in os.listdir(path):
+      match = MIGRATION_PATTERN.match(filename)
+      if match:
+        migrations.append(
+          (int(match.group(1)), match.group(2), os.path.join(path, filename)))
+  migrations.sort()
+
+  versions = [version for version, _, _ in migrations]
+  if len(versions) != len(set(versions)):
+    raise ValueError(f"duplicate migration versions in {path}")
+  return migrations
+
+def _checksum(path: str) -> str:
+  """
+    MD5 of a migration file, to notice edits after it was applied.
+  """
+  with open(path, 'rb') as f:
+    return hashlib.md5(f.read()).hexdigest()
+
+def schema_version(conn: ConnectionHandler) -> int:
+  """
+    Highest migration version applied to the database (0 if none).
+  """
+  cursor = conn.cursor()
+  try:
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    version = cursor.fetchone()[0]
+  except DatabaseError as err:
+    if err.errno != ER_NO_SUCH_TABLE:
+      raise
+    version = None
+  finally:
+    cursor.close()
+  return version or 0
+
+def schema_is_current(conn: ConnectionHandler, path=MIGRATIONS_PATH) -> bool:
+  """
+    Check whether every migration on disk has been applied.
+
+    Costs one indexed query, so it is cheap enough to run at startup.
+  """
+  migrations = list_migrations(path)
+  latest = migrations[-1][0] if migrations else 0
+  return schema_version(conn) >= latest
+
+def pending_migrations(conn: ConnectionHandler, path=MIGRATIONS_PATH) -> List[Tuple[int, str, str]]:
+  """
+    Migrations on disk that have not been applied, in version order.
+
+    Warns about applied migrations whose file has changed since.
+  """
+  cursor = conn.cursor()
+  cursor.execute(SCHEMA_VERSION_TABLE)
+  cursor.execute("SELECT version, checksum FROM schema_version")
+  applied = dict(cursor.fetchall())
+  cursor.close()
+
+  pending = []
+  for version, name, file_path in list_migrations(path):
+    if version not in applied:
+      pending.append((version, name, file_path))
+    elif applied[version] != _checksum(file_path):
+      warn(f"Migration {version:04d}_{name} changed after it was applied.")
+  return pending
+
+def apply_migrations(conn: ConnectionHandler = None, config_file="dbconfig.ini",
+  path=MIGRATIONS_PATH) -> int:
+  """
+    Apply pending migrations in version order.
+
+    Idempotent: applied versions are recorded in `schema_version` and skipped
+    on later runs. A named lock keeps concurrent runs from racing. Each
+    migration is recorded only after all of its statements succeed; since
+    DDL commits implicitly in MySQL, a migration that fails halfway must
+    be fixed (or cleaned up) by hand before re-running.
+
+    Parameters
+    ----------
+    `conn`: ConnectionHandler
+      connection to use; opened from `config_file` when omitted.
+
+    Returns
+    -------
+    int: number of migrations applied.
+  """
+  if conn is None:
+    with connect(filename=config_file) as conn:
+      return apply_migrations(conn, path=path)
+
+  if conn.backend != "mysql":
+    if pending_migrations(conn, path):
+      warn("Migrations only run on MySQL; rebuild the database with `./main.py /rebuild` instead.")
+    return 0
+
+  cursor = conn.cursor(buffered=True)
+  cursor.execute("SELECT GET_LOCK('schema_migrations', 30)")
+  if cursor.fetchone()[0] != 1:
+    cursor.close()
+    raise DBConnectError("another process is applying migrations.")
+
+  applied = 0
+  try:
+    for version, name, file_path in pending_migrations(conn, path):
+      info(f"Applying migration {version:04d}_{name}...")
+      for command in iter_sql_file(file_path):
+        cursor.execute(command)
+      cursor.execute(
+        "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+        (version, name, _checksum(file_path))
+      )
+      conn.commit()
+      applied += 1
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+    cursor.close()
+
+  if applied:
+    info(f"Applied {applied} migration(s); schema is at version {schema_version(conn)}.")
+  return applied
+
+TABLES_PATH = os.path.join(os.path.dirname(__file__), "sql", "tables.sql")
+
+CREATE_TABLE_PATTERN = re.compile(r"^\s*CREATE\s+TABLE\s+`?(\w+)`?", re.IGNORECASE)
+
+# MySQL's marker for NULL in CSV files (FIELDS ESCAPED BY '\\').
+CSV_NULL = "\\N"
+
+# server refused LOAD DATA LOCAL INFILE (local_infile is off).
+ER_LOCAL_INFILE_DISABLED = {1148, 3948}
+
+# derived data rebuilt after importing with triggers suspended.
+REBUILD_PROCEDURES = ("RebuildCredentials", "RebuildIssueCapacity", "RebuildSummaryCounts")
+
+def table_order(path=TABLES_PATH) -> List[str]:
+  """
+    Base tables in the order tables.sql creates them, which lists every
+    table after the tables it references.
+  """
+  tables = []
+  for command in iter_sql_file(path):
+    match = CREATE_TABLE_PATTERN.match(command)
+    if match:
+      tables.append(match.group(1))
+  return tables
+
+def _csv_field(value) -> str:
+  """
+    Format a value for `LOAD DATA ... ESCAPED BY '\\'`.
+  """
+  if value is None:
+    return CSV_NULL
+  if isinstance(value, (bytes, bytearray)):
+    value = value.decode()
+  return str(value).replace("\\", "\\\\")
+
+def _csv_value(field: str):
+  """
+    Inverse of `_csv_field`, for loading without LOAD DATA.
+  """
+  if field == CSV_NULL:
+    return None
+  return field.replace("\\\\", "\\")
+
+def export_tables(directory: str, conn: ConnectionHandler = None, config_file="dbconfig.ini",
+  tables: List[str] = None, fetch_size=10000) -> Dict[str, int]:
+  """
+    Write every base table to `<directory>/<table>.csv`.
+
+    Rows are streamed from the server and written as they arrive, so
+    memory use does not grow with the table. All tables are read from one
+    consistent snapshot. Files have a header row naming the columns and
+    use MySQL's CSV conventions (`\\N` for NULL, backslash escapes), so
+    they can be loaded with `LOAD DATA` as well as with `import_tables`.
+
+    The export runs client-side: `SELECT ... INTO OUTFILE` would write the
+    files on the database host, which is rarely the machine running this.
+
+    Parameters
+    ----------
+    `conn`: ConnectionHandler
+      connection to use; opened from `config_file` when omitted.
+    `tables`: list of str
+      tables to export; all of tables.sql by default.
+    `fetch_size`: int
+      rows fetched from the server at a time.
+
+    Returns
+    -------
+    dict: rows written per table.
+  """
+  if conn is None:
+    with connect(filename=config_file) as conn:
+      return export_tables(directory, conn, tables=tables, fetch_size=fetch_size)
+
+  os.makedirs(directory, exist_ok=True)
+  tables = tables or table_order()
+  written = {}
+
+  conn.start_transaction(consistent_snapshot=True, readonly=True)
+  cursor = conn.cursor()
+  try:
+    for table in tables:
+      start = perf_counter()
+      cursor.execute(f"SELECT * FROM {table}")
+      columns = [column[0] for column in cursor.description]
+      count = 0
+      with open(os.path.join(directory, f"{table}.csv"), "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(columns)
+        rows = cursor.fetchmany(fetch_size)
+        while rows:
+          writer.writerows([_csv_field(value) for value in row] for row in rows)
+          count += len(rows)
+          rows = cursor.fetchmany(fetch_size)
+      written[table] = count
+      info(f"  {table:<25} {count:>8} rows  {perf_counter() - start:8.3f}s")
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    cursor.close()
+  return written
+
+def _load_local_infile(cursor, table: str, columns: List[str], path: str) -> int:
+  """
+    Load a CSV file with `LOAD DATA LOCAL INFILE`. Returns rows loaded.
+  """
+  cursor.execute(
+    f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table} "
+    "CHARACTER SET utf8mb4 "
+    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+    "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+    f"({', '.join(columns)})",
+    (os.path.abspath(path),)
+  )
+  return cursor.rowcount
+
+def _load_client(cursor, table: str, columns: List[str], reader, batch_size: int) -> int:
+  """
+    Load CSV rows with multi-row INSERTs. Returns rows loaded.
+  """
+  row_marker = f"({', '.join(['%s'] * len(columns))})"
+  prefix = f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES "
+  loaded = 0
+  batch = []
+  for row in reader:
+    batch.append(row)
+    if len(batch) >= batch_size:
+      cursor.execute(prefix + ", ".join([row_marker] * len(batch)),
+        [_csv_value(field) for row in batch for field in row])
+      loaded += cursor.rowcount
+      batch = []
+  if batch:
+    cursor.execute(prefix + ", ".join([row_marker] * len(batch)),
+      [_csv_value(field) for row in batch for field in row])
+    loaded += cursor.rowcount
+  return loaded
+
+def import_tables(directory: str, conn: ConnectionHandler = None, config_file="dbconfig.ini",
+  tables: List[str] = None, local_infile=False, batch_size=1000) -> Dict[str, int]:
+  """
+    Load the CSV files written by `export_tables` into the database.
+
+    Tables are loaded in tables.sql order, in one transaction, with
+    unique and foreign-key checks off and insert triggers suspended
+    (see migration 0005): imported manuscripts keep their status, and
+    users keep the credentials exported with them. Credentials, issue
+    capacity and summary counters are then rebuilt in one pass each.
+
+    Rows whose key already exists are skipped, so loading into a freshly
+    rebuilt database keeps its admin users.
+
+    Parameters
+    ----------
+    `conn`: ConnectionHandler
+      connection to use; opened from `config_file` (with LOAD DATA LOCAL
+      INFILE allowed) when omitted.
+    `tables`: list of str
+      tables to import; every table with a file in `directory` by default.
+    `local_infile`: bool
+      send files with `LOAD DATA LOCAL INFILE`; `conn` must have been
+      opened with `allow_local_infile=True`. Falls back to batched INSERTs
+      if the server has local_infile turned off.
+    `batch_size`: int
+      rows per INSERT when not using LOAD DATA.
+
+    Returns
+    -------
+    dict: rows loaded per table.
+  """
+  if conn is None:
+    with connect(filename=config_file, allow_local_infile=True) as conn:
+      return import_tables(directory, conn, tables=tables,
+        local_infile=conn.backend == "mysql", batch_size=batch_size)
+
+  # the trigger guards and RebuildCredentials come from migration 0005.
+  if not schema_is_current(conn):
+    warn("Database schema is out of date; run `./main.py /migrate` before importing.")
+    return {}
+
+  tables = tables or [
+    table for table in table_order()
+    if os.path.exists(os.path.join(directory, f"{table}.csv"))
+  ]
+  loaded = {}
+
+  cursor = conn.cursor()
+  cursor.execute("SET unique_checks = 0, foreign_key_checks = 0, @suspend_triggers = 1")
+  try:
+    for table in tables:
+      path = os.path.join(directory, f"{table}.csv")
+      start = perf_counter()
+      with open(path, newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        count = None
+        if local_infile:
+          try:
+            count = _load_local_infile(cursor, table, columns, path)
+          except DatabaseError as err:
+            if err.errno not in ER_LOCAL_INFILE_DISABLED:
+              raise
+            warn("The server does not allow LOAD DATA LOCAL INFILE; loading with INSERTs instead.")
+            local_infile = False
+        if count is None:
+          count = _load_client(cursor, table, columns, reader, batch_size)
+      loaded[table] = count
+      info(f"  {table:<25} {count:>8} rows  {perf_counter() - start:8.3f}s")
+
+    cursor.execute("SET @suspend_triggers = NULL")
+    for procedure in REBUILD_PROCEDURES:
+      cursor.callproc(procedure)
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    cursor.execute("SET unique_checks = 1, foreign_key_checks = 1, @suspend_triggers = NULL")
+    cursor.close()
+  return loaded
+
+def build_database(config_file="dbconfig.ini", load_data=True, relax_checks=False):
   """
     Rebuild the database.
+
+    The base schema is rebuilt from scratch and brought up to date
+    with `apply_migrations`. With `load_data`, data.sql is then bulk-loaded
+    in one transaction (see `bulk_load`); `relax_checks` is passed through.
+    SQLite databases are rebuilt from utils/sql/sqlite instead.
   """
 
   path = os.path.join(os.path.dirname(__file__), "sql")
-  
-  commands = read_sql_file(f"{path}/clear.sql")
-  commands += read_sql_file(f"{path}/tables.sql")
-  commands += read_sql_file(f"{path}/views.sql")
-  commands += read_sql_file(f"{path}/triggers.sql")
-  commands += read_sql_file(f"{path}/procedures.sql")
+  scripts = ["clear.sql", "tables.sql", "views.sql", "triggers.sql", "procedures.sql"]
 
   with connect(filename=config_file) as conn:
-    cursor = conn.cursor(buffered=True)
-    for command in commands:
-      cursor.execute(command)
-    conn.commit()
+    if conn.backend == "sqlite":
+      # its scripts already include the migrations (see `sqlitedb`).
+      conn.build_schema()
+    else:
+      cursor = conn.cursor(buffered=True)
+      for script in scripts:
+        for command in iter_sql_file(f"{path}/{script}"):
+          cursor.execute(command)
+      conn.commit()
+      cursor.close()
+      apply_migrations(conn)
     info("Database built successfully")
-    
+
     # load data if necessary
     if load_data:
       info("Inserting data into database...")
-      insert_commands = read_sql_file(f"{path}/data.sql")
-      for command in insert_commands:
-        try:
-          cursor.execute(command)
-        except DatabaseError as err:
-          warn(f"Some data was skipped due to inconsistency.")
-        except Exception as e:
-          raise
-
+      bulk_load(conn, iter_sql_file(f"{path}/data.sql"), relax_checks=relax_checks)
       info("Data inserted successfully")
-      conn.commit()
-    cursor.close()
 
 if __name__ == '__main__':
 
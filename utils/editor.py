@@ -4,18 +4,29 @@
 from mysql.connector import MySQLConnection, Error
 from getpass import getpass
 from datetime import date
-import shlex
 
 from .dbconfig import read_db_config
+from . import statements
+from .pagination import StatusPager, DEFAULT_PAGE_SIZE
+from .commands import CommandRegistry, Arg
 from .user import User
+from .cache import STATUS_CACHE
+from .session import SESSIONS
+from .summary import summary
 from .logging import Logging
 
+# maximum number of pages scheduled into one issue.
+ISSUE_PAGE_LIMIT = 100
+
 
 class Editor(User):
-	def __init__(self, editor_id: int, conn: MySQLConnection):
+	commands = CommandRegistry("Editor")
+
+	def __init__(self, editor_id: int, conn: MySQLConnection, greeting: str = None):
 		self.editor_id = editor_id
 		self.conn = conn
-		self.is_valid = self.login()
+		self.pager = StatusPager()
+		self.is_valid = self.login(greeting)
 
 
 	def __bool__(self):
@@ -29,48 +40,60 @@ class Editor(User):
 		return f"Editor {self.editor_id}> "
 
 	# 2. editor status.
-	def status(self):
+	def status(self, mode="plain", out=None, page_size=DEFAULT_PAGE_SIZE, status=None):
 		"""
-			Return a status of the current editor's manuscripts.
+			Print the first page of manuscript statuses.
 
 			Parameters
 			----------
-			`editor_id`: int
-				Editor ID.
+			`mode`: str
+				Output format: "plain", "tsv" or "json".
+			`out`:
+				Text stream to write to (default: stdout).
+			`page_size`: int
+				Number of manuscripts per page.
+			`status`: str
+				Only list manuscripts in this status.
 
 			Returns
 			-------
-				String value representing the status of all manuscripts
-				assigned to the editor.
+				int: number of manuscripts listed.
 		"""
-		query = f"""
-			SELECT manuscript_number, status
-			FROM Manuscript
-			ORDER BY status, manuscript_number
+		return self.pager.first(
+			self.conn, page_size, status, mode, out, empty="Editor has no manuscripts.")
+
+	def next_page(self, mode="plain", out=None):
 		"""
+			Print the next page of the last status listing.
 
-		cursor = self.conn.cursor()
-		cursor.execute(query)
-		results = ""
-		title = "Status"
-		title = f"| Manuscript #### | {title:>30} |"
-		delim = "-" * len(title)
-		for row in cursor:
-			manuscript_number, status = row
-			results += f"| Manuscript {manuscript_number:4d} | {status:>30} |\n{delim}\n"
-		cursor.close()
-		if len(results) == 0:
-			results = "Editor has no manuscripts."
-		else:
-			results = f"{delim}\n{title}\n{delim}\n{results}"
+			Returns
+			-------
+				int: number of manuscripts listed.
+		"""
+		return self.pager.next(self.conn, mode, out)
 
-		return Logging.info(results)
+	def summary(self, mode="plain", out=None):
+		"""
+			Print the journal's manuscript counts by status,
+			read from the summary counters.
+
+			Returns
+			-------
+				int: number of manuscripts in the journal.
+		"""
+		return summary(self.conn, "journal", mode=mode, out=out)
 
 	# 3. editor login
-	def login(self):
+	def login(self, greeting: str = None):
 		"""
 			Editor login.
 
+			Parameters
+			----------
+			`greeting`: str
+				Greeting already fetched along with the credentials;
+				queried here if not given.
+
 			Returns
 			-------
 			bool: True if the editor was logged in successfully, False otherwise.
@@ -83,14 +106,18 @@ class Editor(User):
 		success = False
 
 		try:
-			cursor = self.conn.cursor()
-			cursor.execute(query)
-			result = cursor.fetchone()
-			cursor.close()
-			if result:
+			if greeting is None:
+				cursor = self.conn.cursor()
+				cursor.execute(query)
+				result = cursor.fetchone()
+				cursor.close()
+				greeting = result[0] if result else None
+			if greeting:
 				success = True
-				print(result[0], "\n")
-				print(f"Status:\n{self.status()}\n")
+				print(greeting, "\n")
+				print("Summary:")
+				self.summary()
+				print()
 		except Error as error:
 			print(error)
 
@@ -160,24 +187,17 @@ class Editor(User):
 			bool: True if the manuscript was assigned successfully, False otherwise.
 		"""
 
-		query = f"""
-			INSERT INTO Reviewer_has_Manuscript
-			(Manuscript_manuscript_number, Reviewer_reviewer_id)
-			VALUES ({manuscript_number}, {reviewer_id})
-		"""
-
 		success = False
 
 		try:
-			cursor = self.conn.cursor()
-			cursor.execute(query)
+			statements.execute(
+				self.conn, "editor.assign_reviewer", (manuscript_number, reviewer_id))
 			self.conn.commit()
+			STATUS_CACHE.invalidate([manuscript_number], [("Reviewer", reviewer_id)])
 			success = True
 		except Error as error:
 			print(error)
-		finally:
-			cursor.close()
-		
+
 		return success
 
 	# 5. editor reject manuscript
@@ -207,6 +227,7 @@ class Editor(User):
 			cursor = self.conn.cursor()
 			cursor.execute(query)
 			self.conn.commit()
+			STATUS_CACHE.invalidate([manuscript_number])
 			success = True
 		except Error as error:
 			print(error)
@@ -242,6 +263,7 @@ class Editor(User):
 			cursor = self.conn.cursor()
 			cursor.execute(query)
 			self.conn.commit()
+			STATUS_CACHE.invalidate([manuscript_number])
 			success = True
 		except Error as error:
 			print(error)
@@ -254,6 +276,10 @@ class Editor(User):
 		"""
 			Schedule a manuscript for publication.
 
+			The capacity check and the reservation happen together in the
+			`ScheduleManuscript` stored procedure, which locks the issue,
+			so concurrent editors cannot overfill it.
+
 			Parameters
 			----------
 			`manuscript_number`: int
@@ -268,128 +294,65 @@ class Editor(User):
 		input = issue.split("-")
 		year = input[0]
 		period = input[1]
-		query = f"""
-					SELECT issue_ID
-					FROM Issue
-					WHERE `year`={year} AND `period`={period};
-				"""
 		success = False
 
 		try:
 			cursor = self.conn.cursor()
-			cursor.execute(query)
-			row = cursor.fetchone()
-			if row:
-				issue_id = row[0]
-				query = f"""
-					SELECT Manuscript.`status` 
-					FROM Manuscript 
-					WHERE Manuscript.`manuscript_number` = {manuscript_number};
-				"""
-				cursor.execute(query)
-				res = cursor.fetchone()
-				manuscript_status = res[0] if res else ""
-
-				query = f"""
-					SELECT sum(Manuscript.`page_count`)
-					FROM Manuscript
-					GROUP BY Manuscript.`Issue_issue_ID`, Manuscript.`status`
-					HAVING Manuscript.`Issue_issue_ID` = {issue_id} AND Manuscript.`status`='schedule for publication';
-				"""
-				cursor.execute(query)
-				res = cursor.fetchone()
-				curr_page_total = res[0] if res else 0
-
-				query = f"""
-					SELECT page_count
-					FROM Manuscript
-					WHERE manuscript_number = {manuscript_number};
-				"""
-				cursor.execute(query)
-				res = cursor.fetchone()
-				manuscript_page = res[0] if res else 0
-				curr_page_total += manuscript_page
-
-				if manuscript_status == "ready" and curr_page_total <= 100:
-					query = f"""
-						UPDATE Manuscript
-						SET status = 'schedule for publication', Issue_issue_ID = {issue_id}
-						WHERE manuscript_number = {manuscript_number};
-					"""
-					cursor.execute(query)
-					self.conn.commit()
-					success = True
-				else:
-					print("Manuscript not ready or page count exceeds 100")
-					success = False
+			result = cursor.callproc(
+				"ScheduleManuscript", (manuscript_number, year, period, ISSUE_PAGE_LIMIT, ""))
+			self.conn.commit()
+			STATUS_CACHE.invalidate([manuscript_number])
+			outcome = result[4]
+			if outcome == "scheduled":
+				success = True
+			elif outcome == "no issue":
+				print(f"Issue {issue} does not exist.")
+			else:
+				print(f"Manuscript not ready or page count exceeds {ISSUE_PAGE_LIMIT}")
 		except Error as error:
 			print(error)
 		finally:
 			cursor.close()
-		
+
 		return success
 
 	def publish_issue(self, issue):
+		"""
+			Publish an issue.
+
+			Every manuscript in the issue and the issue itself are updated
+			by the `PublishIssue` stored procedure, so the number of round
+			trips does not grow with the size of the issue.
+
+			Parameters
+			----------
+			`issue`: str
+				Issue year and period: 2019-1
 
+			Returns
+			-------
+			int: number of manuscripts published, or None if publishing failed.
+		"""
 		input = issue.split("-")
 		year = input[0]
 		period = input[1]
-		query = f"""
-			SELECT COUNT(Manuscript.`manuscript_number`)
-			FROM Manuscript
-			LEFT JOIN Issue
-			ON Manuscript.`Issue_issue_ID` = Issue.`issue_ID`
-			WHERE `year`={year} AND `period`={period};
-		"""
-
-		query2 = f"""
-			SELECT Manuscript.`manuscript_number`
-			FROM Manuscript
-			LEFT JOIN Issue
-			ON Manuscript.`Issue_issue_ID` = Issue.`issue_ID`
-			WHERE `year`={year} AND `period`={period};
-		"""
-		success = False
+		published = None
 
 		try:
 			cursor = self.conn.cursor()
-			cursor.execute(query)
-			result = cursor.fetchall()
-			if result[0][0] >= 1:
-				cursor.execute(query2)
-				result = cursor.fetchall()
-				today = date.today()
-				for row in result:
-					query3 = f"""
-						UPDATE Manuscript
-						SET status = 'published', status_change_date='{today}'
-						WHERE manuscript_number = {row[0]};
-					"""
-					cursor.execute(query3)
-				
-				query4 = f"""
-					SELECT issue_ID
-					FROM Issue
-					WHERE `year`={year} AND `period`={period};
-				"""
-				cursor.execute(query4)
-				row = cursor.fetchone();
-				if row:
-					issue_id = row[0]
-					query5 = f"""
-						UPDATE Issue
-						SET `publication_date`= '{today}'
-						WHERE `issue_ID` = {issue_id};
-					"""
-					cursor.execute(query5)
+			result = cursor.callproc("PublishIssue", (year, period, date.today(), 0))
 			self.conn.commit()
-			success = True
+			# the procedure does not report which manuscripts it published.
+			STATUS_CACHE.clear()
+			published = result[3]
+			if published is None:
+				print(f"Issue {issue} does not exist.")
 		except Error as error:
 			print(error)
 		finally:
 			cursor.close()
-		
-		return success
+
+		return published
 
 	def reset_database(self):
 		"""
@@ -411,6 +374,10 @@ class Editor(User):
 			"TRUNCATE TABLE Manuscript;",
 			"TRUNCATE TABLE Reviewer_has_RICodes;",
 			"TRUNCATE TABLE credentials;",
+			# TRUNCATE skips triggers, so the summary counters are reset by hand.
+			"TRUNCATE TABLE manuscript_status_counts;",
+			"TRUNCATE TABLE author_status_counts;",
+			"TRUNCATE TABLE reviewer_status_counts;",
 			"SET FOREIGN_KEY_CHECKS = 1;"
 		]
 		success=False
@@ -420,6 +387,9 @@ class Editor(User):
 			for query in queries:
 				cursor.execute(query)
 			self.conn.commit()
+			STATUS_CACHE.clear()
+			# every account is gone; IDs will be reused by new users.
+			SESSIONS.clear()
 			success = True
 		except Error as error:
 			print(error)
@@ -428,130 +398,88 @@ class Editor(User):
 		return success
 
 
-	def handle_request(self, request: str):
-		"""
-			Handle a request from the user.
-
-			Parameters
-			----------
-			`request`: str
-				Request from the user.
-
-			Returns
-			-------
-			None
-		"""
-		request_tokens  = shlex.split(request)
-		request_type = request_tokens[0].lower() if len(request_tokens) > 0 else ""
-
-		if request_type == "status":
-			print(f"Editor ID: {self.editor_id}\n{self.status()}")
-
-		elif request_type == "register":
-			if len(request_tokens) != 4:
-				print("Invalid request: too few arguments.")
-				return
-			if request_tokens[1].lower() != "editor":
-				print("Invalid request.")
-				return
-
-			f_name = request_tokens[2]
-			l_name = request_tokens[3]
-
-			if self.register_editor(f_name, l_name):
-				print("Editor registered successfully.")
-			else:
-				print("Author registration failed.")
-
-		elif request_type == "login":
-			if len(request_tokens) != 2:
-				print("Invalid request: too few arguments.")
-				return
-			try:
-				editor_id = int(request_tokens[1])
-				self.__init__(editor_id)
-			except ValueError:
-				print("Invalid request: editor ID must be an integer.")
-				return
-		elif request_type == "status":
-			print(f"Editor ID: {self.editor_id}\n{self.status()}")
-
-		elif request_type == "assign":
-			if len(request_tokens) != 3:
-				print("Invalid request: too few arguments.")
-				return
-			try:
-				manuscript_number = int(request_tokens[1])
-				reviewer_id = int(request_tokens[2])
-			except ValueError:
-				print("Invalid request: manuscript number and reviewer ID must be integers.")
-				return
-			if self.assign_reviewer(manuscript_number, reviewer_id):
-				print("Reviewer assigned successfully.")
-			else:
-				print("Reviewer assignment failed.")
-
-		elif request_type == "reject":
-			if len(request_tokens) != 2:
-				print("Invalid request: too few arguments.")
-				return
-			try:
-				manuscript_number = int(request_tokens[1])
-			except ValueError:
-				print("Invalid request: manuscript number must be an integer.")
-				return
-			if self.reject_manuscript(manuscript_number):
-				print("Manuscript rejected successfully.")
-			else:
-				print("Manuscript rejection failed.")
-		
-		elif request_type == "accept":
-			if len(request_tokens) != 2:
-				print("Invalid request: too few arguments.")
-				return
-			try:
-				manuscript_number = int(request_tokens[1])
-			except ValueError:
-				print("Invalid request: manuscript number must be an integer.")
-				return
-			if self.accept_manuscript(manuscript_number):
-				print("Manuscript accepted successfully.")
-			else:
-				print("Manuscript acceptance failed.")
-		elif request_type == "schedule":
-			if len(request_tokens) != 3:
-				print("Invalid request: too few arguments.")
-				return
-			try:
-				manuscript_number = int(request_tokens[1])
-				issue = request_tokens[2]
-			except ValueError:
-				print("Invalid request: manuscript number must be an integer.")
-				return
-			if self.schedule_manuscript(manuscript_number, issue):
-				print("Manuscript scheduled successfully.")
-			else:
-				print("Manuscript scheduling failed.")
-
-		elif request_type == "publish":
-			if len(request_tokens) != 2:
-				print("Invalid request: too few arguments.")
-				return
-			issue = request_tokens[1]
-			if self.publish_issue(issue):
-				print("Issue published successfully.")
-			else:
-				print("Issue publishing failed.")
-
-		elif request_type == "reset":
-			self.reset_database()
-			print("Database reset successfully.")
-			return -1
-		elif request_type == "exit":
-			print("Exiting...")
-			exit(0)
-		else:
-			print("Invalid request.")
+	@commands.command("status", options=("format", "page"),
+		help="List manuscripts by status, a page at a time.")
+	def status_command(self, mode, page_size, status):
+		if mode == "plain":
+			print(f"Editor ID: {self.editor_id}")
+		return self.status(mode, page_size=page_size, status=status)
+
+	@commands.command("next", options=("format",),
+		help="Show the next page of the last status listing.")
+	def next_command(self, mode):
+		return self.next_page(mode)
+
+	@commands.command("summary", options=("format",),
+		help="Count the journal's manuscripts by status.")
+	def summary_command(self, mode):
+		return self.summary(mode)
+
+	@commands.command("register", Arg("role", choices=("editor",)), Arg("f_name"), Arg("l_name"),
+		help="Register a new editor.")
+	def register_command(self, role, f_name, l_name):
+		if self.register_editor(f_name, l_name):
+			print("Editor registered successfully.")
+			return True
+		print("Editor registration failed.")
+		return False
+
+	@commands.command("assign", Arg("manuscript_number", int), Arg("reviewer_id", int),
+		help="Assign a reviewer to a manuscript.")
+	def assign_command(self, manuscript_number, reviewer_id):
+		if self.assign_reviewer(manuscript_number, reviewer_id):
+			print("Reviewer assigned successfully.")
+			return True
+		print("Reviewer assignment failed.")
+		return False
+
+	@commands.command("reject", Arg("manuscript_number", int),
+		help="Reject a manuscript.")
+	def reject_command(self, manuscript_number):
+		if self.reject_manuscript(manuscript_number):
+			print("Manuscript rejected successfully.")
+			return True
+		print("Manuscript rejection failed.")
+		return False
+
+	@commands.command("accept", Arg("manuscript_number", int),
+		help="Accept a manuscript.")
+	def accept_command(self, manuscript_number):
+		if self.accept_manuscript(manuscript_number):
+			print("Manuscript accepted successfully.")
+			return True
+		print("Manuscript acceptance failed.")
+		return False
+
+	@commands.command("schedule", Arg("manuscript_number", int), Arg("issue"),
+		help="Schedule an accepted manuscript into an issue (e.g. 2022-1).")
+	def schedule_command(self, manuscript_number, issue):
+		if self.schedule_manuscript(manuscript_number, issue):
+			print("Manuscript scheduled successfully.")
+			return True
+		print("Manuscript scheduling failed.")
+		return False
+
+	@commands.command("publish", Arg("issue"),
+		help="Publish every manuscript scheduled into an issue.")
+	def publish_command(self, issue):
+		published = self.publish_issue(issue)
+		if published is not None:
+			print(f"Issue published successfully ({published} manuscripts).")
+			return True
+		print("Issue publishing failed.")
+		return False
+
+	@commands.command("reset", help="Reset the database.")
+	def reset_command(self):
+		self.reset_database()
+		print("Database reset successfully.")
+		return -1
+
+	@commands.command("exit", help="Exit the program.")
+	def exit_command(self):
+		print("Exiting...")
+		exit(0)
 		
 	  
 
@@ -694,7 +622,8 @@ def test_editor_handle_request():
 		if res and res == -1:
 			return
 		else:
-			print(f"Editor status: \n{editor.status()}")
+			print("Editor status:")
+			editor.status()
 	return
 
 
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Per-statement and per-command latency metrics.
+
+  Every cursor handed out by `ConnectionHandler.cursor` is wrapped in an
+  `InstrumentedCursor`, which times each statement (execution plus
+  fetching its rows) and counts the rows it returned or changed. The
+  statement is credited to the command running on the current thread,
+  e.g. `Editor.schedule`, set by `CommandRegistry.dispatch`.
+
+  Latencies go into HDR-style histograms kept in memory for the life of
+  the process; once a threshold is configured, statements slower than it
+  are also appended to a slow-query log. Settings come from the optional
+  `[metrics]` section of the configuration file:
+
+    slow_query_ms  = 200                # unset or 0: no log (default)
+    slow_query_log = slow_queries.log
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+# the slow-query log is off unless a threshold is configured.
+DEFAULT_SLOW_QUERY_MS = 0.0
+DEFAULT_SLOW_QUERY_LOG = "slow_queries.log"
+
+# statements run outside any command, e.g. while logging in.
+UNTAGGED = "(no command)"
+
+# string and number literals, replaced by `?` in statement fingerprints.
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|\b\d+(?:\.\d+)?\b")
+
+# statement text -> name, for the named statements in `statements`.
+_NAMED: Dict[str, str] = {}
+
+# statement text -> fingerprint, bounded so ad-hoc SQL cannot grow it forever.
+_fingerprints: Dict[str, str] = {}
+_MAX_FINGERPRINTS = 4096
+
+
+class Histogram:
+  """
+    A latency histogram with HdrHistogram-style log-linear buckets.
+
+    Values are recorded in whole microseconds. Below `2 ** (precision + 1)`
+    every value has its own bucket; above, each power of two is split into
+    `2 ** precision` buckets, so quantiles are within about 3% (precision 5)
+    of the true value at any magnitude, in a few hundred buckets at most.
+  """
+
+  def __init__(self, precision=5):
+    self.precision = precision
+    self.sub_buckets = 1 << precision
+    self.counts: Dict[int, int] = {}
+    self.count = 0
+    self.total = 0
+    self.max = 0
+
+  def _index(self, value: int) -> int:
+    shift = value.bit_length() - self.precision - 1
+    if shift <= 0:
+      return value
+    return shift * self.sub_buckets + (value >> shift)
+
+  def _highest(self, index: int) -> int:
+    """
+      Largest value that falls in bucket `index`.
+    """
+    if index < 2 * self.sub_buckets:
+      return index
+    shift = index // self.sub_buckets - 1
+    mantissa = index - shift * self.sub_buckets
+    return ((mantissa + 1) << shift) - 1
+
+  def record(self, seconds: float):
+    value = max(0, int(seconds * 1e6))
+    index = self._index(value)
+    self.counts[index] = self.counts.get(index, 0) + 1
+    self.count += 1
+    self.total += value
+    self.max = max(self.max, value)
+
+  def percentile(self, p: float) -> float:
+    """
+      Value (in seconds) at or below which `p` percent of records fall.
+    """
+    if not self.count:
+      return 0.0
+    rank = max(1, -(-self.count * p // 100))
+    seen = 0
+    for index in sorted(self.counts):
+      seen += self.counts[index]
+      if seen >= rank:
+        return min(self._highest(index), self.max) / 1e6
+    return self.max / 1e6
+
+  @property
+  def mean(self) -> float:
+    return self.total / self.count / 1e6 if self.count else 0.0
+
+
+class Timing:
+  """
+    Latency histogram and counters of one command or statement.
+  """
+
+  def __init__(self):
+    self.latency = Histogram()
+    self.rows = 0
+    self.statements = 0
+    self.errors = 0
+
+  def summary(self) -> dict:
+    """
+      Counters and latency quantiles, in milliseconds.
+    """
+    latency = self.latency
+    return {
+      "calls": latency.count,
+      "errors": self.errors,
+      "rows": self.rows,
+      "statements": self.statements,
+      "total_ms": latency.total / 1000,
+      "mean_ms": latency.mean * 1000,
+      "p50_ms": latency.percentile(50) * 1000,
+      "p95_ms": latency.percentile(95) * 1000,
+      "p99_ms": latency.percentile(99) * 1000,
+      "max_ms": latency.max / 1000,
+    }
+
+
+_context = threading.local()
+
+@contextmanager
+def tagged(tag: str):
+  """
+    Credit statements run on this thread to `tag` (e.g. "Editor.schedule").
+  """
+  previous = getattr(_context, "tag", None)
+  _context.tag = tag
+  try:
+    yield
+  finally:
+    _context.tag = previous
+
+def current_tag() -> str:
+  return getattr(_context, "tag", None) or UNTAGGED
+
+def name_statements(statements: Dict[str, str]):
+  """
+    Report these statements by name instead of by fingerprint.
+  """
+  _NAMED.update({text: name for name, text in statements.items()})
+
+def fingerprint(statement) -> str:
+  """
+    A statement's name, or its text with literals replaced by `?`
+    and whitespace collapsed, so calls differing only in values group.
+  """
+  if isinstance(statement, (bytes, bytearray)):
+    statement = statement.decode(errors="replace")
+  name = _NAMED.get(statement)
+  if name is not None:
+    return name
+  result = _fingerprints.get(statement)
+  if result is None:
+    result = " ".join(_LITERALS.sub("?", statement).split())
+    if len(_fingerprints) >= _MAX_FINGERPRINTS:
+      _fingerprints.clear()
+    _fingerprints[statement] = result
+  return result
+
+
+class QueryMetrics:
+  """
+    Thread-safe store of command and statement timings.
+
+    Parameters
+    ----------
+    `slow_query_ms`: float
+      statements at least this slow are written to `slow_query_log`;
+      0 or None turns the log off.
+    `slow_query_log`: str
+      path of the slow-query log, appended to.
+  """
+
+  def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, slow_query_log=DEFAULT_SLOW_QUERY_LOG):
+    self.slow_query_ms = slow_query_ms
+    self.slow_query_log = slow_query_log
+    self.commands: Dict[str, Timing] = {}
+    # (command tag, statement fingerprint) -> timing.
+    self.statements: Dict[Tuple[str, str], Timing] = {}
+    self._lock = threading.Lock()
+    self._log_lock = threading.Lock()
+
+  def configure(self, settings: dict):
+    """
+      Apply the settings of a `[metrics]` configuration section.
+    """
+    self.slow_query_ms = float(settings.get("slow_query_ms", self.slow_query_ms or 0))
+    self.slow_query_log = settings.get("slow_query_log", self.slow_query_log)
+
+  def record_statement(self, tag: str, statement, elapsed: float, rows: int, failed=False):
+    """
+      Record one statement (one round trip) run by command `tag`.
+    """
+    key = (tag, fingerprint(statement))
+    with self._lock:
+      timing = self.statements.get(key)
+      if timing is None:
+        timing = self.statements[key] = Timing()
+      timing.latency.record(elapsed)
+      timing.rows += rows
+      timing.statements += 1
+      timing.errors += failed
+
+      command = self.commands.get(tag)
+      if command is None and tag != UNTAGGED:
+        command = self.commands[tag] = Timing()
+      if command is not None:
+        command.rows += rows
+        command.statements += 1
+
+    if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+      self._log_slow(tag, key[1], elapsed, rows)
+
+  def record_command(self, role: str, command: str, elapsed: float, ok: bool):
+    """
+      Record one command; a `commands` hook.
+    """
+    with self._lock:
+      timing = self.commands.get(f"{role}.{command}")
+      if timing is None:
+        timing = self.commands[f"{role}.{command}"] = Timing()
+      timing.latency.record(elapsed)
+      timing.errors += not ok
+
+  def _log_slow(self, tag: str, statement: str, elapsed: float, rows: int):
+    line = (f"{datetime.now().isoformat(timespec='milliseconds')}\t{elapsed * 1000:.1f} ms\t"
+      f"{rows} rows\t{tag}\t{statement}\n")
+    try:
+      with self._log_lock, open(self.slow_query_log, "a") as f:
+        f.write(line)
+    except OSError:
+      # an unwritable log must never fail the statement it reports.
+      pass
+
+  def top_commands(self, count=10, order="total") -> List[Tuple[str, dict]]:
+    """
+      The `count` commands with the most total time, or the slowest p99
+      with `order="tail"`, as (command, summary) pairs.
+    """
+    with self._lock:
+      rows = [(tag, timing.summary()) for tag, timing in self.commands.items()
+        if timing.latency.count]
+    return self._top(rows, count, order)
+
+  def top_statements(self, count=10, order="total") -> List[Tuple[Tuple[str, str], dict]]:
+    """
+      Like `top_commands`, for ((command, statement), summary) pairs.
+    """
+    with self._lock:
+      rows = [(key, timing.summary()) for key, timing in self.statements.items()]
+    return self._top(rows, count, order)
+
+  @staticmethod
+  def _top(rows, count, order):
+    field = "p99_ms" if order == "tail" else "total_ms"
+    rows.sort(key=lambda row: row[1][field], reverse=True)
+    return rows[:count]
+
+  def reset(self):
+    with self._lock:
+      self.commands.clear()
+      self.statements.clear()
+
+
+class InstrumentedCursor:
+  """
+    A cursor proxy recording every statement in `metrics`.
+
+    A statement's latency covers its execution and the fetching of its
+    rows, so it is recorded once the result set is read to the end, the
+    next statement runs, or the cursor is closed. Everything else is
+    passed through to the wrapped cursor.
+  """
+
+  def __init__(self, cursor, metrics: Optional[QueryMetrics] = None):
+    self._cursor = cursor
+    self._metrics = metrics or METRICS
+    # [tag, statement, elapsed, rows] of a result set still being read.
+    self._pending = None
+
+  def __getattr__(self, name):
+    return getattr(self._cursor, name)
+
+  def __iter__(self):
+    return iter(self.fetchone, None)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+
+  def _finish(self):
+    if self._pending is not None:
+      tag, statement, elapsed, rows = self._pending
+      self._pending = None
+      self._metrics.record_statement(tag, statement, elapsed, rows)
+
+  def _run(self, statement, call, *args, **kwargs):
+    self._finish()
+    tag = current_tag()
+    start = perf_counter()
+    try:
+      result = call(*args, **kwargs)
+    except Exception:
+      self._metrics.record_statement(tag, statement, perf_counter() - start, 0, failed=True)
+      raise
+    elapsed = perf_counter() - start
+    if self._cursor.description is None:
+      self._metrics.record_statement(tag, statement, elapsed, max(self._cursor.rowcount, 0))
+    else:
+      self._pending = [tag, statement, elapsed, 0]
+    return result
+
+  def _fetched(self, elapsed: float, rows: int, done: bool):
+    if self._pending is not None:
+      self._pending[2] += elapsed
+      self._pending[3] += rows
+      if done:
+        self._finish()
+
+  def execute(self, operation, *args, **kwargs):
+    return self._run(operation, self._cursor.execute, operation, *args, **kwargs)
+
+  def executemany(self, operation, *args, **kwargs):
+    return self._run(operation, self._cursor.executemany, operation, *args, **kwargs)
+
+  def callproc(self, procname, *args, **kwargs):
+    return self._run(f"CALL {procname}", self._cursor.callproc, procname, *args, **kwargs)
+
+  def fetchone(self):
+    start = perf_counter()
+    row = self._cursor.fetchone()
+    self._fetched(perf_counter() - start, row is not None, row is None)
+    return row
+
+  def fetchmany(self, *args, **kwargs):
+    start = perf_counter()
+    rows = self._cursor.fetchmany(*args, **kwargs)
+    self._fetched(perf_counter() - start, len(rows), not rows)
+    return rows
+
+  def fetchall(self):
+    start = perf_counter()
+    rows = self._cursor.fetchall()
+    self._fetched(perf_counter() - start, len(rows), True)
+    return rows
+
+  def close(self):
+    self._finish()
+    return self._cursor.close()
+
+
+# the metrics shared by every connection in this process.
+METRICS = QueryMetrics()
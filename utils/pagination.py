@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Keyset pagination for manuscript status listings.
+
+  Pages are read in (status, manuscript_number) order, starting after the
+  last row of the previous page, so each page costs an index range scan
+  bounded by the page size no matter how many manuscripts exist.
+"""
+
+from typing import List, Optional
+
+from . import statements
+from .render import TableRenderer, MANUSCRIPT_STATUS_COLUMNS
+from .logging import info
+
+DEFAULT_PAGE_SIZE = 25
+
+
+class StatusPager:
+  """
+    Remembers where the last status page ended, for the `next` command.
+  """
+
+  def __init__(self):
+    self.page_size = DEFAULT_PAGE_SIZE
+    self.status = None        # status filter, if any
+    self.last = None          # (status, manuscript_number) of the last row shown
+    self.exhausted = True
+
+  def first(self, conn, page_size=DEFAULT_PAGE_SIZE, status: Optional[str] = None,
+    mode="plain", out=None, empty="No manuscripts in database.") -> int:
+    """
+      Print the first page of manuscripts, optionally only those in `status`.
+
+      Returns
+      -------
+      int: number of manuscripts on the page.
+    """
+    self.page_size = page_size
+    self.status = status
+    self.last = None
+    self.exhausted = False
+    return self._page(conn, mode, out, empty)
+
+  def next(self, conn, mode="plain", out=None) -> int:
+    """
+      Print the page after the last one shown.
+
+      Returns
+      -------
+      int: number of manuscripts on the page.
+    """
+    if self.exhausted:
+      info("No more manuscripts.")
+      return 0
+    return self._page(conn, mode, out, "No more manuscripts.")
+
+  def _page(self, conn, mode, out, empty) -> int:
+    if self.status is not None:
+      after = self.last[1] if self.last else 0
+      cursor = statements.execute(
+        conn, "manuscript.status_page_filtered", (self.status, after, self.page_size))
+    elif self.last is None:
+      cursor = statements.execute(
+        conn, "manuscript.status_page_first", (self.page_size,))
+    elif self.last[0] is None:
+      cursor = statements.execute(
+        conn, "manuscript.status_page_after_null", (self.last[1], self.page_size))
+    else:
+      last_status, last_number = self.last
+      cursor = statements.execute(
+        conn, "manuscript.status_page_next",
+        (last_status, last_status, last_number, self.page_size))
+
+    count = TableRenderer(MANUSCRIPT_STATUS_COLUMNS, mode, out).render(
+      self._track(cursor), empty=empty)
+
+    self.exhausted = count < self.page_size
+    if not self.exhausted and mode == "plain":
+      info("Type `next` for more.")
+    return count
+
+  def _track(self, rows):
+    """
+      Pass rows through, remembering the last one as the next page's key.
+    """
+    for manuscript_number, status in rows:
+      self.last = (status, manuscript_number)
+      yield manuscript_number, status
+
+
+def parse_page_options(tokens: List[str]) -> "tuple[int, Optional[str], list[str]]":
+  """
+    Pull `--page-size <n>` and `--status <status>` options out of request tokens.
+
+    Returns
+    -------
+    (page size, status filter or None, remaining tokens);
+    raises ValueError on a malformed option.
+  """
+  page_size = DEFAULT_PAGE_SIZE
+  status = None
+  remaining = []
+  tokens = iter(tokens)
+  for token in tokens:
+    if token == "--page-size":
+      value = next(tokens, "")
+      if not value.isnumeric() or int(value) < 1:
+        raise ValueError("page size must be a positive integer")
+      page_size = int(value)
+    elif token == "--status":
+      status = next(tokens, None)
+      if not status:
+        raise ValueError("--status needs a status, e.g. --status 'under review'")
+    else:
+      remaining.append(token)
+  return page_size, status, remaining
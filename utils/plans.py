@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Query plan baselines and regression checks.
+
+  Every query the application runs is gathered as a template: the named
+  statements in `statements`, a `SELECT *` from each view in views.sql,
+  and the inline SQL (string, f-string and `.format` literals) passed to
+  `execute` in the role modules, found by reading their source. Each is
+  bound to representative parameters and run through
+  `EXPLAIN FORMAT=JSON`; the plan is reduced to its table accesses
+  (access type, index, estimated rows) and whether it sorts or builds a
+  temporary table.
+
+    ./main.py /capture-plans    # save plans as the baseline
+    ./main.py /check-plans      # compare against it
+    ./main.py /verify-indexes   # fail on any full scan, baseline or not
+
+  A check flags any template whose plan fell back to a full scan or a
+  filesort, picked a different index, or expects far more rows than the
+  baseline did, and suggests an index for the offending table.
+"""
+
+import ast
+import json
+import os
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from mysql.connector import Error
+
+from .dbconfig import connect, ConnectionHandler
+from .dbutils import iter_sql_file
+from .statements import STATEMENTS, SAMPLE_PARAMS
+from .logging import warn, info
+
+UTILS_PATH = os.path.dirname(__file__)
+VIEWS_PATH = os.path.join(UTILS_PATH, "sql", "views.sql")
+BASELINE_PATH = os.path.join(UTILS_PATH, "sql", "plan_baseline.json")
+
+# modules whose inline SQL is checked.
+ROLE_MODULES = ("user.py", "author.py", "editor.py", "reviewer.py", "superuser.py")
+
+# stands in for every interpolated value and `%s` parameter.
+SAMPLE_VALUE = 1
+
+# statements EXPLAIN can plan without running them.
+PLANNABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+# access types that read the whole table or index.
+FULL_SCANS = {"ALL", "index"}
+
+# a trailing LIMIT: an `index` access read in order stops after that many rows.
+LIMIT_PATTERN = re.compile(r"\bLIMIT\s+(?:%s|\d+)(?:\s*,\s*(?:%s|\d+))?\s*$", re.IGNORECASE)
+
+# tables with one row per manuscript status: scanning them is the plan.
+BOUNDED_TABLES = {"manuscript_status_counts"}
+
+# estimated rows may grow this many times over the baseline before it counts.
+ROWS_GROWTH = 10
+
+CREATE_VIEW_PATTERN = re.compile(r"^\s*CREATE\s+VIEW\s+`?(\w+)`?", re.IGNORECASE)
+
+# [`schema`.]`table`.`column` (= ...) in an EXPLAIN attached condition.
+EQUALITY_PATTERN = re.compile(r"(?:`\w+`\.)?`(\w+)`\.`(\w+)`\s*=\s*")
+COLUMN_PATTERN = re.compile(r"(?:`\w+`\.)?`(\w+)`\.`(\w+)`")
+
+ORDER_BY_PATTERN = re.compile(r"\bORDER\s+BY\s+(.*?)(?:\bLIMIT\b|;|$)", re.IGNORECASE | re.DOTALL)
+
+
+class QueryTemplate(NamedTuple):
+  """
+    A query to plan: its name, SQL with `%s` parameters, and where it came from.
+  """
+  name: str
+  sql: str
+  params: tuple
+  source: str
+
+
+class Regression(NamedTuple):
+  """
+    A template whose plan got worse on `table`, with a suggested fix.
+  """
+  name: str
+  table: str
+  problem: str
+  suggestion: Optional[str]
+
+
+def _string_template(node, strings: Dict[str, ast.AST]) -> Optional[str]:
+  """
+    SQL text of a string expression, with interpolated values replaced
+    by `SAMPLE_VALUE` (see `_interpolated`), or None if it is not a
+    literal we can follow.
+  """
+  if isinstance(node, ast.Constant) and isinstance(node.value, str):
+    return node.value
+  if isinstance(node, ast.JoinedStr):
+    return "".join(
+      value.value if isinstance(value, ast.Constant) else _interpolated(value.value, strings)
+      for value in node.values
+    )
+  if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+    and node.func.attr == "join" and isinstance(node.func.value, ast.Constant)
+    and len(node.args) == 1 and isinstance(node.args[0], ast.BinOp)
+    and isinstance(node.args[0].left, ast.List) and len(node.args[0].left.elts) == 1):
+    # `", ".join(["(%s, %s)"] * len(rows))`: a placeholder list, planned for one row.
+    return _string_template(node.args[0].left.elts[0], {})
+  if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+    and node.func.attr == "format"):
+    text = _string_template(node.func.value, strings)
+    return re.sub(r"\{[^{}]*\}", str(SAMPLE_VALUE), text) if text is not None else None
+  if isinstance(node, ast.Name) and node.id in strings:
+    return _string_template(strings[node.id], {})
+  return None
+
+def _interpolated(node, strings: Dict[str, ast.AST]) -> str:
+  """
+    SQL text of a value interpolated into an f-string: a placeholder
+    list built in the function, or `SAMPLE_VALUE` for anything else.
+  """
+  if isinstance(node, ast.Name) and node.id in strings:
+    text = _string_template(strings[node.id], {})
+    if text is not None and "%s" in text:
+      return text
+  return str(SAMPLE_VALUE)
+
+def _functions(tree: ast.Module) -> Iterator[Tuple[str, ast.AST]]:
+  """
+    Module-level functions and methods, with qualified names.
+  """
+  for node in tree.body:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+      yield node.name, node
+    elif isinstance(node, ast.ClassDef):
+      for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+          yield f"{node.name}.{item.name}", item
+
+def module_templates(path: str) -> List[QueryTemplate]:
+  """
+    Inline SQL passed to `execute` in a module's functions.
+
+    Variables are followed to their last assignment before the call,
+    including from closures. Test helpers (`test_*`) are skipped.
+  """
+  with open(path) as f:
+    tree = ast.parse(f.read(), filename=path)
+
+  templates = []
+  for qualified_name, function in _functions(tree):
+    if function.name.startswith("test_"):
+      continue
+    nodes = sorted(ast.walk(function), key=lambda node: getattr(node, "lineno", 0))
+
+    strings: Dict[str, ast.AST] = {}
+    found = 0
+    for node in nodes:
+      if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+        and isinstance(node.targets[0], ast.Name):
+        strings[node.targets[0].id] = node.value
+      elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        and node.func.attr in ("execute", "executemany") and node.args):
+        sql = _string_template(node.args[0], strings)
+        if sql is None:
+          continue
+        found += 1
+        name = qualified_name if found == 1 else f"{qualified_name}#{found}"
+        sql = sql.strip().rstrip(";")
+        templates.append(QueryTemplate(name, sql, (SAMPLE_VALUE,) * sql.count("%s"),
+          f"{os.path.basename(path)}:{node.lineno}"))
+  return templates
+
+def view_templates(path=VIEWS_PATH) -> List[QueryTemplate]:
+  """
+    A `SELECT *` from every view in views.sql.
+  """
+  templates = []
+  for command in iter_sql_file(path):
+    match = CREATE_VIEW_PATTERN.match(command)
+    if match:
+      view = match.group(1)
+      templates.append(QueryTemplate(f"view.{view}", f"SELECT * FROM {view}", (), "views.sql"))
+  return templates
+
+def is_listing(template: QueryTemplate) -> bool:
+  """
+    Whether a template lists a whole view: no parameter narrows it down.
+  """
+  return template.source == "views.sql" and not template.params
+
+def collect_templates() -> List[QueryTemplate]:
+  """
+    Every plannable query template the application runs, by unique name.
+
+    Inline SQL identical to a named statement is left to the named one.
+  """
+  templates = [
+    QueryTemplate(name, query.strip(), tuple(SAMPLE_PARAMS.get(name, ())), "statements.py")
+    for name, query in STATEMENTS.items()
+  ]
+  templates += view_templates()
+  for module in ROLE_MODULES:
+    templates += module_templates(os.path.join(UTILS_PATH, module))
+
+  seen = set()
+  plannable = []
+  for template in templates:
+    text = " ".join(template.sql.split())
+    if text in seen or not text.upper().startswith(PLANNABLE):
+      continue
+    seen.add(text)
+    plannable.append(template)
+  return plannable
+
+def _walk(node, accesses: List[dict], flags: dict):
+  """
+    Collect the table accesses and sort flags of an EXPLAIN JSON subtree.
+  """
+  if isinstance(node, list):
+    for item in node:
+      _walk(item, accesses, flags)
+    return
+  if not isinstance(node, dict):
+    return
+  if node.get("using_filesort"):
+    flags["filesort"] = True
+  if node.get("using_temporary_table"):
+    flags["temporary"] = True
+  table = node.get("table")
+  if isinstance(table, dict) and "table_name" in table:
+    accesses.append({
+      "table": table["table_name"],
+      "access_type": table.get("access_type"),
+      "key": table.get("key"),
+      "rows": table.get("rows_examined_per_scan"),
+      "condition": table.get("attached_condition"),
+    })
+  for value in node.values():
+    _walk(value, accesses, flags)
+
+def normalize_plan(plan: dict, sql: str = "") -> dict:
+  """
+    Reduce `EXPLAIN FORMAT=JSON` output of `sql` to what a regression check compares.
+  """
+  accesses, flags = [], {"filesort": False, "temporary": False}
+  _walk(plan, accesses, flags)
+  return {
+    "cost": float(plan.get("query_block", {}).get("cost_info", {}).get("query_cost", 0) or 0),
+    "filesort": flags["filesort"],
+    "temporary": flags["temporary"],
+    "limited": bool(LIMIT_PATTERN.search(sql.strip().rstrip(";"))),
+    # materialized views and derived tables show as <derived2> and the like.
+    "accesses": [access for access in accesses if not access["table"].startswith("<")],
+  }
+
+def explain(cursor, template: QueryTemplate) -> dict:
+  """
+    Normalized plan of one template.
+  """
+  cursor.execute(f"EXPLAIN FORMAT=JSON {template.sql}", template.params)
+  return normalize_plan(json.loads(cursor.fetchone()[0]), template.sql)
+
+def capture_plans(conn: ConnectionHandler, templates: List[QueryTemplate] = None) -> Dict[str, dict]:
+  """
+    Plan every template; templates that cannot be explained are reported and left out.
+  """
+  plans = {}
+  cursor = conn.cursor(buffered=True)
+  try:
+    for template in collect_templates() if templates is None else templates:
+      try:
+        plan = explain(cursor, template)
+      except Error as err:
+        warn(f"  skipped    {template.name:<40} {template.source}: {err.msg}")
+        continue
+      plan["source"] = template.source
+      plan["sql"] = " ".join(template.sql.split())
+      plans[template.name] = plan
+  finally:
+    cursor.close()
+  return plans
+
+def is_full_scan(access: dict, plan: dict = None) -> bool:
+  """
+    Whether a table access of `plan` reads a whole table or index,
+    not counting the `BOUNDED_TABLES`.
+
+    An `index` access of a query with a LIMIT and no filesort reads the
+    index in ORDER BY order and stops at the limit, so it is bounded.
+  """
+  if access["access_type"] not in FULL_SCANS or access["table"] in BOUNDED_TABLES:
+    return False
+  if access["access_type"] == "index" and plan is not None:
+    return not (plan.get("limited") and not plan.get("filesort"))
+  return True
+
+def suggest_index(sql: str, access: dict) -> Optional[str]:
+  """
+    An index on a table's equality predicates followed by its ORDER BY
+    columns (or, without one, its other filtered columns), read from the
+    condition EXPLAIN attached to the table access.
+  """
+  table = access["table"]
+  condition = access.get("condition") or ""
+
+  def add(columns, found):
+    for column in found:
+      if column not in columns:
+        columns.append(column)
+
+  columns = []
+  add(columns, [column for name, column in EQUALITY_PATTERN.findall(condition) if name == table])
+  order = ORDER_BY_PATTERN.search(sql)
+  ordering = []
+  if order:
+    for term in order.group(1).split(","):
+      match = re.match(rf"\s*(?:`?{table}`?\.)?`?(\w+)`?\s*(?:ASC|DESC)?\s*$", term, re.IGNORECASE)
+      if match:
+        ordering.append(match.group(1))
+  if ordering:
+    add(columns, ordering)
+  else:
+    add(columns, [column for name, column in COLUMN_PATTERN.findall(condition) if name == table])
+  if not columns:
+    return None
+  return f"CREATE INDEX {table}_{'_'.join(columns)} ON {table} ({', '.join(columns)});"
+
+def compare_plans(baseline: Dict[str, dict], current: Dict[str, dict]) -> List[Regression]:
+  """
+    Plans that got worse than the baseline, or that are new and already bad.
+  """
+  regressions = []
+  for name, plan in current.items():
+    before = baseline.get(name)
+    old_accesses = {access["table"]: access for access in (before or {}).get("accesses", [])}
+
+    for access in plan["accesses"]:
+      table = access["table"]
+      if table in BOUNDED_TABLES:
+        continue
+      old = old_accesses.get(table)
+      problem = None
+      if is_full_scan(access, plan) and (old is None or not is_full_scan(old, before)):
+        problem = f"full scan ({access['access_type']})" + ("" if before else ", new query")
+      elif old is not None and old["key"] and access["key"] != old["key"]:
+        problem = f"index changed: {old['key']} -> {access['key']}"
+      elif old is not None and (access["rows"] or 0) > ROWS_GROWTH * max(old["rows"] or 0, 1):
+        problem = f"estimated rows {old['rows']} -> {access['rows']}"
+      if problem:
+        regressions.append(Regression(name, table, problem, suggest_index(plan["sql"], access)))
+
+    if plan["filesort"] and not (before or {}).get("filesort"):
+      driving = plan["accesses"][0] if plan["accesses"] else None
+      regressions.append(Regression(
+        name, driving["table"] if driving else "", "filesort",
+        suggest_index(plan["sql"], driving) if driving else None))
+  return regressions
+
+def save_baseline(plans: Dict[str, dict], path=BASELINE_PATH):
+  with open(path, "w") as f:
+    json.dump(plans, f, indent=2, sort_keys=True)
+    f.write("\n")
+
+def load_baseline(path=BASELINE_PATH) -> Optional[Dict[str, dict]]:
+  if not os.path.exists(path):
+    return None
+  with open(path) as f:
+    return json.load(f)
+
+def _describe(plan: dict) -> str:
+  accesses = ", ".join(
+    f"{access['table']}:{access['access_type']}"
+    + (f"({access['key']})" if access["key"] else "")
+    + f"~{access['rows']}"
+    for access in plan["accesses"]
+  )
+  return accesses + ("  filesort" if plan["filesort"] else "")
+
+def capture_baseline(conn: ConnectionHandler = None, config_file="dbconfig.ini",
+  path=BASELINE_PATH) -> Dict[str, dict]:
+  """
+    Plan every template and save the plans as the baseline.
+
+    Capture against a database populated like production (e.g. with
+    `utils.datagen`); on a near-empty one MySQL prefers full scans.
+  """
+  if conn is None:
+    with connect(filename=config_file) as conn:
+      return capture_baseline(conn, path=path)
+
+  if conn.backend != "mysql":
+    warn("Query plans can only be captured on MySQL.")
+    return {}
+
+  plans = capture_plans(conn)
+  for name, plan in plans.items():
+    info(f"  {name:<40} {_describe(plan)}")
+  save_baseline(plans, path)
+  info(f"Saved {len(plans)} plan(s) to {path}.")
+  return plans
+
+def check_plans(conn: ConnectionHandler = None, config_file="dbconfig.ini",
+  path=BASELINE_PATH) -> List[Regression]:
+  """
+    Plan every template and report regressions against the baseline.
+
+    Returns
+    -------
+    list of Regression; empty if every plan is at least as good.
+  """
+  if conn is None:
+    with connect(filename=config_file) as conn:
+      return check_plans(conn, path=path)
+
+  if conn.backend != "mysql":
+    warn("Query plans can only be captured on MySQL.")
+    return []
+
+  baseline = load_baseline(path)
+  if baseline is None:
+    warn(f"No plan baseline at {path}; run `./main.py /capture-plans` first.")
+    baseline = {}
+
+  plans = capture_plans(conn)
+  regressions = compare_plans(baseline, plans)
+  flagged = {regression.name for regression in regressions}
+  for name, plan in plans.items():
+    if name not in flagged:
+      info(f"  ok         {name:<40} {_describe(plan)}")
+  for regression in regressions:
+    warn(f"  REGRESSED  {regression.name:<40} {regression.table}: {regression.problem}"
+      f"  [{plans[regression.name]['source']}]")
+    if regression.suggestion:
+      warn(f"             suggest: {regression.suggestion}")
+  for name in baseline.keys() - plans.keys():
+    warn(f"  missing    {name:<40} in the baseline but no longer planned")
+  return regressions
+
+def verify_indexes(conn: ConnectionHandler = None, config_file="dbconfig.ini") -> List[Tuple[str, str]]:
+  """
+    Plan every template and report each full scan, whatever the baseline says.
+
+    Uses the same templates and scan rule as `check_plans` (see
+    `is_full_scan`), except the views: they are unfiltered reports over
+    whole tables, so `check_plans` tracks them against the baseline instead.
+
+    Returns
+    -------
+    list of (template name, table) pairs that fell back to a full scan.
+  """
+  if conn is None:
+    with connect(filename=config_file) as conn:
+      return verify_indexes(conn)
+
+  if conn.backend != "mysql":
+    warn("Query plans can only be checked on MySQL.")
+    return []
+
+  templates = [template for template in collect_templates() if not is_listing(template)]
+  failures = []
+  for name, plan in capture_plans(conn, templates).items():
+    scans = [access["table"] for access in plan["accesses"] if is_full_scan(access, plan)]
+    failures += [(name, table) for table in scans]
+    if scans:
+      warn(f"  FULL SCAN  {name:<40} {', '.join(scans)}  [{plan['source']}]")
+    else:
+      info(f"  ok         {name:<40} {_describe(plan)}")
+  return failures
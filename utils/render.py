@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Streaming table output for status listings.
+
+  Rows are formatted as they come off the cursor and written to the
+  output in batches, so a listing starts printing right away and never
+  holds the whole table in memory.
+"""
+
+import json
+import sys
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+from .logging import Logging
+
+MODES = ("plain", "tsv", "json")
+
+
+class Column(NamedTuple):
+  """
+    A fixed-width output column.
+
+    `name` keys the value in TSV and JSON output; `header` and `fmt`
+    lay it out in plain output, padded to `width`.
+  """
+  name: str
+  header: str
+  width: int
+  fmt: str = "{}"
+
+
+MANUSCRIPT_STATUS_COLUMNS = [
+  Column("manuscript_number", "Manuscript ####", 15, "Manuscript {:4d}"),
+  Column("status", "Status", 30, "{:>30}"),
+]
+
+SUMMARY_COLUMNS = [
+  Column("status", "Status", 30, "{:>30}"),
+  Column("manuscripts", "Manuscripts", 11, "{:>11d}"),
+]
+
+REVIEW_COLUMNS = [
+  Column("manuscript_number", "Manuscript ####", 15, "Manuscript {:4d}"),
+  Column("title", "Title", 30, "{!s:>30.30}"),
+  Column("status", "Status", 24, "{:>24}"),
+  Column("date_sent", "Sent", 10, "{!s:>10}"),
+  Column("appropriateness", "A", 2, "{!s:>2}"),
+  Column("clarity", "C", 2, "{!s:>2}"),
+  Column("methodology", "M", 2, "{!s:>2}"),
+  Column("experimental", "E", 2, "{!s:>2}"),
+  Column("recommendation", "R", 2, "{!s:>2}"),
+]
+
+COMMAND_STATS_COLUMNS = [
+  Column("command", "Command", 24, "{!s:<24.24}"),
+  Column("calls", "Calls", 7, "{:>7d}"),
+  Column("total_ms", "Total ms", 10, "{:>10.1f}"),
+  Column("mean_ms", "Mean", 8, "{:>8.2f}"),
+  Column("p50_ms", "p50", 8, "{:>8.2f}"),
+  Column("p95_ms", "p95", 8, "{:>8.2f}"),
+  Column("p99_ms", "p99", 8, "{:>8.2f}"),
+  Column("max_ms", "Max", 8, "{:>8.2f}"),
+  Column("statements", "Queries", 7, "{:>7d}"),
+  Column("rows", "Rows", 8, "{:>8d}"),
+]
+
+STATEMENT_STATS_COLUMNS = [
+  Column("statement", "Statement", 40, "{!s:<40.40}"),
+  Column("command", "Command", 20, "{!s:<20.20}"),
+  Column("calls", "Calls", 7, "{:>7d}"),
+  Column("total_ms", "Total ms", 10, "{:>10.1f}"),
+  Column("mean_ms", "Mean", 8, "{:>8.2f}"),
+  Column("p95_ms", "p95", 8, "{:>8.2f}"),
+  Column("p99_ms", "p99", 8, "{:>8.2f}"),
+  Column("max_ms", "Max", 8, "{:>8.2f}"),
+  Column("rows", "Rows", 8, "{:>8d}"),
+]
+
+
+class TableRenderer:
+  """
+    Write rows to a stream as a plain table, TSV or JSON.
+
+    Parameters
+    ----------
+    `columns`: list of Column
+      layout of each row; rows are sequences in the same order.
+    `mode`: str
+      one of "plain", "tsv" or "json".
+    `out`:
+      text stream to write to (default: sys.stdout).
+    `batch_size`: int
+      number of formatted rows buffered between writes.
+  """
+
+  def __init__(self, columns: List[Column], mode="plain", out=None, batch_size=256):
+    if mode not in MODES:
+      raise ValueError(f"unknown output mode: {mode}")
+    self.columns = columns
+    self.mode = mode
+    self.out = out if out is not None else sys.stdout
+    self.batch_size = batch_size
+
+  def render(self, rows: Iterable, empty="No rows.", preamble: Optional[str] = None) -> int:
+    """
+      Stream `rows` to the output.
+
+      Parameters
+      ----------
+      `rows`: iterable of sequences
+        typically a cursor; consumed exactly once.
+      `empty`: str
+        message printed (in plain mode) when there are no rows.
+      `preamble`: str
+        extra plain-mode text printed above the table.
+
+      Returns
+      -------
+      int: number of rows written.
+    """
+    formatters = {
+      "plain": self._plain,
+      "tsv": self._tsv,
+      "json": self._json,
+    }
+    header, format_row, footer = formatters[self.mode](preamble)
+
+    count = 0
+    buffer = []
+    for row in rows:
+      if count == 0:
+        buffer.append(header)
+      buffer.append(format_row(row, count))
+      count += 1
+      if len(buffer) >= self.batch_size:
+        self.out.write("".join(buffer))
+        buffer = []
+
+    if count == 0:
+      buffer.append(self._empty(empty))
+    else:
+      buffer.append(footer)
+    self.out.write("".join(buffer))
+    self.out.flush()
+    return count
+
+  def _empty(self, message: str) -> str:
+    if self.mode == "plain":
+      return f"{Logging.info(message)}\n"
+    if self.mode == "json":
+      return "[]\n"
+    return self._tsv(None)[0]
+
+  def _plain(self, preamble):
+    cells = [f"{column.header:>{column.width}}" for column in self.columns]
+    title = f"| {' | '.join(cells)} |"
+    delim = "-" * len(title)
+    line_format = "| " + " | ".join(column.fmt for column in self.columns) + f" |\n{delim}\n"
+
+    header = Logging.BLUE
+    if preamble:
+      header += f"{delim}\n\n{preamble}\n\n"
+    header += f"{delim}\n{title}\n{delim}\n"
+
+    def format_row(row, index):
+      return line_format.format(*row)
+
+    return header, format_row, f"{Logging.END}\n"
+
+  def _tsv(self, preamble):
+    header = "\t".join(column.name for column in self.columns) + "\n"
+
+    def format_row(row, index):
+      return "\t".join("" if value is None else str(value) for value in row) + "\n"
+
+    return header, format_row, ""
+
+  def _json(self, preamble):
+    names = [column.name for column in self.columns]
+
+    def format_row(row, index):
+      separator = "  " if index == 0 else ",\n  "
+      return separator + json.dumps(dict(zip(names, row)), default=str)
+
+    return "[\n", format_row, "\n]\n"
+
+
+def parse_format(tokens: List[str]) -> "tuple[str, list[str]]":
+  """
+    Pull a `--format <mode>` option out of request tokens.
+
+    Returns
+    -------
+    (mode, remaining tokens); raises ValueError on an unknown mode.
+  """
+  mode = "plain"
+  remaining = []
+  tokens = iter(tokens)
+  for token in tokens:
+    if token == "--format":
+      mode = next(tokens, "")
+      if mode not in MODES:
+        raise ValueError(f"output format must be one of: {', '.join(MODES)}")
+    else:
+      remaining.append(token)
+  return mode, remaining
@@ -3,10 +3,15 @@
 
 from mysql.connector import MySQLConnection, Error
 from getpass import getpass
-import shlex
 
 from .dbconfig import read_db_config
+from . import statements
+from .render import TableRenderer, MANUSCRIPT_STATUS_COLUMNS, REVIEW_COLUMNS
 from .user import User
+from .cache import STATUS_CACHE, collect
+from .session import SESSIONS
+from .summary import summary
+from .commands import CommandRegistry, Arg
 from .logging import Logging, warn, info
 
 
@@ -15,10 +20,12 @@ class Reviewer(User):
 		Reviewer Class
 	"""
 
-	def __init__(self, reviewer_id: int, conn: MySQLConnection):
+	commands = CommandRegistry("Reviewer")
+
+	def __init__(self, reviewer_id: int, conn: MySQLConnection, greeting: str = None):
 		self.reviewer_id = reviewer_id
 		self.conn = conn
-		self.is_valid = self.login(reviewer_id)
+		self.is_valid = self.login(reviewer_id, greeting)
 
 	@property
 	def prompt(self):
@@ -28,7 +35,7 @@ class Reviewer(User):
 		return f"Reviewer {self.reviewer_id}> "
 
 	def __bool__(self):
-		return self.conn.is_connected()
+		return self.conn is not None and self.conn.is_connected()
 
 	def register_reviewer(self, fname: str, lname: str, ICode_list: "list[int]"):
 		"""Register a reviewer
@@ -93,7 +100,7 @@ class Reviewer(User):
 
 		return success
 
-	def login(self, reviewer_id: int):
+	def login(self, reviewer_id: int, greeting: str = None):
 		"""
 			Log in as a reviewer.
 
@@ -101,16 +108,23 @@ class Reviewer(User):
 			----------
 			`reviewer_id`: int
 				The ID of the reviewer.
+			`greeting`: str
+				Greeting already fetched along with the credentials;
+				queried here if not given.
 		"""
 		try:
-			query = f"""
-				SELECT CONCAT('Hello, ', Reviewer.`f_name`, ' ', Reviewer.`l_name`)
-				FROM `Reviewer` WHERE Reviewer.`reviewer_ID` = {reviewer_id};"""
-			cursor = self.conn.cursor()
-			cursor.execute(query)
-			result = cursor.fetchone()
-			print(result[0], "\n")
-			print(f"Status:\n{self.status()}\n")
+			if greeting is None:
+				query = f"""
+					SELECT CONCAT('Hello, ', Reviewer.`f_name`, ' ', Reviewer.`l_name`)
+					FROM `Reviewer` WHERE Reviewer.`reviewer_ID` = {reviewer_id};"""
+				cursor = self.conn.cursor()
+				cursor.execute(query)
+				greeting = cursor.fetchone()[0]
+				cursor.close()
+			print(greeting, "\n")
+			print("Summary:")
+			self.summary()
+			print()
 			return True
 		except Exception as e:
 			print(e.msg)
@@ -126,16 +140,29 @@ class Reviewer(User):
 			query = "DELETE FROM `Reviewer` WHERE `reviewer_ID` = {};".format(reviewer_id)
 			cursor = self.conn.cursor()
 			cursor.execute(query)
+			self.conn.commit()
+			# resignation triggers reset the status of the reviewer's manuscripts.
+			STATUS_CACHE.clear()
+			SESSIONS.revoke(user_type="Reviewer", type_id=reviewer_id)
 		except Exception as e:
+			self.conn.rollback()
 			print(e.msg)
 		else:
 			print("Thank you for your service!")
 			return True
 		return False
 
-	def status(self):
+	def status(self, mode="plain", out=None):
 		"""
-			Return current status as string
+			Print the status of the manuscripts assigned to the reviewer.
+
+			Arguments:
+				mode  -- output format: "plain", "tsv" or "json"
+				out   -- text stream to write to (default: stdout)
+
+			Returns the number of manuscripts listed. The rendered listing
+			is cached (see `STATUS_CACHE`) until a write touches one of its
+			manuscripts or the reviewer is assigned another.
 		"""
 
 		query = f"""SELECT Reviewer_has_Manuscript.`Manuscript_manuscript_number` 
@@ -144,27 +171,62 @@ class Reviewer(User):
 						WHERE Reviewer_has_Manuscript.`Reviewer_reviewer_ID` = {self.reviewer_id}
 						AND Manuscript.manuscript_number = Reviewer_has_Manuscript.`Manuscript_manuscript_number` 
 						ORDER BY FIELD (Manuscript.status, 'under review', 'rejected', 'accepted', 'submitted', 'in typesetting', 'schedule for publication', 'published');"""
-		
-		cursor = self.conn.cursor()
-		cursor.execute(query)
-		results = ""
-		title = "Status"
-		title = f"| Manuscript #### | {title:>30} |"
-		delim = "-" * len(title)
-		for row in cursor:
-			manuscript_number, status = row
-			results += f"| Manuscript {manuscript_number:4d} | {status:>30} |\n{delim}\n"
-		cursor.close()
-		if len(results) == 0:
-			results = "Reviewer has no manuscripts."
-		else:
-			results = f"{delim}\n{title}\n{delim}\n{results}"
 
-		return Logging.info(results)
+		def render(buffer, manuscripts):
+			cursor = self.conn.cursor()
+			cursor.execute(query)
+			count = TableRenderer(MANUSCRIPT_STATUS_COLUMNS, mode, buffer).render(
+				collect(cursor, manuscripts), empty="Reviewer has no manuscripts.")
+			cursor.close()
+			return count
+
+		return STATUS_CACHE.render(("Reviewer", self.reviewer_id, mode), out, render)
+
+	def summary(self, mode="plain", out=None):
+		"""
+			Print the reviewer's assigned manuscript counts by status,
+			read from the summary counters.
+
+			Returns the number of manuscripts assigned.
+		"""
+		return summary(self.conn, "reviewer", self.reviewer_id, mode, out)
+
+	def reviews(self, mode="plain", out=None):
+		"""
+			Print the reviewer's dashboard: every assigned manuscript with
+			its title, status, date sent and the scores recorded so far.
+
+			Supersedes the `ReviewStatus` view: the reviewer id is a bound
+			parameter rather than the `@rev_id` session variable, so the
+			query uses the Reviewer_has_Manuscript primary key and is safe
+			on pooled connections.
+
+			Arguments:
+				mode  -- output format: "plain", "tsv" or "json"
+				out   -- text stream to write to (default: stdout)
+
+			Returns the number of manuscripts listed.
+		"""
+
+		def render(buffer, manuscripts):
+			rows = collect(
+				statements.execute(self.conn, "reviewer.reviews", (self.reviewer_id,)), manuscripts)
+			if mode == "plain":
+				# unscored reviews show a dash rather than None.
+				rows = (tuple("-" if value is None else value for value in row) for row in rows)
+			return TableRenderer(REVIEW_COLUMNS, mode, buffer).render(
+				rows, empty="Reviewer has no manuscripts.")
+
+		return STATUS_CACHE.render(("Reviewer", self.reviewer_id, f"reviews/{mode}"), out, render)
 
 	def set_manuscript_opinion(self, action, output):
 		"""Set the opinion of the reviewer on a manuscript
 		
+		The scores are written by one conditional UPDATE keyed on the
+		(reviewer, manuscript) primary key and joined to the manuscript's
+		status; only when it changes no row is the assignment looked up,
+		to tell "not assigned" from "not under review".
+
 		Arguments:
 			action      -- action of the reviewer
 			ascore      -- score for the article
@@ -180,41 +242,29 @@ class Reviewer(User):
 		accept_score = 10
 		reject_score = 1
 		try:
-			query = """
-				SELECT IF(SUM(Reviewer_has_Manuscript.`Manuscript_manuscript_number` = {}), 'Y', 'N')
-				AS RES FROM Reviewer_has_Manuscript
-				GROUP BY `REVIEWER_reviewer_ID`
-				HAVING `REVIEWER_reviewer_ID` = {};""".format(manuscript_id, self.reviewer_id)
-			cursor = self.conn.cursor()
-			cursor.execute(query)
-
-			reviewer_has_manu = cursor.fetchall()
-			if reviewer_has_manu[0][0] == 'N':
-				print("You are not assigned to this manuscript")
-				return False
-			
-			query = "SELECT `status` FROM Manuscript WHERE `manuscript_number` = {};".format(manuscript_id)
-			cursor.execute(query)
-			manuscript_status = cursor.fetchall()
-			if manuscript_status[0][0] != 'under review':
-				print("This manuscript is not under review")
-				return False
-			
 			score = accept_score if action == 'accept' else reject_score
-			query = f"""
-				UPDATE Reviewer_has_Manuscript
-				SET
-					`appropriateness` = {ascore},
-					`clarity` = {cscore},
-					`methodology`={mscore},
-					`experimental`={escore},
-					`recommendation`= {score}
-				WHERE Reviewer_has_Manuscript.`Reviewer_reviewer_ID` = {self.reviewer_id}
-				AND Reviewer_has_Manuscript.`Manuscript_manuscript_number`={manuscript_id}
-			"""
-			cursor.execute(query)
+			cursor = statements.execute(self.conn, "reviewer.set_opinion", (
+				ascore, cscore, mscore, escore, score,
+				self.reviewer_id, manuscript_id
+			))
+			if cursor.rowcount == 0:
+				# nothing changed: not assigned, not under review,
+				# or the same opinion recorded again.
+				row = statements.fetchone(
+					self.conn, "reviewer.assignment_status", (self.reviewer_id, manuscript_id))
+				if row is None:
+					self.conn.rollback()
+					print("You are not assigned to this manuscript")
+					return False
+				# statuses compare case-insensitively, as they do in SQL.
+				if row[0].lower() != 'under review':
+					self.conn.rollback()
+					print("This manuscript is not under review")
+					return False
 			self.conn.commit()
-			
+			# cached `reviews` listings of this manuscript show the old scores.
+			STATUS_CACHE.invalidate([manuscript_id])
+
 		except Error as err:
 			print(err.msg)
 			return False
@@ -249,67 +299,43 @@ class Reviewer(User):
 		return self.set_manuscript_opinion('reject', output)
 
 
-	def handle_request(self, request: str):
-		"""Process the input from the reviewer
-
-		Arguments:
-			`request`  -- string
-				The user request. It can be one of the following:
-
-		"""
-
-		input_list = shlex.split(request)
-		input_size = len(input_list)
-
-		action = input_list[0]
-
-		if action == 'status' and input_size == 1:
-			return print(f"Status:\n{self.status()}")
-
-		if input_size == 2 and action == "resign":
-			if input_list[1].isnumeric():
-				reviewer_id = int(input_list[1])
-				return self.resign_reviewer(reviewer_id)
-			else:
-				print("Invalid input: reviewer ID must be a number")
-				return False
-
-		elif input_size == 2 and action == "login":
-			if input_list[1].isnumeric():
-				reviewer_id = input_list[1]
-				return self.login(reviewer_id)
-			else:
-				print("Invalid input for login statement: reviewer ID must be a number")
-				return False
-				
-		elif 5 <= input_size <= 7 and action == "register":
-			fname = input_list[2]
-			lname = input_list[3]
-			ICode_list = input_list[4:]
-			for ICode in ICode_list:
-				if not ICode.isnumeric():
-					print("Invalid RICode input, RICodes must be numeric")
-					return False
-			return self.register_reviewer(fname, lname, ICode_list)
-		
-		elif input_size == 6 and action in ["accept", "reject"]:
-			if input_list[1].isnumeric():
-				manuscript_id = int(input_list[1])
-				if input_list[2].isnumeric()\
-					and input_list[3].isnumeric()\
-					and input_list[4].isnumeric()\
-					and input_list[5].isnumeric():
-					ascore = int(input_list[2])
-					cscore = int(input_list[3])
-					mscore = int(input_list[4])
-					escore = int(input_list[5])
-					
-					self.set_manuscript_opinion(action, (manuscript_id, ascore, cscore, mscore, escore))
-		else:
-			print("Invalid input for register statement")
-			print("""Please use the following format:
-			register <first name> <last name> <RICode1> <RICode2> ... <RICodeN>""")
-			return False
+	@commands.command("status", options=("format",),
+		help="List the manuscripts assigned to you.")
+	def status_command(self, mode):
+		if mode == "plain":
+			print("Status:")
+		return self.status(mode)
+
+	@commands.command("summary", options=("format",),
+		help="Count your assigned manuscripts by status.")
+	def summary_command(self, mode):
+		return self.summary(mode)
+
+	@commands.command("reviews", options=("format",),
+		help="Show your assigned manuscripts with titles and the scores you have given.")
+	def reviews_command(self, mode):
+		return self.reviews(mode)
+
+	@commands.command("resign", Arg("reviewer_id", int),
+		help="Resign as a reviewer.")
+	def resign_command(self, reviewer_id):
+		return self.resign_reviewer(reviewer_id)
+
+	@commands.command("register",
+		Arg("role", choices=("reviewer",)), Arg("fname"), Arg("lname"), Arg("ricodes", int, many=3),
+		help="Register a new reviewer with one to three RICodes.")
+	def register_command(self, role, fname, lname, ricodes):
+		return self.register_reviewer(fname, lname, ricodes)
+
+	@commands.command("accept", Arg("manuscript_id", int), Arg("ascore", int), Arg("cscore", int), Arg("mscore", int), Arg("escore", int),
+		help="Accept a manuscript, scoring appropriateness, clarity, methodology and experiments (1-10).")
+	def accept_command(self, manuscript_id, ascore, cscore, mscore, escore):
+		return self.accept_manuscript(manuscript_id, ascore, cscore, mscore, escore)
+
+	@commands.command("reject", Arg("manuscript_id", int), Arg("ascore", int), Arg("cscore", int), Arg("mscore", int), Arg("escore", int),
+		help="Reject a manuscript, scoring appropriateness, clarity, methodology and experiments (1-10).")
+	def reject_command(self, manuscript_id, ascore, cscore, mscore, escore):
+		return self.reject_manuscript(manuscript_id, ascore, cscore, mscore, escore)
 
 	def publish_issue(self, issue):
 		"""Publish an issue
@@ -322,7 +348,7 @@ class Reviewer(User):
 			query = f"""
 				UPDATE `Manuscript`
 				SET `status` = 'published'
-				WHERE `issue` = {issue};"""
+				WHERE `Issue_issue_ID` = {issue};"""
 			cursor = self.conn.cursor()
 			cursor.execute(query)
 			success = True
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Asyncio TCP front-end serving many role sessions from one process.
+
+  Clients speak the same line protocol as the interactive prompt
+  (`status`, `assign 3 7`, `login 12`, ...). Every client gets its own
+  `User` session; the blocking mysql.connector calls run on a bounded
+  thread pool, each command borrowing a connection from the shared
+  `ConnectionPool` only for as long as it runs.
+
+  Lines starting with `.` are handled by the server itself:
+    .stats    per-session latency and the current queue depth
+    .quit     close the session
+"""
+
+import asyncio
+import io
+import shlex
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from .dbconfig import get_pool, ConnectionPool
+from .user import User
+from .logging import Logging
+from .cache import STATUS_CACHE
+
+DEFAULT_PORT = 6161
+
+# commands that prompt on the server's terminal, so cannot run remotely.
+TERMINAL_COMMANDS = {"register"}
+
+
+class _SessionStdout:
+  """
+    A stdout stand-in that routes writes from worker threads
+    to the buffer of the session they are serving.
+
+    Writes from any other thread go to the real stream.
+  """
+
+  def __init__(self, stream):
+    self.stream = stream
+    self.local = threading.local()
+
+  def _target(self):
+    buffer = getattr(self.local, "buffer", None)
+    return self.stream if buffer is None else buffer
+
+  def write(self, s: str) -> int:
+    return self._target().write(s)
+
+  def flush(self):
+    self._target().flush()
+
+  def __getattr__(self, name):
+    return getattr(self.stream, name)
+
+
+class Session:
+  """
+    One connected client: its logged-in user and latency counters.
+  """
+
+  def __init__(self, session_id: int, peer):
+    self.session_id = session_id
+    self.peer = peer
+    self.user: User = None
+    self.commands = 0
+    self.total = 0.0
+    self.slowest = 0.0
+    self.last = 0.0
+
+  def record(self, elapsed: float):
+    self.commands += 1
+    self.total += elapsed
+    self.last = elapsed
+    self.slowest = max(self.slowest, elapsed)
+
+  @property
+  def mean(self) -> float:
+    return self.total / self.commands if self.commands else 0.0
+
+  @property
+  def prompt(self) -> str:
+    prompt = getattr(self.user, "prompt", "") if self.user else ""
+    return prompt if isinstance(prompt, str) else ""
+
+
+class SessionServer:
+  """
+    Serve role sessions over TCP.
+
+    Parameters
+    ----------
+    `login`: callable
+      `login(user_id, password) -> User`, e.g. `main.user_login`.
+      The user it returns may hold a pooled connection; the server
+      releases it after login and lends one again per command.
+      If it raises (e.g. no connection is free), the session keeps
+      its current user.
+    `host`, `port`:
+      address to listen on.
+    `workers`: int
+      threads running database calls (default: the pool size).
+    `pool`: ConnectionPool
+      pool commands borrow from (default: `get_pool()`).
+  """
+
+  def __init__(self, login, host="127.0.0.1", port=DEFAULT_PORT,
+    workers=None, pool: ConnectionPool = None):
+    self.login = login
+    self.host = host
+    self.port = port
+    self.pool = pool or get_pool()
+    self.workers = workers or self.pool.size
+    self.executor = ThreadPoolExecutor(
+      max_workers=self.workers, thread_name_prefix="session")
+
+    self.sessions = {}
+    self._next_id = 1
+    self._lock = threading.Lock()
+    self._queued = 0
+    self._running = 0
+    self._stdout = None
+
+  @property
+  def queue_depth(self) -> int:
+    """
+      Commands submitted to the worker threads but not yet started.
+    """
+    with self._lock:
+      return self._queued
+
+  def stats(self) -> dict:
+    """
+      Snapshot of server load and per-session latency (in seconds).
+    """
+    with self._lock:
+      queued, running = self._queued, self._running
+    return {
+      "queued": queued,
+      "running": running,
+      "workers": self.workers,
+      "connections": self.pool.open_connections,
+      "cache": STATUS_CACHE.stats(),
+      "sessions": [
+        {
+          "id": s.session_id,
+          "peer": s.peer,
+          "user": s.prompt.strip(),
+          "commands": s.commands,
+          "mean": s.mean,
+          "max": s.slowest,
+          "last": s.last,
+        }
+        for s in self.sessions.values()
+      ],
+    }
+
+  async def serve_forever(self):
+    """
+      Listen until cancelled, then close every session.
+    """
+    self._stdout = _SessionStdout(sys.stdout)
+    sys.stdout = self._stdout
+    server = await asyncio.start_server(self._handle_client, self.host, self.port)
+    print(Logging.info(f"Serving sessions on {self.host}:{self.port} "
+      f"({self.workers} workers, pool of {self.pool.size})."))
+    try:
+      async with server:
+        await server.serve_forever()
+    finally:
+      for session in list(self.sessions.values()):
+        if session.user is not None:
+          session.user.release()
+      self.executor.shutdown(wait=True)
+      sys.stdout = self._stdout.stream
+
+  async def _run(self, session: Session, fn, *args) -> str:
+    """
+      Run `fn(*args)` on a worker thread and return what it printed.
+    """
+    def call():
+      with self._lock:
+        self._queued -= 1
+        self._running += 1
+      buffer = io.StringIO()
+      self._stdout.local.buffer = buffer
+      start = perf_counter()
+      try:
+        fn(*args)
+      except SystemExit:
+        session.user = None
+      except Exception as err:
+        print(Logging.warning(f"{type(err).__name__}: {err}"))
+      finally:
+        session.record(perf_counter() - start)
+        self._stdout.local.buffer = None
+        with self._lock:
+          self._running -= 1
+      return buffer.getvalue()
+
+    with self._lock:
+      self._queued += 1
+    return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+  def _login(self, session: Session, user_id: int, password: str):
+    """
+      Log a session in, keeping its previous user if the attempt fails.
+    """
+    user = self.login(user_id, password)
+    if user:
+      if session.user is not None:
+        session.user.release()
+      session.user = user
+    user.release()
+
+  def _request(self, session: Session, request: str):
+    """
+      Run one request with a connection borrowed for its duration.
+    """
+    user = session.user
+    user.conn = self.pool.checkout()
+    try:
+      user.handle_request(request)
+    finally:
+      user.release()
+
+  def _server_command(self, session: Session, request: str) -> str:
+    if request == ".stats":
+      stats = self.stats()
+      lines = [
+        f"queued {stats['queued']}, running {stats['running']}/{stats['workers']}, "
+        f"{stats['connections']} connections, {len(stats['sessions'])} sessions",
+        f"status cache: {stats['cache']['hits']} hits, {stats['cache']['misses']} misses, "
+        f"{stats['cache']['entries']} entries",
+        f"{'session':>8} {'commands':>9} {'mean ms':>9} {'max ms':>9} {'last ms':>9}  user",
+      ]
+      for s in stats["sessions"]:
+        lines.append(
+          f"{s['id']:>8} {s['commands']:>9} {s['mean'] * 1000:>9.2f} "
+          f"{s['max'] * 1000:>9.2f} {s['last'] * 1000:>9.2f}  {s['user']}")
+      return "\n".join(lines) + "\n"
+    return Logging.warning(f"Unknown server command: {request}") + "\n"
+
+  async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    with self._lock:
+      session = Session(self._next_id, writer.get_extra_info("peername"))
+      self._next_id += 1
+    self.sessions[session.session_id] = session
+
+    async def send(text: str):
+      writer.write(text.encode())
+      await writer.drain()
+
+    async def receive(prompt: str):
+      await send(prompt)
+      line = await reader.readline()
+      return None if not line else line.decode().strip()
+
+    async def login(user_id: str) -> bool:
+      try:
+        user_id = int(user_id)
+      except ValueError:
+        await send(Logging.warning("User ID must be an integer.") + "\n")
+        return False
+      password = await receive("Enter password: ")
+      if password is None:
+        return False
+      await send(await self._run(session, self._login, session, user_id, password))
+      return session.user is not None
+
+    try:
+      user_id = await receive("Enter User ID: ")
+      if user_id is None or not await login(user_id):
+        return
+
+      while session.user is not None:
+        request = await receive(f"{session.prompt} ")
+        if request is None or request == ".quit":
+          break
+        if not request:
+          continue
+
+        if request.startswith("."):
+          await send(self._server_command(session, request))
+          continue
+
+        try:
+          tokens = shlex.split(request)
+        except ValueError as err:
+          await send(Logging.warning(f"Invalid request: {err}") + "\n")
+          continue
+        command = tokens[0].lower() if tokens else ""
+
+        if command == "login":
+          if len(tokens) != 2:
+            await send(Logging.warning("Invalid command: too few or too many arguments") + "\n")
+            continue
+          await login(tokens[1])
+        elif command in TERMINAL_COMMANDS:
+          await send(Logging.warning(f"`{command}` is only available from the terminal.") + "\n")
+        else:
+          await send(await self._run(session, self._request, session, request))
+
+    except ConnectionError as err:
+      print(Logging.warning(f"Session {session.session_id}: {err}"))
+    finally:
+      if session.user is not None:
+        session.user.release()
+      del self.sessions[session.session_id]
+      writer.close()
+
+
+def serve(login, host="127.0.0.1", port=DEFAULT_PORT, workers=None, pool: ConnectionPool = None):
+  """
+    Run a `SessionServer` until interrupted.
+  """
+  server = SessionServer(login, host, port, workers, pool)
+  try:
+    asyncio.run(server.serve_forever())
+  except KeyboardInterrupt:
+    pass
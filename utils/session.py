@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Expiring in-process sessions.
+
+  A successful login remembers everything needed to rebuild the user
+  (type, type id, greeting). Switching back to that user with
+  `login <id>` within the session's lifetime resumes it without
+  prompting for the password or querying the credentials again.
+
+  Sessions live in this process only and never leave it, so there is
+  nothing for a client to forge. They are revoked when the account
+  behind them changes: a resigning reviewer loses theirs, and a
+  database reset forgets them all.
+"""
+
+from threading import Lock
+from time import time
+from typing import Optional
+
+DEFAULT_TTL = 900
+
+
+class SessionStore:
+  """
+    Remember the latest login of each user for `ttl` seconds.
+  """
+
+  def __init__(self, ttl=DEFAULT_TTL):
+    self.ttl = ttl
+    # user_id -> claims, with an "expires" timestamp.
+    self._sessions = {}
+    self._lock = Lock()
+
+  def configure(self, settings: dict):
+    """
+      Apply the settings of a `[session]` configuration section.
+    """
+    self.ttl = float(settings.get("ttl", self.ttl))
+
+  def remember(self, user_id: int, user_type: str, type_id: int, greeting: str = None):
+    """
+      Remember a user who just logged in.
+    """
+    claims = {
+      "user_id": user_id,
+      "user_type": user_type,
+      "type_id": type_id,
+      "greeting": greeting,
+      "expires": time() + self.ttl,
+    }
+    with self._lock:
+      self._sessions[user_id] = claims
+
+  def resume(self, user_id: int) -> Optional[dict]:
+    """
+      The claims of the user's session, if it has not expired.
+    """
+    with self._lock:
+      claims = self._sessions.get(user_id)
+      if claims is not None and claims["expires"] <= time():
+        del self._sessions[user_id]
+        claims = None
+    return claims
+
+  def revoke(self, user_id: int = None, user_type: str = None, type_id: int = None):
+    """
+      Forget a session, so the next login prompts again.
+
+      The user is given either by `user_id` or by `user_type` and `type_id`
+      (e.g. "Reviewer" and a reviewer ID), as role objects know them.
+    """
+    with self._lock:
+      if user_id is not None:
+        self._sessions.pop(user_id, None)
+      else:
+        for key, claims in list(self._sessions.items()):
+          if (claims["user_type"], claims["type_id"]) == (user_type, type_id):
+            del self._sessions[key]
+
+  def clear(self):
+    """
+      Forget every session, e.g. after the users were reset.
+    """
+    with self._lock:
+      self._sessions.clear()
+
+
+# the sessions of every user logged in by this process.
+SESSIONS = SessionStore()
@@ -17,6 +17,10 @@ DROP TABLE IF EXISTS Reviewer_has_Manuscript;
 DROP TABLE IF EXISTS Manuscript;
 DROP TABLE IF EXISTS Reviewer_has_RICodes;
 DROP TABLE IF EXISTS credentials;
+DROP TABLE IF EXISTS schema_version;
+DROP TABLE IF EXISTS manuscript_status_counts;
+DROP TABLE IF EXISTS author_status_counts;
+DROP TABLE IF EXISTS reviewer_status_counts;
 
 SET FOREIGN_KEY_CHECKS = 1;
 
@@ -29,9 +33,29 @@ DROP TRIGGER IF EXISTS ResetManuscriptStatusonReviewerResign;
 DROP TRIGGER IF EXISTS IndexAuthor;
 DROP TRIGGER IF EXISTS IndexReviewer;
 DROP TRIGGER IF EXISTS IndexEditor;
+DROP TRIGGER IF EXISTS TrackIssueCapacityOnInsert;
+DROP TRIGGER IF EXISTS TrackIssueCapacityOnUpdate;
+DROP TRIGGER IF EXISTS TrackIssueCapacityOnDelete;
+DROP TRIGGER IF EXISTS CountManuscriptOnInsert;
+DROP TRIGGER IF EXISTS CountManuscriptOnUpdate;
+DROP TRIGGER IF EXISTS CountManuscriptOnDelete;
+DROP TRIGGER IF EXISTS CountAuthorshipOnInsert;
+DROP TRIGGER IF EXISTS CountAuthorshipOnUpdate;
+DROP TRIGGER IF EXISTS CountAuthorshipOnDelete;
+DROP TRIGGER IF EXISTS CountAssignmentOnInsert;
+DROP TRIGGER IF EXISTS CountAssignmentOnUpdate;
+DROP TRIGGER IF EXISTS CountAssignmentOnDelete;
 
 -- DROP PROCEDURES
 DROP PROCEDURE IF EXISTS MakeDecision;
+DROP PROCEDURE IF EXISTS PublishIssue;
+DROP PROCEDURE IF EXISTS RebuildIssueCapacity;
+DROP PROCEDURE IF EXISTS ScheduleManuscript;
+DROP PROCEDURE IF EXISTS RebuildSummaryCounts;
+DROP PROCEDURE IF EXISTS CountManuscriptStatus;
+DROP PROCEDURE IF EXISTS CountAuthorship;
+DROP PROCEDURE IF EXISTS CountAssignment;
+DROP PROCEDURE IF EXISTS RebuildCredentials;
 
 -- DROP VIEWS
 DROP VIEW IF EXISTS LeadAuthorManuscripts;
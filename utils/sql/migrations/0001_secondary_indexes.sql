@@ -0,0 +1,23 @@
+/*
+  Migration 0001: secondary indexes for the hot query shapes
+  in the role modules (see utils/statements.py).
+
+  Verify with `./main.py /verify-indexes`.
+ */
+
+-- Editor.status, SuperUser.status: ORDER BY status, manuscript_number
+CREATE INDEX Manuscript_status ON Manuscript (status, manuscript_number);
+
+-- Editor.schedule_manuscript: scheduled page totals per issue and status
+CREATE INDEX Manuscript_issue_status ON Manuscript (Issue_issue_ID, status, page_count);
+
+-- Author.get_author_id, Author.register_author_if_nonexistent
+CREATE INDEX Author_name ON Author (f_name, l_name);
+
+-- name lookups when setting passwords of newly registered editors and reviewers
+CREATE INDEX Editor_name ON Editor (f_name, l_name);
+CREATE INDEX Reviewer_name ON Reviewer (f_name, l_name);
+
+-- LeadAuthorManuscripts (author_ordinal = 1), by author and across all authors
+CREATE INDEX Manuscript_Author_author ON Manuscript_Author (Author_author_ID, author_ordinal);
+CREATE INDEX Manuscript_Author_ordinal ON Manuscript_Author (author_ordinal, Author_author_ID);
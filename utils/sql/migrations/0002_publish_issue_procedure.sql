@@ -0,0 +1,49 @@
+/*
+  Migration 0002: publish an issue in one set-based call.
+
+  Procedure: PublishIssue
+  Purpose: Mark every manuscript of an issue as published
+           and stamp the issue's publication date.
+  Parameters:
+      (1) issue year
+      (2) issue period (1-4)
+      (3) publication date
+  Output:
+      (1) number of manuscripts published,
+          or NULL if no such issue exists.
+  Logic:
+      The issue row is locked first, so concurrent scheduling into
+      the issue waits until publishing commits. Nothing is stamped
+      when the issue has no manuscripts.
+*/
+
+DELIMITER $$
+CREATE PROCEDURE PublishIssue(
+  IN issue_year INT,
+  IN issue_period INT,
+  IN publish_date DATE,
+  OUT published INT)
+BEGIN
+  DECLARE target_issue INT DEFAULT NULL;
+
+  SELECT issue_ID INTO target_issue
+  FROM Issue
+  WHERE year = issue_year AND period = issue_period
+  FOR UPDATE;
+
+  IF target_issue IS NULL THEN
+    SET published = NULL;
+  ELSE
+    UPDATE Manuscript
+    SET status = 'published', status_change_date = publish_date
+    WHERE Issue_issue_ID = target_issue;
+    SET published = ROW_COUNT();
+
+    IF published > 0 THEN
+      UPDATE Issue
+      SET publication_date = publish_date
+      WHERE issue_ID = target_issue;
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
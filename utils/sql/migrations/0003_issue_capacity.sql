@@ -0,0 +1,132 @@
+/*
+  Migration 0003: track scheduled pages per issue.
+
+  Issue.pages_scheduled holds the total page count of manuscripts
+  in 'schedule for publication' state for each issue. It is kept
+  current by triggers on Manuscript, so scheduling can check an
+  issue's remaining capacity without summing over its manuscripts.
+*/
+
+ALTER TABLE Issue
+  ADD COLUMN pages_scheduled INT NOT NULL DEFAULT 0;
+
+/*
+  Procedure: RebuildIssueCapacity
+  Purpose: Recompute Issue.pages_scheduled from Manuscript,
+           e.g. after loading data with triggers suspended.
+*/
+DELIMITER $$
+CREATE PROCEDURE RebuildIssueCapacity()
+BEGIN
+  UPDATE Issue
+  SET pages_scheduled = (
+    SELECT IFNULL(SUM(Manuscript.page_count), 0)
+    FROM Manuscript
+    WHERE Manuscript.Issue_issue_ID = Issue.issue_ID
+    AND Manuscript.status = 'schedule for publication'
+  );
+END$$
+DELIMITER ;
+
+CALL RebuildIssueCapacity();
+
+-- Keep pages_scheduled current as manuscripts enter and leave issues.
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF NEW.status = 'schedule for publication' THEN
+      UPDATE Issue
+      SET pages_scheduled = pages_scheduled + IFNULL(NEW.page_count, 0)
+      WHERE issue_ID = NEW.Issue_issue_ID;
+    END IF;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnUpdate
+  AFTER UPDATE ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF OLD.status = 'schedule for publication' THEN
+      UPDATE Issue
+      SET pages_scheduled = pages_scheduled - IFNULL(OLD.page_count, 0)
+      WHERE issue_ID = OLD.Issue_issue_ID;
+    END IF;
+    IF NEW.status = 'schedule for publication' THEN
+      UPDATE Issue
+      SET pages_scheduled = pages_scheduled + IFNULL(NEW.page_count, 0)
+      WHERE issue_ID = NEW.Issue_issue_ID;
+    END IF;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnDelete
+  AFTER DELETE ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF OLD.status = 'schedule for publication' THEN
+      UPDATE Issue
+      SET pages_scheduled = pages_scheduled - IFNULL(OLD.page_count, 0)
+      WHERE issue_ID = OLD.Issue_issue_ID;
+    END IF;
+  END$$
+DELIMITER ;
+
+/*
+  Procedure: ScheduleManuscript
+  Purpose: Schedule a 'ready' manuscript into an issue
+           if the issue has room for it.
+  Parameters:
+      (1) manuscript number
+      (2) issue year
+      (3) issue period (1-4)
+      (4) page capacity of an issue
+  Output:
+      (1) 'scheduled', 'no issue', 'not ready' or 'over capacity'
+  Logic:
+      The issue row is locked before its capacity is read, so
+      concurrent editors scheduling into the same issue take turns
+      and cannot overfill it together.
+*/
+DELIMITER $$
+CREATE PROCEDURE ScheduleManuscript(
+  IN manuscript INT,
+  IN issue_year INT,
+  IN issue_period INT,
+  IN capacity INT,
+  OUT outcome VARCHAR(20))
+BEGIN
+  DECLARE target_issue INT DEFAULT NULL;
+  DECLARE used_pages INT DEFAULT 0;
+  DECLARE manuscript_status VARCHAR(45) DEFAULT NULL;
+  DECLARE manuscript_pages INT DEFAULT 0;
+
+  SELECT issue_ID, pages_scheduled INTO target_issue, used_pages
+  FROM Issue
+  WHERE year = issue_year AND period = issue_period
+  FOR UPDATE;
+
+  IF target_issue IS NULL THEN
+    SET outcome = 'no issue';
+  ELSE
+    SELECT status, IFNULL(page_count, 0) INTO manuscript_status, manuscript_pages
+    FROM Manuscript
+    WHERE manuscript_number = manuscript
+    FOR UPDATE;
+
+    IF manuscript_status IS NULL OR manuscript_status <> 'ready' THEN
+      SET outcome = 'not ready';
+    ELSEIF used_pages + manuscript_pages > capacity THEN
+      SET outcome = 'over capacity';
+    ELSE
+      UPDATE Manuscript
+      SET status = 'schedule for publication', Issue_issue_ID = target_issue
+      WHERE manuscript_number = manuscript;
+      SET outcome = 'scheduled';
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,219 @@
+/*
+  Migration 0004: manuscript summary counters.
+
+  Manuscript counts by status, for the whole journal, for each lead
+  author and for each reviewer, kept current by triggers on Manuscript,
+  Manuscript_Author and Reviewer_has_Manuscript. Dashboards and login
+  banners read a handful of counter rows instead of listing manuscripts.
+*/
+
+CREATE TABLE manuscript_status_counts
+  (
+    status        VARCHAR(45)   NOT NULL  PRIMARY KEY,
+    manuscripts   INT           NOT NULL  DEFAULT 0
+  );
+
+CREATE TABLE author_status_counts
+  (
+    author_id     INT           NOT NULL,
+    status        VARCHAR(45)   NOT NULL,
+    manuscripts   INT           NOT NULL  DEFAULT 0,
+    PRIMARY KEY   (author_id, status)
+  );
+
+CREATE TABLE reviewer_status_counts
+  (
+    reviewer_id   INT           NOT NULL,
+    status        VARCHAR(45)   NOT NULL,
+    manuscripts   INT           NOT NULL  DEFAULT 0,
+    PRIMARY KEY   (reviewer_id, status)
+  );
+
+/*
+  Procedure: RebuildSummaryCounts
+  Purpose: Recompute every summary counter from the base tables,
+           e.g. after loading data with triggers suspended.
+*/
+DELIMITER $$
+CREATE PROCEDURE RebuildSummaryCounts()
+BEGIN
+  DELETE FROM manuscript_status_counts;
+  DELETE FROM author_status_counts;
+  DELETE FROM reviewer_status_counts;
+
+  INSERT INTO manuscript_status_counts (status, manuscripts)
+  SELECT status, COUNT(*)
+  FROM Manuscript
+  WHERE status IS NOT NULL
+  GROUP BY status;
+
+  INSERT INTO author_status_counts (author_id, status, manuscripts)
+  SELECT Manuscript_Author.Author_author_ID, Manuscript.status, COUNT(*)
+  FROM Manuscript_Author
+  JOIN Manuscript
+    ON Manuscript.manuscript_number = Manuscript_Author.Manuscript_manuscript_number
+  WHERE Manuscript_Author.author_ordinal = 1
+  AND Manuscript.status IS NOT NULL
+  GROUP BY Manuscript_Author.Author_author_ID, Manuscript.status;
+
+  INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+  SELECT Reviewer_has_Manuscript.Reviewer_reviewer_ID, Manuscript.status, COUNT(*)
+  FROM Reviewer_has_Manuscript
+  JOIN Manuscript
+    ON Manuscript.manuscript_number = Reviewer_has_Manuscript.Manuscript_manuscript_number
+  WHERE Manuscript.status IS NOT NULL
+  GROUP BY Reviewer_has_Manuscript.Reviewer_reviewer_ID, Manuscript.status;
+END$$
+DELIMITER ;
+
+CALL RebuildSummaryCounts();
+
+/*
+  Procedure: CountManuscriptStatus
+  Purpose: Add `delta` to every counter a manuscript in `manuscript_status`
+           contributes to: the journal's, its lead author's and each
+           assigned reviewer's.
+*/
+DELIMITER $$
+CREATE PROCEDURE CountManuscriptStatus(
+  IN manuscript INT,
+  IN manuscript_status VARCHAR(45),
+  IN delta INT)
+BEGIN
+  IF manuscript_status IS NOT NULL THEN
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    VALUES (manuscript_status, delta)
+    ON DUPLICATE KEY UPDATE manuscripts = manuscripts + delta;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Author_author_ID, manuscript_status, delta
+    FROM Manuscript_Author
+    WHERE Manuscript_manuscript_number = manuscript
+    AND author_ordinal = 1
+    ON DUPLICATE KEY UPDATE manuscripts = manuscripts + delta;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_reviewer_ID, manuscript_status, delta
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = manuscript
+    ON DUPLICATE KEY UPDATE manuscripts = manuscripts + delta;
+  END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    CALL CountManuscriptStatus(NEW.manuscript_number, NEW.status, 1);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnUpdate
+  AFTER UPDATE ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF NOT (OLD.status <=> NEW.status) THEN
+      CALL CountManuscriptStatus(OLD.manuscript_number, OLD.status, -1);
+      CALL CountManuscriptStatus(NEW.manuscript_number, NEW.status, 1);
+    END IF;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnDelete
+  AFTER DELETE ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    CALL CountManuscriptStatus(OLD.manuscript_number, OLD.status, -1);
+  END$$
+DELIMITER ;
+
+-- Lead authorship changes move the manuscript between authors' counters.
+DELIMITER $$
+CREATE PROCEDURE CountAuthorship(IN author INT, IN manuscript INT, IN ordinal INT, IN delta INT)
+BEGIN
+  IF ordinal = 1 THEN
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT author, status, delta
+    FROM Manuscript
+    WHERE manuscript_number = manuscript
+    AND status IS NOT NULL
+    ON DUPLICATE KEY UPDATE manuscripts = manuscripts + delta;
+  END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnInsert
+  AFTER INSERT ON Manuscript_Author
+  FOR EACH ROW
+  BEGIN
+    CALL CountAuthorship(NEW.Author_author_ID, NEW.Manuscript_manuscript_number, NEW.author_ordinal, 1);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnUpdate
+  AFTER UPDATE ON Manuscript_Author
+  FOR EACH ROW
+  BEGIN
+    CALL CountAuthorship(OLD.Author_author_ID, OLD.Manuscript_manuscript_number, OLD.author_ordinal, -1);
+    CALL CountAuthorship(NEW.Author_author_ID, NEW.Manuscript_manuscript_number, NEW.author_ordinal, 1);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnDelete
+  AFTER DELETE ON Manuscript_Author
+  FOR EACH ROW
+  BEGIN
+    CALL CountAuthorship(OLD.Author_author_ID, OLD.Manuscript_manuscript_number, OLD.author_ordinal, -1);
+  END$$
+DELIMITER ;
+
+-- Assignments add or remove the manuscript from a reviewer's counters.
+DELIMITER $$
+CREATE PROCEDURE CountAssignment(IN reviewer INT, IN manuscript INT, IN delta INT)
+BEGIN
+  INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+  SELECT reviewer, status, delta
+  FROM Manuscript
+  WHERE manuscript_number = manuscript
+  AND status IS NOT NULL
+  ON DUPLICATE KEY UPDATE manuscripts = manuscripts + delta;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnInsert
+  AFTER INSERT ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  BEGIN
+    CALL CountAssignment(NEW.Reviewer_reviewer_ID, NEW.Manuscript_manuscript_number, 1);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnUpdate
+  AFTER UPDATE ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF OLD.Reviewer_reviewer_ID <> NEW.Reviewer_reviewer_ID
+      OR OLD.Manuscript_manuscript_number <> NEW.Manuscript_manuscript_number THEN
+      CALL CountAssignment(OLD.Reviewer_reviewer_ID, OLD.Manuscript_manuscript_number, -1);
+      CALL CountAssignment(NEW.Reviewer_reviewer_ID, NEW.Manuscript_manuscript_number, 1);
+    END IF;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnDelete
+  AFTER DELETE ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  BEGIN
+    CALL CountAssignment(OLD.Reviewer_reviewer_ID, OLD.Manuscript_manuscript_number, -1);
+  END$$
+DELIMITER ;
@@ -0,0 +1,140 @@
+/*
+  Migration 0005: insert triggers that bulk imports can suspend.
+
+  Every AFTER/BEFORE INSERT trigger now does nothing while the session
+  variable @suspend_triggers is set. `import_tables` sets it on its own
+  connection only, so rows copied from another database keep their
+  status and credentials as exported, and the derived data is rebuilt
+  once at the end (RebuildCredentials, RebuildIssueCapacity,
+  RebuildSummaryCounts) instead of row by row. Other sessions are
+  unaffected.
+*/
+
+/*
+  Procedure: RebuildCredentials
+  Purpose: Add the credentials IndexAuthor, IndexReviewer and IndexEditor
+           would have added for users inserted with triggers suspended.
+           Existing credentials (and their passwords) are kept.
+*/
+DELIMITER $$
+CREATE PROCEDURE RebuildCredentials()
+BEGIN
+  INSERT IGNORE INTO credentials (password, user_type, type_id)
+  SELECT NULL, 'Author', author_ID FROM Author;
+
+  INSERT IGNORE INTO credentials (password, user_type, type_id)
+  SELECT NULL, 'Reviewer', reviewer_ID FROM Reviewer;
+
+  INSERT IGNORE INTO credentials (password, user_type, type_id)
+  SELECT NULL, 'Editor', editor_ID FROM Editor;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS IndexAuthor;
+DELIMITER $$
+CREATE TRIGGER IndexAuthor
+  AFTER INSERT ON Author
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      INSERT INTO credentials (password, user_type, type_id)
+      VALUES (NULL, 'Author', NEW.author_ID);
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS IndexReviewer;
+DELIMITER $$
+CREATE TRIGGER IndexReviewer
+  AFTER INSERT ON Reviewer
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      INSERT INTO credentials (password, user_type, type_id)
+      VALUES (NULL, 'Reviewer', NEW.reviewer_ID);
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS IndexEditor;
+DELIMITER $$
+CREATE TRIGGER IndexEditor
+  AFTER INSERT ON Editor
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      INSERT INTO credentials (password, user_type, type_id)
+      VALUES (NULL, 'Editor', NEW.editor_ID);
+    END IF;
+  END$$
+DELIMITER ;
+
+-- Imported manuscripts keep their status even if their reviewers load later.
+DROP TRIGGER IF EXISTS AutoRejectManuscriptOnNoReviewers;
+DELIMITER $$
+CREATE TRIGGER AutoRejectManuscriptOnNoReviewers
+  BEFORE INSERT ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    DECLARE counter INT;
+    IF @suspend_triggers IS NULL THEN
+      SELECT COUNT(*) INTO counter
+      FROM Reviewer_has_RICodes
+      WHERE Reviewer_has_RICodes.RICodes_code = NEW.RICodes_code;
+      IF counter = 0 THEN
+        SET NEW.status = "rejected";
+        SET NEW.status_change_date = NOW();
+      END IF;
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS TrackIssueCapacityOnInsert;
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL AND NEW.status = 'schedule for publication' THEN
+      UPDATE Issue
+      SET pages_scheduled = pages_scheduled + IFNULL(NEW.page_count, 0)
+      WHERE issue_ID = NEW.Issue_issue_ID;
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS CountManuscriptOnInsert;
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      CALL CountManuscriptStatus(NEW.manuscript_number, NEW.status, 1);
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS CountAuthorshipOnInsert;
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnInsert
+  AFTER INSERT ON Manuscript_Author
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      CALL CountAuthorship(NEW.Author_author_ID, NEW.Manuscript_manuscript_number, NEW.author_ordinal, 1);
+    END IF;
+  END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS CountAssignmentOnInsert;
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnInsert
+  AFTER INSERT ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  BEGIN
+    IF @suspend_triggers IS NULL THEN
+      CALL CountAssignment(NEW.Reviewer_reviewer_ID, NEW.Manuscript_manuscript_number, 1);
+    END IF;
+  END$$
+DELIMITER ;
@@ -0,0 +1,35 @@
+/*
+  SQLite translation of clear.sql, for the embedded backend (utils/sqlitedb.py).
+  Dropping a table drops its triggers and indexes with it.
+ */
+
+-- DROP VIEWS
+DROP VIEW IF EXISTS LeadAuthorManuscripts;
+DROP VIEW IF EXISTS AnyAuthorManuscripts;
+DROP VIEW IF EXISTS PublishedIssues;
+DROP VIEW IF EXISTS ReviewQueue;
+DROP VIEW IF EXISTS ReviewStatus;
+DROP VIEW IF EXISTS WhatsLeft;
+
+-- DROP TABLES
+SET FOREIGN_KEY_CHECKS = 0;
+
+DROP TABLE IF EXISTS RICodes;
+DROP TABLE IF EXISTS Affiliation;
+DROP TABLE IF EXISTS Journal;
+DROP TABLE IF EXISTS Issue;
+DROP TABLE IF EXISTS Editor;
+DROP TABLE IF EXISTS Reviewer;
+DROP TABLE IF EXISTS Author;
+DROP TABLE IF EXISTS Manuscript_Author;
+DROP TABLE IF EXISTS Journal_has_RICodes;
+DROP TABLE IF EXISTS Reviewer_has_Manuscript;
+DROP TABLE IF EXISTS Manuscript;
+DROP TABLE IF EXISTS Reviewer_has_RICodes;
+DROP TABLE IF EXISTS credentials;
+DROP TABLE IF EXISTS schema_version;
+DROP TABLE IF EXISTS manuscript_status_counts;
+DROP TABLE IF EXISTS author_status_counts;
+DROP TABLE IF EXISTS reviewer_status_counts;
+
+SET FOREIGN_KEY_CHECKS = 1;
@@ -0,0 +1,188 @@
+/*
+  SQLite translation of tables.sql, for the embedded backend (utils/sqlitedb.py).
+
+  Includes every schema change from the migrations up to 0005:
+  the secondary indexes (0001), Issue.pages_scheduled (0003)
+  and the summary counter tables (0004).
+
+  Text columns compare case-insensitively, like MySQL's default collation.
+  AUTOINCREMENT keeps ids from being reused, like AUTO_INCREMENT.
+ */
+
+CREATE TABLE RICodes
+  (
+    code      INTEGER   NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    interest  VARCHAR(45) COLLATE NOCASE
+  );
+
+CREATE TABLE Affiliation
+  (
+    affiliation_ID  INTEGER   NOT NULL  PRIMARY KEY AUTOINCREMENT,
+    name            VARCHAR(45) COLLATE NOCASE
+  );
+
+CREATE TABLE Journal
+  (
+    journal_ID    INTEGER   NOT NULL      PRIMARY KEY AUTOINCREMENT,
+    journal_name   VARCHAR(45) COLLATE NOCASE
+  );
+
+CREATE TABLE Issue
+  (
+    issue_ID            INTEGER   NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    year                INT   NOT NULL,
+    period              INT   NOT NULL CHECK (period >= 1 AND period <= 4),
+    publication_date    DATE,
+    Journal_journal_ID  INT,
+    pages_scheduled     INT   NOT NULL  DEFAULT 0,
+    FOREIGN KEY         (Journal_journal_ID)  REFERENCES Journal(journal_ID),
+    UNIQUE              (year, period)
+  );
+
+CREATE TABLE Editor
+  (
+    editor_ID           INTEGER   NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    email               VARCHAR(45) COLLATE NOCASE,
+    f_name              VARCHAR(45) COLLATE NOCASE,
+    l_name              VARCHAR(45) COLLATE NOCASE,
+    Journal_journal_ID  INT,
+    FOREIGN KEY         (Journal_journal_ID)   REFERENCES Journal(journal_ID)
+  );
+
+CREATE TABLE Reviewer
+  (
+    reviewer_ID                 INTEGER   NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    email                       VARCHAR(45) COLLATE NOCASE,
+    f_name                      VARCHAR(45) COLLATE NOCASE,
+    l_name                      VARCHAR(45) COLLATE NOCASE,
+    Affiliation_affiliation_ID  INT,
+    FOREIGN KEY   (Affiliation_affiliation_ID)   REFERENCES Affiliation(affiliation_ID)
+  );
+
+CREATE TABLE Author
+  (
+    author_ID                   INTEGER   NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    Affiliation_affiliation_ID  INT,
+    f_name                      VARCHAR(45) COLLATE NOCASE,
+    l_name                      VARCHAR(45) COLLATE NOCASE,
+    email                       VARCHAR(45) COLLATE NOCASE,
+    FOREIGN KEY   (Affiliation_affiliation_ID)   REFERENCES Affiliation(affiliation_ID)
+  );
+
+CREATE TABLE Manuscript
+  (
+    manuscript_number INTEGER        NOT NULL  PRIMARY KEY   AUTOINCREMENT,
+    title             VARCHAR(255)   COLLATE NOCASE  NOT NULL,
+    date_received     DATE           NOT NULL,
+    status            VARCHAR(45)    COLLATE NOCASE,
+    page_number       INT,
+    page_count        INT,
+    date_accepted     DATE,
+    status_change_date DATE,
+    RICodes_code      INT,
+    Editor_editor_ID  INT,
+    Issue_issue_ID    INT,
+    FOREIGN KEY       (RICodes_code)      REFERENCES RICodes(code),
+    FOREIGN KEY       (Editor_editor_ID)  REFERENCES Editor(editor_ID),
+    FOREIGN KEY       (Issue_issue_ID)    REFERENCES Issue(issue_ID)
+  );
+
+
+--  Create helper tables for relationships.
+
+CREATE TABLE Manuscript_Author
+  (
+    Manuscript_manuscript_number  INT   NOT NULL,
+    Author_author_ID              INT   NOT NULL,
+    author_ordinal                INT,
+    PRIMARY KEY   (Manuscript_manuscript_number, Author_author_ID),
+    FOREIGN KEY   (Manuscript_manuscript_number)  REFERENCES Manuscript(manuscript_number),
+    FOREIGN KEY   (Author_author_ID)              REFERENCES Author(author_ID),
+    UNIQUE        (Manuscript_manuscript_number, author_ordinal)
+  );
+
+CREATE TABLE Journal_has_RICodes
+  (
+    Journal_journal_ID  INT   NOT NULL,
+    RICodes_code        INT   NOT NULL,
+    PRIMARY KEY         (Journal_journal_ID, RICodes_code),
+    FOREIGN KEY   (Journal_journal_ID)  REFERENCES Journal(journal_ID),
+    FOREIGN KEY   (RICodes_code)        REFERENCES RICodes(code)
+  );
+
+CREATE TABLE Reviewer_has_Manuscript
+  (
+    Reviewer_reviewer_ID      INT   NOT NULL,
+    Manuscript_manuscript_number  INT   NOT NULL,
+    date_sent                 DATE,
+    appropriateness           INT   CHECK (appropriateness >= 1 AND appropriateness <= 10),
+    clarity                   INT   CHECK (clarity >= 1         AND clarity <= 10),
+    methodology               INT   CHECK (methodology >= 1     AND methodology <= 10),
+    experimental              INT   CHECK (experimental >= 1    AND experimental <= 10),
+    recommendation            INT   CHECK (recommendation >= 1  AND recommendation <= 10),
+    feedback_date             DATE,
+    PRIMARY KEY   (Reviewer_reviewer_ID, Manuscript_manuscript_number),
+    FOREIGN KEY   (Reviewer_reviewer_ID)      REFERENCES Reviewer(reviewer_ID),
+    FOREIGN KEY   (Manuscript_manuscript_number)  REFERENCES Manuscript(manuscript_number)
+  );
+
+CREATE TABLE Reviewer_has_RICodes
+  (
+    Reviewer_reviewer_ID  INT   NOT NULL,
+    RICodes_code          INT   NOT NULL,
+    PRIMARY KEY   (Reviewer_reviewer_ID, RICodes_code),
+    FOREIGN KEY   (Reviewer_reviewer_ID)  REFERENCES Reviewer(reviewer_ID),
+    FOREIGN KEY   (RICodes_code)          REFERENCES RICodes(code)
+  );
+
+CREATE TABLE credentials
+  (
+    user_id   INTEGER       NOT NULL  PRIMARY KEY AUTOINCREMENT,
+    password  VARCHAR(255)  DEFAULT NULL,
+    user_type VARCHAR(20)   COLLATE NOCASE  NOT NULL
+      CHECK (user_type IN ('Admin', 'Author', 'Reviewer', 'Editor')),
+    type_id   INT           NOT NULL,
+    UNIQUE (user_type, type_id)
+  );
+
+
+-- Summary counters (migration 0004).
+
+CREATE TABLE manuscript_status_counts
+  (
+    status        VARCHAR(45)   COLLATE NOCASE  NOT NULL  PRIMARY KEY,
+    manuscripts   INT           NOT NULL  DEFAULT 0
+  );
+
+CREATE TABLE author_status_counts
+  (
+    author_id     INT           NOT NULL,
+    status        VARCHAR(45)   COLLATE NOCASE  NOT NULL,
+    manuscripts   INT           NOT NULL  DEFAULT 0,
+    PRIMARY KEY   (author_id, status)
+  );
+
+CREATE TABLE reviewer_status_counts
+  (
+    reviewer_id   INT           NOT NULL,
+    status        VARCHAR(45)   COLLATE NOCASE  NOT NULL,
+    manuscripts   INT           NOT NULL  DEFAULT 0,
+    PRIMARY KEY   (reviewer_id, status)
+  );
+
+
+-- Secondary indexes (migration 0001).
+
+CREATE INDEX Manuscript_status ON Manuscript (status, manuscript_number);
+CREATE INDEX Manuscript_issue_status ON Manuscript (Issue_issue_ID, status, page_count);
+CREATE INDEX Author_name ON Author (f_name, l_name);
+CREATE INDEX Editor_name ON Editor (f_name, l_name);
+CREATE INDEX Reviewer_name ON Reviewer (f_name, l_name);
+CREATE INDEX Manuscript_Author_author ON Manuscript_Author (Author_author_ID, author_ordinal);
+CREATE INDEX Manuscript_Author_ordinal ON Manuscript_Author (author_ordinal, Author_author_ID);
+
+-- Add super-user credentials.
+INSERT INTO credentials (password, user_type, type_id)
+VALUES
+  (MD5('siavava'), 'Admin', 1),
+  (MD5('lou'), 'Admin', 2);
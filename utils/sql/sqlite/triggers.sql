@@ -0,0 +1,387 @@
+/*
+  SQLite translation of triggers.sql, for the embedded backend (utils/sqlitedb.py),
+  with the triggers added by migrations 0003 (issue capacity), 0004 (summary
+  counters) and 0005 (suspendable triggers).
+
+  SQLite triggers cannot assign to NEW, so the BEFORE triggers that did
+  are AFTER triggers updating the new row, and IF blocks become WHEN and
+  WHERE conditions. The counter procedures of migration 0004 are inlined
+  as upserts.
+
+  Every trigger does nothing while @suspend_triggers is set. Besides bulk
+  imports (migration 0005), the backend sets it to emulate TRUNCATE TABLE,
+  which skips triggers in MySQL.
+ */
+
+-- Trigger #1: reject new manuscripts no reviewer can review.
+DELIMITER $$
+CREATE TRIGGER AutoRejectManuscriptOnNoReviewers
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM Reviewer_has_RICodes
+      WHERE Reviewer_has_RICodes.RICodes_code = NEW.RICodes_code
+    )
+  BEGIN
+    UPDATE Manuscript
+    SET status = 'rejected',
+    status_change_date = NOW()
+    WHERE manuscript_number = NEW.manuscript_number;
+  END$$
+DELIMITER ;
+
+-- Trigger #2: a resigning reviewer's assignments and RICodes go with them.
+DELIMITER $$
+CREATE TRIGGER DeleteAssignmentOnReviewerResign
+  BEFORE DELETE ON Reviewer
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    DELETE FROM Reviewer_has_Manuscript
+    WHERE Reviewer_reviewer_id = OLD.reviewer_id;
+    DELETE FROM Reviewer_has_RICodes
+    WHERE Reviewer_reviewer_id = OLD.reviewer_id;
+  END$$
+DELIMITER ;
+
+-- A manuscript losing its last reviewer is reset to submitted (with an error)
+-- if another reviewer could take it over, and rejected otherwise.
+DELIMITER $$
+CREATE TRIGGER ResetManuscriptStatusonReviewerResign
+  BEFORE DELETE ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM Reviewer_has_Manuscript
+      WHERE Manuscript_manuscript_number = OLD.Manuscript_manuscript_number
+      AND Reviewer_reviewer_id != OLD.Reviewer_reviewer_id
+    )
+  BEGIN
+    SELECT RAISE(ABORT, 'Manuscript status reset to submitted.')
+    WHERE EXISTS (
+      SELECT 1 FROM Reviewer
+      WHERE reviewer_id != OLD.Reviewer_reviewer_id
+      AND reviewer_id IN
+        (
+          SELECT Reviewer_reviewer_id
+          FROM Reviewer_has_RICodes
+          WHERE RICodes_code =
+            (
+              SELECT RICodes_code
+              FROM Manuscript
+              WHERE manuscript_number = OLD.Manuscript_manuscript_number
+            )
+        )
+    );
+    UPDATE Manuscript
+    SET status = 'Rejected',
+    status_change_date = NOW()
+    WHERE manuscript_number = OLD.Manuscript_manuscript_number;
+  END$$
+DELIMITER ;
+
+-- Trigger #3: accepted manuscripts go straight to typesetting.
+DELIMITER $$
+CREATE TRIGGER AutoAcceptManuscript
+  AFTER UPDATE OF status ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NEW.status = 'Accepted' COLLATE NOCASE
+  BEGIN
+    UPDATE Manuscript
+    SET status = 'Typesetting'
+    WHERE manuscript_number = NEW.manuscript_number;
+  END$$
+DELIMITER ;
+
+-- Index new users into the credentials table.
+DELIMITER $$
+CREATE TRIGGER IndexAuthor
+  AFTER INSERT ON Author
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO credentials (password, user_type, type_id)
+    VALUES (NULL, 'Author', NEW.author_ID);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER IndexReviewer
+  AFTER INSERT ON Reviewer
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO credentials (password, user_type, type_id)
+    VALUES (NULL, 'Reviewer', NEW.reviewer_ID);
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER IndexEditor
+  AFTER INSERT ON Editor
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO credentials (password, user_type, type_id)
+    VALUES (NULL, 'Editor', NEW.editor_ID);
+  END$$
+DELIMITER ;
+
+-- Keep Issue.pages_scheduled current (migration 0003).
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NEW.status = 'schedule for publication' COLLATE NOCASE
+  BEGIN
+    UPDATE Issue
+    SET pages_scheduled = pages_scheduled + IFNULL(NEW.page_count, 0)
+    WHERE issue_ID = NEW.Issue_issue_ID;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnUpdate
+  AFTER UPDATE ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    UPDATE Issue
+    SET pages_scheduled = pages_scheduled - IFNULL(OLD.page_count, 0)
+    WHERE issue_ID = OLD.Issue_issue_ID
+    AND OLD.status = 'schedule for publication' COLLATE NOCASE;
+    UPDATE Issue
+    SET pages_scheduled = pages_scheduled + IFNULL(NEW.page_count, 0)
+    WHERE issue_ID = NEW.Issue_issue_ID
+    AND NEW.status = 'schedule for publication' COLLATE NOCASE;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER TrackIssueCapacityOnDelete
+  AFTER DELETE ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND OLD.status = 'schedule for publication' COLLATE NOCASE
+  BEGIN
+    UPDATE Issue
+    SET pages_scheduled = pages_scheduled - IFNULL(OLD.page_count, 0)
+    WHERE issue_ID = OLD.Issue_issue_ID;
+  END$$
+DELIMITER ;
+
+-- Summary counters (migration 0004): a manuscript's status counts for the
+-- journal, its lead author and each assigned reviewer.
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnInsert
+  AFTER INSERT ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NEW.status IS NOT NULL
+  BEGIN
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    SELECT NEW.status, 1 WHERE 1
+    ON CONFLICT (status) DO UPDATE SET manuscripts = manuscripts + 1;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Author_author_ID, NEW.status, 1
+    FROM Manuscript_Author
+    WHERE Manuscript_manuscript_number = NEW.manuscript_number
+    AND author_ordinal = 1
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_reviewer_ID, NEW.status, 1
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = NEW.manuscript_number
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnUpdate
+  AFTER UPDATE ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND OLD.status IS NOT NEW.status
+  BEGIN
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    SELECT OLD.status, -1 WHERE OLD.status IS NOT NULL
+    ON CONFLICT (status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Author_author_ID, OLD.status, -1
+    FROM Manuscript_Author
+    WHERE Manuscript_manuscript_number = OLD.manuscript_number
+    AND author_ordinal = 1
+    AND OLD.status IS NOT NULL
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_reviewer_ID, OLD.status, -1
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = OLD.manuscript_number
+    AND OLD.status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    SELECT NEW.status, 1 WHERE NEW.status IS NOT NULL
+    ON CONFLICT (status) DO UPDATE SET manuscripts = manuscripts + 1;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Author_author_ID, NEW.status, 1
+    FROM Manuscript_Author
+    WHERE Manuscript_manuscript_number = NEW.manuscript_number
+    AND author_ordinal = 1
+    AND NEW.status IS NOT NULL
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_reviewer_ID, NEW.status, 1
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = NEW.manuscript_number
+    AND NEW.status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountManuscriptOnDelete
+  AFTER DELETE ON Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND OLD.status IS NOT NULL
+  BEGIN
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    SELECT OLD.status, -1 WHERE 1
+    ON CONFLICT (status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Author_author_ID, OLD.status, -1
+    FROM Manuscript_Author
+    WHERE Manuscript_manuscript_number = OLD.manuscript_number
+    AND author_ordinal = 1
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_reviewer_ID, OLD.status, -1
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = OLD.manuscript_number
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+  END$$
+DELIMITER ;
+
+-- Lead authorship changes move the manuscript between authors' counters.
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnInsert
+  AFTER INSERT ON Manuscript_Author
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND NEW.author_ordinal = 1
+  BEGIN
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT NEW.Author_author_ID, status, 1
+    FROM Manuscript
+    WHERE manuscript_number = NEW.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnUpdate
+  AFTER UPDATE ON Manuscript_Author
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT OLD.Author_author_ID, status, -1
+    FROM Manuscript
+    WHERE manuscript_number = OLD.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    AND OLD.author_ordinal = 1
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT NEW.Author_author_ID, status, 1
+    FROM Manuscript
+    WHERE manuscript_number = NEW.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    AND NEW.author_ordinal = 1
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAuthorshipOnDelete
+  AFTER DELETE ON Manuscript_Author
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND OLD.author_ordinal = 1
+  BEGIN
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT OLD.Author_author_ID, status, -1
+    FROM Manuscript
+    WHERE manuscript_number = OLD.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (author_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+  END$$
+DELIMITER ;
+
+-- Assignments add or remove the manuscript from a reviewer's counters.
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnInsert
+  AFTER INSERT ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT NEW.Reviewer_reviewer_ID, status, 1
+    FROM Manuscript
+    WHERE manuscript_number = NEW.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnUpdate
+  AFTER UPDATE ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+    AND (OLD.Reviewer_reviewer_ID <> NEW.Reviewer_reviewer_ID
+      OR OLD.Manuscript_manuscript_number <> NEW.Manuscript_manuscript_number)
+  BEGIN
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT OLD.Reviewer_reviewer_ID, status, -1
+    FROM Manuscript
+    WHERE manuscript_number = OLD.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT NEW.Reviewer_reviewer_ID, status, 1
+    FROM Manuscript
+    WHERE manuscript_number = NEW.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts + 1;
+  END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER CountAssignmentOnDelete
+  AFTER DELETE ON Reviewer_has_Manuscript
+  FOR EACH ROW
+  WHEN session_variable('suspend_triggers') IS NULL
+  BEGIN
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT OLD.Reviewer_reviewer_ID, status, -1
+    FROM Manuscript
+    WHERE manuscript_number = OLD.Manuscript_manuscript_number
+    AND status IS NOT NULL
+    ON CONFLICT (reviewer_id, status) DO UPDATE SET manuscripts = manuscripts - 1;
+  END$$
+DELIMITER ;
@@ -0,0 +1,117 @@
+/*
+  SQLite translation of views.sql, for the embedded backend (utils/sqlitedb.py).
+
+  CONCAT_WS and session_variable are registered on every connection by
+  the backend; session_variable('rev_id') stands in for ViewRevId().
+ */
+
+CREATE VIEW LeadAuthorManuscripts AS
+  SELECT
+    Author.l_name,
+    Author.author_id,
+    Manuscript.manuscript_number,
+    Manuscript.status_change_date
+  FROM
+    Author,
+    Manuscript,
+    Manuscript_Author
+  WHERE
+    Author.author_id = Manuscript_Author.Author_author_id
+    AND Manuscript.manuscript_number = Manuscript_Author.Manuscript_manuscript_number
+    AND Manuscript_Author.author_ordinal = 1
+  ORDER BY
+    Author.l_name ASC,
+    Author.author_id ASC,
+    Manuscript.status_change_date ASC;
+
+CREATE VIEW AnyAuthorManuscripts AS
+    SELECT
+        Author.author_id,
+        Author.f_name,
+        Author.l_name,
+        Manuscript.manuscript_number,
+        Manuscript.title,
+        Manuscript.status,
+        Manuscript.status_change_date
+    FROM
+        Author,
+        Manuscript_Author,
+        Manuscript
+    WHERE
+        Author.author_id = Manuscript_Author.Author_author_ID
+        AND Manuscript_Author.Manuscript_manuscript_number = Manuscript.manuscript_number
+    ORDER BY
+        Author.l_name ASC,
+        Manuscript.status_change_date ASC
+    ;
+
+CREATE VIEW PublishedIssues AS
+  SELECT
+    Issue.year,
+    Issue.period,
+    Manuscript.title,
+    Manuscript.page_number
+  FROM
+    Issue,
+    Manuscript
+  WHERE
+    Issue.issue_ID = Manuscript.Issue_issue_ID
+    AND Issue.publication_date IS NOT NULL
+  ORDER BY
+    Issue.year ASC,
+    Issue.period ASC,
+    Manuscript.page_number ASC;
+
+CREATE VIEW ReviewQueue AS
+  SELECT
+    CONCAT_WS(' ', Author.f_name, Author.l_name) AS primary_author,
+    Author.author_id,
+    Manuscript.manuscript_number,
+    MAX(Reviewer_has_Manuscript.date_sent) AS status_change_date,
+    GROUP_CONCAT(CONCAT_WS(' ', Reviewer.f_name, Reviewer.l_name)) AS reviewers
+  FROM
+    Author,
+    Manuscript,
+    Manuscript_Author,
+    Reviewer,
+    Reviewer_has_Manuscript
+  WHERE
+    Author.author_id = Manuscript_Author.Author_author_id
+    AND Manuscript.manuscript_number = Manuscript_Author.Manuscript_manuscript_number
+    AND Manuscript.manuscript_number = Reviewer_has_Manuscript.Manuscript_manuscript_number
+    AND Reviewer.reviewer_id = Reviewer_has_Manuscript.Reviewer_reviewer_id
+    AND Manuscript.status = 'under review'
+    AND Manuscript_Author.author_ordinal = 1
+  GROUP BY
+    Manuscript.manuscript_number
+  ORDER BY
+    status_change_date ASC,
+    Author.author_id ASC;
+
+CREATE VIEW WhatsLeft AS
+  SELECT
+    Manuscript.manuscript_number,
+    Manuscript.status,
+    Manuscript.status_change_date
+  FROM
+    Manuscript
+  ;
+
+-- Deprecated, as in views.sql: use the reviewer `reviews` command instead.
+CREATE VIEW ReviewStatus AS
+  SELECT
+    Reviewer_has_Manuscript.date_sent,
+    Reviewer_has_Manuscript.Manuscript_manuscript_number,
+    Manuscript.title,
+    Reviewer_has_Manuscript.appropriateness,
+    Reviewer_has_Manuscript.clarity,
+    Reviewer_has_Manuscript.methodology,
+    Reviewer_has_Manuscript.experimental,
+    Reviewer_has_Manuscript.recommendation
+  FROM
+    Manuscript,
+    Reviewer_has_Manuscript
+  WHERE
+    Reviewer_has_Manuscript.Manuscript_manuscript_number = Manuscript.manuscript_number
+    AND Reviewer_has_Manuscript.Reviewer_reviewer_id = session_variable('rev_id')
+  ;
@@ -199,6 +199,10 @@ DELIMITER ;
       (8) appropriateness
 
     - Permissions: Editor.
+    - Deprecated: kept for backward compatibility only. ViewRevId() reads
+      the @rev_id session variable, so the filter cannot use an index and
+      the view is unsafe on pooled connections. The application uses the
+      reviewer `reviews` command (statement `reviewer.reviews`) instead.
  */
 CREATE VIEW ReviewStatus AS
   SELECT
@@ -0,0 +1,687 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Embedded SQLite backend, for local runs and fast test cycles
+  without a MySQL server.
+
+  Selected by `backend = sqlite` in a database section of the
+  configuration file; `database` is a file path, or `:memory:` for a
+  database shared by every connection of the process:
+
+    [mysql]
+    backend  = sqlite
+    database = :memory:
+
+  A new database gets the schema of utils/sql/sqlite, the SQLite
+  translation of tables.sql, views.sql, triggers.sql and the migrations.
+  The role modules' MySQL statements are translated on the fly
+  (placeholders, INSERT IGNORE, locking reads, session variables,
+  TRUNCATE), and their stored procedures are Python functions run
+  through `cursor.callproc` (see `PROCEDURES`).
+
+  Query plans (EXPLAIN FORMAT=JSON), migrations and LOAD DATA are
+  MySQL-only; imports fall back to batched INSERTs.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from unicodedata import normalize, combining
+from typing import Callable, Dict, Optional, Tuple
+
+from mysql.connector.errors import (
+  DatabaseError, IntegrityError, InterfaceError, NotSupportedError,
+  OperationalError, ProgrammingError
+)
+
+from .dbconfig import register_backend
+from .dbutils import SCHEMA_VERSION_TABLE, iter_sql_file, list_migrations, _checksum
+from .metrics import InstrumentedCursor
+from .statements import STATEMENTS
+
+SQLITE_PATH = os.path.join(os.path.dirname(__file__), "sql", "sqlite")
+SCRIPTS = ["clear.sql", "tables.sql", "views.sql", "triggers.sql"]
+
+# every `:memory:` connection opens this one shared-cache database.
+MEMORY_URI = "file:relational?mode=memory&cache=shared"
+# seconds between attempts to take a table locked by another connection
+# to the shared in-memory database (see `SQLiteConnection.run`).
+LOCK_RETRY_INTERVAL = 0.005
+
+# MySQL error numbers for the SQLite errors the application checks for.
+ER_DUP_ENTRY = 1062
+ER_NO_REFERENCED_ROW = 1452
+ER_CHECK_CONSTRAINT_VIOLATED = 3819
+ER_BAD_NULL = 1048
+ER_NO_SUCH_TABLE = 1146
+ER_PARSE_ERROR = 1064
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_SP_DOES_NOT_EXIST = 1305
+ER_SIGNAL_EXCEPTION = 1644
+ER_NOT_ALLOWED_COMMAND = 1148
+
+# DATE columns come back as dates, like they do from MySQL.
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+
+# MySQL functions used by the schema and the role modules.
+
+def _concat(*args):
+  if any(arg is None for arg in args):
+    return None
+  return "".join(str(arg) for arg in args)
+
+def _concat_ws(separator, *args):
+  if separator is None:
+    return None
+  return str(separator).join(str(arg) for arg in args if arg is not None)
+
+def _md5(value):
+  if value is None:
+    return None
+  if not isinstance(value, bytes):
+    value = str(value).encode()
+  return hashlib.md5(value).hexdigest()
+
+def _field(value, *args):
+  return args.index(value) + 1 if value is not None and value in args else 0
+
+FUNCTIONS = {
+  "CONCAT": (-1, _concat),
+  "CONCAT_WS": (-1, _concat_ws),
+  "MD5": (1, _md5),
+  "FIELD": (-1, _field),
+  "NOW": (0, lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+  "CURDATE": (0, lambda: date.today().isoformat()),
+  # one process owns an embedded database; named locks always succeed.
+  "GET_LOCK": (2, lambda name, timeout: 1),
+  "RELEASE_LOCK": (1, lambda name: 1),
+}
+
+
+# MySQL collations named by the role modules' statements.
+
+def fold(text: str) -> str:
+  """
+    Fold text for comparison like `utf8mb4_0900_ai_ci`: case and accents are ignored.
+  """
+  return "".join(c for c in normalize("NFKD", text) if not combining(c)).casefold()
+
+def _ai_ci(left: str, right: str) -> int:
+  left, right = fold(left), fold(right)
+  return (left > right) - (left < right)
+
+COLLATIONS = {
+  "utf8mb4_0900_ai_ci": _ai_ci,
+}
+
+
+# Stored procedures, as functions of (connection, *arguments) returning
+# the arguments with OUT parameters filled in, like `callproc` in MySQL.
+
+def _begin_write(db: sqlite3.Connection):
+  """
+    Take the write lock up front, standing in for SELECT ... FOR UPDATE.
+  """
+  if not db.in_transaction:
+    db.execute("BEGIN IMMEDIATE")
+
+def make_decision(db: sqlite3.Connection, manuscript_number, decision=None):
+  """
+    MakeDecision: 'Accepted' if the manuscript's reviews average at least 40
+    (the four scores summed, rounded like MySQL's INT), 'Rejected' otherwise.
+  """
+  row = db.execute("""
+    SELECT
+      SUM(appropriateness + clarity + methodology + experimental),
+      COUNT(Manuscript_manuscript_number)
+    FROM Reviewer_has_Manuscript
+    WHERE Manuscript_manuscript_number = ?
+  """, (manuscript_number,)).fetchone()
+  total, count = row
+  if total is None or not count:
+    decision = "Rejected"
+  else:
+    # round half away from zero; totals are never negative.
+    average = (2 * total + count) // (2 * count)
+    decision = "Accepted" if average >= 40 else "Rejected"
+  return (manuscript_number, decision)
+
+def publish_issue(db: sqlite3.Connection, issue_year, issue_period, publish_date, published=None):
+  """
+    PublishIssue (migration 0002).
+  """
+  _begin_write(db)
+  row = db.execute(
+    "SELECT issue_ID FROM Issue WHERE year = ? AND period = ?",
+    (issue_year, issue_period)).fetchone()
+  if row is None:
+    published = None
+  else:
+    # ROW_COUNT() in MySQL counts changed rows only.
+    published = db.execute("""
+      UPDATE Manuscript
+      SET status = 'published', status_change_date = ?
+      WHERE Issue_issue_ID = ?
+      AND (status IS NOT 'published' OR status_change_date IS NOT ?)
+    """, (publish_date, row[0], publish_date)).rowcount
+    if published > 0:
+      db.execute(
+        "UPDATE Issue SET publication_date = ? WHERE issue_ID = ?",
+        (publish_date, row[0]))
+  return (issue_year, issue_period, publish_date, published)
+
+def schedule_manuscript(db: sqlite3.Connection, manuscript, issue_year, issue_period,
+  capacity, outcome=None):
+  """
+    ScheduleManuscript (migration 0003).
+  """
+  _begin_write(db)
+  issue = db.execute(
+    "SELECT issue_ID, pages_scheduled FROM Issue WHERE year = ? AND period = ?",
+    (issue_year, issue_period)).fetchone()
+  if issue is None:
+    outcome = "no issue"
+  else:
+    target_issue, used_pages = issue
+    row = db.execute(
+      "SELECT status, IFNULL(page_count, 0) FROM Manuscript WHERE manuscript_number = ?",
+      (manuscript,)).fetchone()
+    if row is None or row[0] is None or row[0].lower() != "ready":
+      outcome = "not ready"
+    elif used_pages + row[1] > int(capacity):
+      outcome = "over capacity"
+    else:
+      db.execute("""
+        UPDATE Manuscript
+        SET status = 'schedule for publication', Issue_issue_ID = ?
+        WHERE manuscript_number = ?
+      """, (target_issue, manuscript))
+      outcome = "scheduled"
+  return (manuscript, issue_year, issue_period, capacity, outcome)
+
+def rebuild_credentials(db: sqlite3.Connection):
+  """
+    RebuildCredentials (migration 0005).
+  """
+  for user_type, key, table in (
+    ("Author", "author_ID", "Author"),
+    ("Reviewer", "reviewer_ID", "Reviewer"),
+    ("Editor", "editor_ID", "Editor"),
+  ):
+    db.execute(f"""
+      INSERT OR IGNORE INTO credentials (password, user_type, type_id)
+      SELECT NULL, '{user_type}', {key} FROM {table}
+    """)
+  return ()
+
+def rebuild_issue_capacity(db: sqlite3.Connection):
+  """
+    RebuildIssueCapacity (migration 0003).
+  """
+  db.execute("""
+    UPDATE Issue
+    SET pages_scheduled = (
+      SELECT IFNULL(SUM(Manuscript.page_count), 0)
+      FROM Manuscript
+      WHERE Manuscript.Issue_issue_ID = Issue.issue_ID
+      AND Manuscript.status = 'schedule for publication'
+    )
+  """)
+  return ()
+
+def rebuild_summary_counts(db: sqlite3.Connection):
+  """
+    RebuildSummaryCounts (migration 0004).
+  """
+  db.execute("DELETE FROM manuscript_status_counts")
+  db.execute("DELETE FROM author_status_counts")
+  db.execute("DELETE FROM reviewer_status_counts")
+  db.execute("""
+    INSERT INTO manuscript_status_counts (status, manuscripts)
+    SELECT status, COUNT(*)
+    FROM Manuscript
+    WHERE status IS NOT NULL
+    GROUP BY status
+  """)
+  db.execute("""
+    INSERT INTO author_status_counts (author_id, status, manuscripts)
+    SELECT Manuscript_Author.Author_author_ID, Manuscript.status, COUNT(*)
+    FROM Manuscript_Author
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Manuscript_Author.Manuscript_manuscript_number
+    WHERE Manuscript_Author.author_ordinal = 1
+    AND Manuscript.status IS NOT NULL
+    GROUP BY Manuscript_Author.Author_author_ID, Manuscript.status
+  """)
+  db.execute("""
+    INSERT INTO reviewer_status_counts (reviewer_id, status, manuscripts)
+    SELECT Reviewer_has_Manuscript.Reviewer_reviewer_ID, Manuscript.status, COUNT(*)
+    FROM Reviewer_has_Manuscript
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Reviewer_has_Manuscript.Manuscript_manuscript_number
+    WHERE Manuscript.status IS NOT NULL
+    GROUP BY Reviewer_has_Manuscript.Reviewer_reviewer_ID, Manuscript.status
+  """)
+  return ()
+
+PROCEDURES: Dict[str, Callable] = {
+  "MakeDecision": make_decision,
+  "PublishIssue": publish_issue,
+  "ScheduleManuscript": schedule_manuscript,
+  "RebuildCredentials": rebuild_credentials,
+  "RebuildIssueCapacity": rebuild_issue_capacity,
+  "RebuildSummaryCounts": rebuild_summary_counts,
+}
+
+
+# Statement translation.
+
+# named statements with no direct SQLite equivalent.
+OVERRIDES = {
+  # SQLite has no UPDATE ... JOIN.
+  "reviewer.set_opinion": """
+    UPDATE Reviewer_has_Manuscript
+    SET
+      appropriateness = %s,
+      clarity = %s,
+      methodology = %s,
+      experimental = %s,
+      recommendation = %s
+    WHERE Reviewer_reviewer_ID = %s
+    AND Manuscript_manuscript_number = %s
+    AND (
+      SELECT status FROM Manuscript
+      WHERE manuscript_number = Reviewer_has_Manuscript.Manuscript_manuscript_number
+    ) = 'under review' COLLATE NOCASE
+  """,
+}
+_OVERRIDES = {STATEMENTS[name]: text for name, text in OVERRIDES.items()}
+
+REWRITES = [
+  (re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE), "INSERT OR IGNORE"),
+  (re.compile(r"\s+(?:FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE)\b", re.IGNORECASE), ""),
+]
+
+SET_PATTERN = re.compile(r"^\s*SET\s+(.+?)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+TRUNCATE_PATTERN = re.compile(r"^\s*TRUNCATE\s+(?:TABLE\s+)?`?(\w+)`?\s*;?\s*$", re.IGNORECASE)
+AUTO_INCREMENT_PATTERN = re.compile(
+  r"^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+AUTO_INCREMENT\s*=\s*(\d+)\s*;?\s*$", re.IGNORECASE)
+START_TRANSACTION_PATTERN = re.compile(r"^\s*START\s+TRANSACTION\b", re.IGNORECASE)
+LOAD_DATA_PATTERN = re.compile(r"^\s*LOAD\s+DATA\b", re.IGNORECASE)
+
+# (statement text, bound) -> translation, bounded like `metrics` fingerprints.
+_translations: Dict[Tuple[str, bool], str] = {}
+_MAX_TRANSLATIONS = 4096
+
+def translate(statement: str, bound: bool) -> str:
+  """
+    SQLite text of a MySQL statement. `bound` statements have parameters,
+    so their `%s` placeholders become `?`.
+  """
+  key = (statement, bound)
+  result = _translations.get(key)
+  if result is None:
+    result = _OVERRIDES.get(statement, statement)
+    for pattern, replacement in REWRITES:
+      result = pattern.sub(replacement, result)
+    if bound:
+      result = result.replace("%s", "?").replace("%%", "%")
+    if len(_translations) >= _MAX_TRANSLATIONS:
+      _translations.clear()
+    _translations[key] = result
+  return result
+
+def _literal(value: str):
+  """
+    Value of a literal in a SET statement.
+  """
+  value = value.strip()
+  if value.upper() in ("NULL", "DEFAULT"):
+    return None
+  if value[:1] in ("'", '"') and value[-1:] == value[:1]:
+    return value[1:-1]
+  try:
+    return int(value)
+  except ValueError:
+    return value
+
+def translate_error(err: sqlite3.Error) -> DatabaseError:
+  """
+    The MySQL connector error matching an SQLite error.
+  """
+  message = str(err)
+  if isinstance(err, sqlite3.IntegrityError):
+    for prefix, errno in (
+      ("UNIQUE", ER_DUP_ENTRY),
+      ("FOREIGN KEY", ER_NO_REFERENCED_ROW),
+      ("CHECK", ER_CHECK_CONSTRAINT_VIOLATED),
+      ("NOT NULL", ER_BAD_NULL),
+    ):
+      if message.startswith(prefix):
+        return IntegrityError(msg=message, errno=errno)
+    # RAISE(ABORT, ...) in a trigger, which is SIGNAL in MySQL.
+    return ProgrammingError(msg=message, errno=ER_SIGNAL_EXCEPTION, sqlstate="42000")
+  if message.startswith("no such table"):
+    return ProgrammingError(msg=message, errno=ER_NO_SUCH_TABLE)
+  if "syntax error" in message or isinstance(err, sqlite3.ProgrammingError):
+    return ProgrammingError(msg=message, errno=ER_PARSE_ERROR)
+  if "locked" in message:
+    return OperationalError(msg=message, errno=ER_LOCK_WAIT_TIMEOUT)
+  return DatabaseError(msg=message)
+
+
+class SQLiteCursor:
+  """
+    A MySQL-connector-style cursor over an SQLite connection.
+  """
+
+  def __init__(self, connection: "SQLiteConnection"):
+    self._connection = connection
+    self._cursor = connection._db.cursor()
+    # statements handled here rather than by SQLite have no result set.
+    self._handled = False
+    # rows changed by the last `executemany`, over all its rows.
+    self._rowcount = None
+
+  @property
+  def description(self):
+    return None if self._handled else self._cursor.description
+
+  @property
+  def rowcount(self) -> int:
+    if self._handled:
+      return 0
+    return self._cursor.rowcount if self._rowcount is None else self._rowcount
+
+  @property
+  def lastrowid(self):
+    return self._cursor.lastrowid
+
+  @property
+  def with_rows(self) -> bool:
+    return self.description is not None
+
+  @property
+  def column_names(self):
+    return tuple(column[0] for column in self.description or ())
+
+  def execute(self, operation, params=None, multi=False):
+    if isinstance(operation, (bytes, bytearray)):
+      operation = operation.decode()
+    self._rowcount = None
+    self._handled = self._connection._handle(operation)
+    if self._handled:
+      return
+    try:
+      self._connection.run(
+        self._cursor.execute, translate(operation, params is not None), tuple(params or ()))
+    except sqlite3.Error as err:
+      raise translate_error(err) from err
+
+  def executemany(self, operation, seq_params):
+    # one statement per row, so a locked table is waited out row by row
+    # and no row is applied twice.
+    self._handled = False
+    sql = translate(operation, True)
+    rowcount = 0
+    try:
+      for params in seq_params:
+        self._connection.run(self._cursor.execute, sql, tuple(params))
+        rowcount += self._cursor.rowcount
+    except sqlite3.Error as err:
+      raise translate_error(err) from err
+    self._rowcount = rowcount
+
+  def callproc(self, procname, args=()):
+    procedure = PROCEDURES.get(procname)
+    if procedure is None:
+      raise ProgrammingError(msg=f"PROCEDURE {procname} does not exist",
+        errno=ER_SP_DOES_NOT_EXIST)
+    self._handled = True
+    try:
+      return procedure(self._connection._db, *args)
+    except sqlite3.Error as err:
+      raise translate_error(err) from err
+
+  def fetchone(self):
+    return None if self._handled else self._cursor.fetchone()
+
+  def fetchmany(self, size=1):
+    return [] if self._handled else self._cursor.fetchmany(size)
+
+  def fetchall(self):
+    return [] if self._handled else self._cursor.fetchall()
+
+  def close(self):
+    self._cursor.close()
+
+
+# keeps the shared in-memory database alive while no connection is open.
+_memory_anchor: Optional[sqlite3.Connection] = None
+_memory_lock = threading.Lock()
+
+class SQLiteConnection:
+  """
+    An SQLite connection with the interface of `ConnectionHandler`:
+    a context manager returning itself to its pool on exit.
+
+    Parameters
+    ----------
+    `database`: str
+      path of the database file, or `:memory:`.
+    `timeout`: float
+      seconds to wait for another connection's write lock.
+
+    Other connection settings (host, user, ...) are ignored.
+  """
+
+  backend = "sqlite"
+
+  def __init__(self, database=":memory:", timeout=5.0, **options):
+    global _memory_anchor
+    self.pool = None
+    # kept for `statements.prepared`; SQLite caches prepared statements itself.
+    self.statements = {}
+    # MySQL session variables, e.g. @suspend_triggers.
+    self.variables = {}
+
+    memory = database == ":memory:"
+    self.memory = memory
+    self.timeout = float(timeout)
+    try:
+      if memory:
+        with _memory_lock:
+          fresh = _memory_anchor is None
+          if fresh:
+            _memory_anchor = sqlite3.connect(MEMORY_URI, uri=True, check_same_thread=False)
+      else:
+        fresh = not os.path.exists(database) or os.path.getsize(database) == 0
+      self._db = sqlite3.connect(
+        MEMORY_URI if memory else database, uri=memory, timeout=float(timeout),
+        detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    except sqlite3.Error as err:
+      raise translate_error(err) from err
+
+    for name, (arguments, function) in FUNCTIONS.items():
+      self._db.create_function(name, arguments, function)
+    self._db.create_function("session_variable", 1, self.variables.get)
+    for name, collation in COLLATIONS.items():
+      self._db.create_collation(name, collation)
+    self._db.execute("PRAGMA foreign_keys = ON")
+    if not memory:
+      self._db.execute("PRAGMA journal_mode = WAL")
+
+    if fresh:
+      self.build_schema()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.release()
+
+  def release(self):
+    """
+      Return the connection to its pool, or close it if it is not pooled.
+    """
+    if self.pool is not None:
+      self.pool.checkin(self)
+    else:
+      self.close()
+
+  def cursor(self, *args, **kwargs):
+    """
+      A cursor whose statements are recorded in `metrics.METRICS`.
+      `buffered` and `prepared` make no difference here.
+    """
+    self._check()
+    return InstrumentedCursor(SQLiteCursor(self))
+
+  def _check(self):
+    if self._db is None:
+      raise InterfaceError(msg="connection is closed")
+
+  def _handle(self, statement: str) -> bool:
+    """
+      Run a MySQL statement SQLite has no equivalent for, returning
+      whether it was one.
+    """
+    match = SET_PATTERN.match(statement)
+    if match:
+      for assignment in match.group(1).split(","):
+        name, _, value = assignment.partition("=")
+        name = name.strip().lower()
+        if name.startswith("@"):
+          self.variables[name[1:]] = _literal(value)
+        elif name == "foreign_key_checks":
+          self._db.execute(f"PRAGMA foreign_keys = {'ON' if _literal(value) else 'OFF'}")
+      return True
+
+    match = TRUNCATE_PATTERN.match(statement)
+    if match:
+      # TRUNCATE skips triggers and restarts ids, and commits, as in MySQL.
+      table = match.group(1)
+      suspended = self.variables.get("suspend_triggers")
+      self.variables["suspend_triggers"] = 1
+      try:
+        self._db.execute(f"DELETE FROM {table}")
+        self._db.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+        self._db.commit()
+      except sqlite3.Error as err:
+        raise translate_error(err) from err
+      finally:
+        self.variables["suspend_triggers"] = suspended
+      return True
+
+    match = AUTO_INCREMENT_PATTERN.match(statement)
+    if match:
+      table, start = match.group(1), int(match.group(2))
+      self._db.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+      if start > 1:
+        self._db.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, start - 1))
+      return True
+
+    if START_TRANSACTION_PATTERN.match(statement):
+      self.start_transaction()
+      return True
+
+    if LOAD_DATA_PATTERN.match(statement):
+      raise NotSupportedError(msg="LOAD DATA is not supported by the SQLite backend",
+        errno=ER_NOT_ALLOWED_COMMAND)
+
+    return False
+
+  def build_schema(self):
+    """
+      Drop and recreate every table, view and trigger from utils/sql/sqlite.
+
+      The scripts already include every migration, so each one is
+      recorded as applied.
+    """
+    cursor = self.cursor()
+    try:
+      for script in SCRIPTS:
+        for command in iter_sql_file(os.path.join(SQLITE_PATH, script)):
+          cursor.execute(command)
+      cursor.execute(SCHEMA_VERSION_TABLE)
+      cursor.executemany(
+        "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+        [(version, name, _checksum(path)) for version, name, path in list_migrations()]
+      )
+      self.commit()
+    finally:
+      cursor.close()
+
+  @property
+  def in_transaction(self) -> bool:
+    return self._db is not None and self._db.in_transaction
+
+  def start_transaction(self, consistent_snapshot=False, isolation_level=None, readonly=None):
+    """
+      Begin a transaction; SQLite transactions always read a consistent snapshot.
+    """
+    self._check()
+    if self._db.in_transaction:
+      raise ProgrammingError(msg="Transaction already in progress")
+    self._db.execute("BEGIN")
+
+  def run(self, function, *args):
+    """
+      Call `function(*args)` on this connection, waiting out table locks.
+
+      Connections to the shared in-memory database lock tables rather
+      than the file, and SQLite reports a locked table at once instead of
+      applying the busy timeout. The call is retried until `timeout`;
+      the last error is raised, which is a lock wait timeout in MySQL.
+      A statement that hits the lock is rolled back, so it is safe to retry.
+    """
+    deadline = time.monotonic() + self.timeout
+    while True:
+      try:
+        return function(*args)
+      except sqlite3.OperationalError as err:
+        if not (self.memory and str(err).startswith("database table is locked")) \
+          or time.monotonic() >= deadline:
+          raise
+      time.sleep(LOCK_RETRY_INTERVAL)
+
+  def commit(self):
+    self._check()
+    try:
+      self.run(self._db.commit)
+    except sqlite3.Error as err:
+      raise translate_error(err) from err
+
+  def rollback(self):
+    self._check()
+    self._db.rollback()
+
+  def is_connected(self) -> bool:
+    return self._db is not None
+
+  def ping(self, reconnect=False, attempts=1, delay=0):
+    self._check()
+
+  def get_server_version(self):
+    return sqlite3.sqlite_version_info
+
+  def close(self):
+    """
+      Close the connection, forgetting statements prepared on it.
+    """
+    self.statements.clear()
+    if self._db is not None:
+      self._db.close()
+      self._db = None
+
+
+register_backend("sqlite", SQLiteConnection)
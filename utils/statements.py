@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Named SQL statements shared by the role modules.
+
+  A statement is prepared on the server the first time it is used on a
+  connection; the prepared cursor is cached on that connection and every
+  later call only sends the bound parameters over the binary protocol.
+"""
+
+from .dbconfig import ConnectionHandler
+from .metrics import name_statements
+
+STATEMENTS = {
+
+  # login
+  # password hashed client-side; the greeting comes back in the same row.
+  "login.credentials": """
+    SELECT
+      credentials.user_type,
+      credentials.type_id,
+      credentials.password IS NULL OR credentials.password = ''
+        OR credentials.password = %s AS authorized,
+      CONCAT('Hello, ',
+        COALESCE(Author.f_name, Editor.f_name, Reviewer.f_name), ' ',
+        COALESCE(Author.l_name, Editor.l_name, Reviewer.l_name)) AS greeting
+    FROM credentials
+    LEFT JOIN Author
+      ON credentials.user_type = 'Author' AND Author.author_ID = credentials.type_id
+    LEFT JOIN Editor
+      ON credentials.user_type = 'Editor' AND Editor.editor_ID = credentials.type_id
+    LEFT JOIN Reviewer
+      ON credentials.user_type = 'Reviewer' AND Reviewer.reviewer_ID = credentials.type_id
+    WHERE credentials.user_id = %s
+  """,
+
+  # author
+  # one pass over the author's lead-author rows, found through the
+  # Manuscript_Author_author (Author_author_ID, author_ordinal) index;
+  # the window adds the latest status change to every row.
+  "author.status": """
+    SELECT
+      Manuscript.manuscript_number,
+      Manuscript.status,
+      MAX(Manuscript.status_change_date) OVER () AS last_change
+    FROM Manuscript_Author
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Manuscript_Author.Manuscript_manuscript_number
+    WHERE Manuscript_Author.Author_author_ID = %s
+    AND Manuscript_Author.author_ordinal = 1
+    ORDER BY Manuscript.status_change_date, Manuscript.manuscript_number
+  """,
+
+  "author.by_name": """
+    SELECT author_ID FROM Author
+    WHERE f_name = %s
+    AND l_name = %s
+  """,
+
+  # manuscript status pages (see utils/pagination.py)
+  "manuscript.status_page_first": """
+    SELECT manuscript_number, status
+    FROM Manuscript
+    ORDER BY status, manuscript_number
+    LIMIT %s
+  """,
+  "manuscript.status_page_next": """
+    SELECT manuscript_number, status
+    FROM Manuscript
+    WHERE status > %s
+    OR (status = %s AND manuscript_number > %s)
+    ORDER BY status, manuscript_number
+    LIMIT %s
+  """,
+  "manuscript.status_page_after_null": """
+    SELECT manuscript_number, status
+    FROM Manuscript
+    WHERE (status IS NULL AND manuscript_number > %s)
+    OR status IS NOT NULL
+    ORDER BY status, manuscript_number
+    LIMIT %s
+  """,
+  "manuscript.status_page_filtered": """
+    SELECT manuscript_number, status
+    FROM Manuscript
+    WHERE status = %s
+    AND manuscript_number > %s
+    ORDER BY manuscript_number
+    LIMIT %s
+  """,
+
+  # summary counters (migration 0004), non-empty statuses only.
+  "summary.journal": """
+    SELECT status, manuscripts
+    FROM manuscript_status_counts
+    WHERE manuscripts > 0
+    ORDER BY status
+  """,
+  "summary.author": """
+    SELECT status, manuscripts
+    FROM author_status_counts
+    WHERE author_id = %s AND manuscripts > 0
+    ORDER BY status
+  """,
+  "summary.reviewer": """
+    SELECT status, manuscripts
+    FROM reviewer_status_counts
+    WHERE reviewer_id = %s AND manuscripts > 0
+    ORDER BY status
+  """,
+
+  # editor
+  "editor.assign_reviewer": """
+    INSERT INTO Reviewer_has_Manuscript
+    (Manuscript_manuscript_number, Reviewer_reviewer_id)
+    VALUES (%s, %s)
+  """,
+
+  # reviewer
+  # only writes a row the reviewer is assigned to (primary key) while the
+  # manuscript is under review; rowcount 1 means the opinion was recorded.
+  "reviewer.set_opinion": """
+    UPDATE Reviewer_has_Manuscript
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Reviewer_has_Manuscript.`Manuscript_manuscript_number`
+    SET
+      Reviewer_has_Manuscript.`appropriateness` = %s,
+      Reviewer_has_Manuscript.`clarity` = %s,
+      Reviewer_has_Manuscript.`methodology` = %s,
+      Reviewer_has_Manuscript.`experimental` = %s,
+      Reviewer_has_Manuscript.`recommendation` = %s
+    WHERE Reviewer_has_Manuscript.`Reviewer_reviewer_ID` = %s
+    AND Reviewer_has_Manuscript.`Manuscript_manuscript_number` = %s
+    AND Manuscript.status = 'under review'
+  """,
+  # the reviewer's dashboard, by the Reviewer_has_Manuscript primary key prefix.
+  "reviewer.reviews": """
+    SELECT
+      Reviewer_has_Manuscript.`Manuscript_manuscript_number`,
+      Manuscript.title,
+      Manuscript.status,
+      Reviewer_has_Manuscript.date_sent,
+      Reviewer_has_Manuscript.appropriateness,
+      Reviewer_has_Manuscript.clarity,
+      Reviewer_has_Manuscript.methodology,
+      Reviewer_has_Manuscript.experimental,
+      Reviewer_has_Manuscript.recommendation
+    FROM Reviewer_has_Manuscript
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Reviewer_has_Manuscript.`Manuscript_manuscript_number`
+    WHERE Reviewer_has_Manuscript.`Reviewer_reviewer_ID` = %s
+    ORDER BY Reviewer_has_Manuscript.`Manuscript_manuscript_number`
+  """,
+  # why `reviewer.set_opinion` changed nothing, by the same primary key.
+  "reviewer.assignment_status": """
+    SELECT Manuscript.status
+    FROM Reviewer_has_Manuscript
+    JOIN Manuscript
+      ON Manuscript.manuscript_number = Reviewer_has_Manuscript.`Manuscript_manuscript_number`
+    WHERE Reviewer_has_Manuscript.`Reviewer_reviewer_ID` = %s
+    AND Reviewer_has_Manuscript.`Manuscript_manuscript_number` = %s
+  """,
+}
+
+
+# report these statements by name in query metrics.
+name_statements(STATEMENTS)
+
+
+def prepared(conn: ConnectionHandler, name: str):
+  """
+    Get the prepared-statement cursor for `name` on `conn`,
+    creating (and caching) it on first use.
+  """
+  if name not in STATEMENTS:
+    raise KeyError(f"unknown statement: {name}")
+
+  # plain MySQLConnections (outside the pool) get a cache on first use.
+  cache = getattr(conn, "statements", None)
+  if cache is None:
+    cache = conn.statements = {}
+
+  cursor = cache.get(name)
+  if cursor is None:
+    cursor = conn.cursor(prepared=True)
+    cache[name] = cursor
+  return cursor
+
+
+def execute(conn: ConnectionHandler, name: str, params=()):
+  """
+    Execute a named statement with bound parameters.
+
+    The statement text is passed as the same object on every call,
+    which lets the cursor skip re-preparing it.
+
+    Returns
+    -------
+    the prepared cursor; callers must consume any result set
+    before running another statement on the connection.
+  """
+  cursor = prepared(conn, name)
+  cursor.execute(STATEMENTS[name], tuple(params))
+  return cursor
+
+
+def fetchone(conn: ConnectionHandler, name: str, params=()):
+  """
+    Execute a named statement and return its first row (or None).
+  """
+  cursor = execute(conn, name, params)
+  row = cursor.fetchone()
+  if row is not None:
+    # drain the rest so the connection is ready for the next statement.
+    cursor.fetchall()
+  return row
+
+
+def fetchall(conn: ConnectionHandler, name: str, params=()):
+  """
+    Execute a named statement and return all of its rows.
+  """
+  return execute(conn, name, params).fetchall()
+
+
+# Representative parameters for each statement,
+# used to EXPLAIN them against a populated database.
+SAMPLE_PARAMS = {
+  "login.credentials": ("5f4dcc3b5aa765d61d8327deb882cf99", 1),
+  "author.status": (1,),
+  "author.by_name": ("Ke", "Lou"),
+  "manuscript.status_page_first": (25,),
+  "manuscript.status_page_next": ("submitted", "submitted", 1, 25),
+  "manuscript.status_page_after_null": (1, 25),
+  "manuscript.status_page_filtered": ("under review", 0, 25),
+  "summary.journal": (),
+  "summary.author": (1,),
+  "summary.reviewer": (1,),
+  "editor.assign_reviewer": (1, 1),
+  "reviewer.set_opinion": (5, 5, 5, 5, 10, 1, 1),
+  "reviewer.assignment_status": (1, 1),
+  "reviewer.reviews": (1,),
+}
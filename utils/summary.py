@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+  Manuscript counts by status, read from the trigger-maintained
+  counter tables (migration 0004) rather than the manuscripts.
+"""
+
+from .dbconfig import ConnectionHandler
+from . import statements
+from .render import TableRenderer, SUMMARY_COLUMNS
+
+SCOPES = ("journal", "author", "reviewer")
+
+
+def summary(conn: ConnectionHandler, scope="journal", scope_id=None, mode="plain", out=None) -> int:
+  """
+    Print manuscript counts by status.
+
+    Parameters
+    ----------
+    `scope`: str
+      "journal" for every manuscript, "author" for the manuscripts
+      `scope_id` is lead author of, "reviewer" for those assigned to it.
+    `mode`: str
+      Output format: "plain", "tsv" or "json".
+    `out`:
+      Text stream to write to (default: stdout).
+
+    Returns
+    -------
+    int: total number of manuscripts counted.
+  """
+  if scope not in SCOPES:
+    raise ValueError(f"unknown summary scope: {scope}")
+  params = () if scope == "journal" else (scope_id,)
+  rows = statements.fetchall(conn, f"summary.{scope}", params)
+  total = sum(manuscripts for _, manuscripts in rows)
+  TableRenderer(SUMMARY_COLUMNS, mode, out).render(
+    rows, empty="No manuscripts.", preamble=f"Manuscripts: {total}")
+  return total
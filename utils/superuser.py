@@ -2,11 +2,15 @@
 # -*- coding: utf-8 -*-
 
 from getpass import getpass
-import shlex
 
 from .dbutils import ConnectionHandler, DBConnectError, DBParseError, warn, info
+from .pagination import StatusPager, DEFAULT_PAGE_SIZE
+from .commands import CommandRegistry, Arg
 from .user import User
+from .summary import summary
 from .logging import Logging
+from .metrics import METRICS
+from .render import TableRenderer, COMMAND_STATS_COLUMNS, STATEMENT_STATS_COLUMNS
 
 class SuperUser(User):
   """
@@ -14,35 +18,47 @@ class SuperUser(User):
     to manage the database.
   """
 
+  commands = CommandRegistry("Admin")
+
   def __init__(self, user_id: int, conn: ConnectionHandler):
     self.user_id = user_id
     self.conn = conn
+    self.pager = StatusPager()
 
   def __bool__(self):
-    return self.conn.is_connected()
-
-  def handle_request(self, request: str):
-    """
-      Handle a request string.
-    """
-
-    if len(tokens := shlex.split(request)) == 0:
-      return
-
-    command = tokens[0]
-
-    if command == "status":
-      print(f"Admin ID: {self.user_id}\n{self.status()}")
-
-    elif command == "register":
-      if len(tokens) != 4:
-        warn("Invalid number of arguments")
-        return
-
-      # [register, <fname>, <lname>, <user_type>]
-      self.register_user(*tokens[1:])
-    else:
-      warn("Invalid request")
+    return self.conn is not None and self.conn.is_connected()
+
+  @commands.command("status", options=("format", "page"),
+    help="List manuscripts by status, a page at a time.")
+  def status_command(self, mode, page_size, status):
+    if mode == "plain":
+      print(f"Admin ID: {self.user_id}")
+    return self.status(mode, page_size=page_size, status=status)
+
+  @commands.command("next", options=("format",),
+    help="Show the next page of the last status listing.")
+  def next_command(self, mode):
+    return self.next_page(mode)
+
+  @commands.command("summary", options=("format",),
+    help="Count the journal's manuscripts by status.")
+  def summary_command(self, mode):
+    return self.summary(mode)
+
+  @commands.command("stats",
+    Arg("table", required=False, default="commands", choices=("commands", "statements")),
+    Arg("order", required=False, default="total", choices=("total", "tail")),
+    Arg("count", int, required=False, default=10),
+    options=("format",),
+    help="Show the commands or statements with the most total or p99 time.")
+  def stats_command(self, table, order, count, mode):
+    return self.stats(table, order, count, mode)
+
+  @commands.command("register",
+    Arg("user_type", choices=("author", "editor", "reviewer", "admin")), Arg("fname"), Arg("lname"),
+    help="Register a user of any type.")
+  def register_command(self, user_type, fname, lname):
+    return self.register_user(user_type, fname, lname)
 
   @property
   def prompt(self):
@@ -51,37 +67,82 @@ class SuperUser(User):
     """
     return f"Admin {self.user_id}> "
 
-  def status(self):
+  def status(self, mode="plain", out=None, page_size=DEFAULT_PAGE_SIZE, status=None):
     """
-      Get summary status of database.
+      Print the first page of manuscript statuses in the database.
+
+      Parameters
+      ----------
+      `mode`: str
+        Output format: "plain", "tsv" or "json".
+      `out`:
+        Text stream to write to (default: stdout).
+      `page_size`: int
+        Number of manuscripts per page.
+      `status`: str
+        Only list manuscripts in this status.
 
       Returns
       -------
-        String value representing the status of all manuscripts
-        assigned to the editor.
+        int: number of manuscripts listed.
     """
-    query = f"""
-      SELECT manuscript_number, status
-      FROM Manuscript
-      ORDER BY status, manuscript_number
+    return self.pager.first(
+      self.conn, page_size, status, mode, out, empty="No manuscripts in database.")
+
+  def summary(self, mode="plain", out=None):
     """
+      Print the journal's manuscript counts by status,
+      read from the summary counters.
 
-    cursor = self.conn.cursor()
-    cursor.execute(query)
-    results = ""
-    title = "Status"
-    title = f"| Manuscript #### | {title:>30} |"
-    delim = "-" * len(title)
-    for row in cursor:
-      manuscript_number, status = row
-      results += f"| Manuscript {manuscript_number:4d} | {status:>30} |\n{delim}\n"
-    cursor.close()
-    if len(results) == 0:
-      results = "No manuscripts in database."
+      Returns
+      -------
+        int: number of manuscripts in the database.
+    """
+    return summary(self.conn, "journal", mode=mode, out=out)
+
+  def stats(self, table="commands", order="total", count=10, mode="plain", out=None):
+    """
+      Print query metrics recorded since this process started.
+
+      Parameters
+      ----------
+      `table`: str
+        "commands" for per-command latency (with the queries and rows
+        each ran), or "statements" for per-statement latency by command.
+      `order`: str
+        "total" to rank by total time, "tail" by p99 latency.
+      `count`: int
+        Number of rows to list.
+
+      Returns
+      -------
+        int: number of rows listed.
+    """
+    if table == "statements":
+      columns = STATEMENT_STATS_COLUMNS
+      rows = (
+        (statement, command) + tuple(summary[column.name] for column in columns[2:])
+        for (command, statement), summary in METRICS.top_statements(count, order)
+      )
     else:
-      results = f"{delim}\n{title}\n{delim}\n{results}"
+      columns = COMMAND_STATS_COLUMNS
+      rows = (
+        (command,) + tuple(summary[column.name] for column in columns[1:])
+        for command, summary in METRICS.top_commands(count, order)
+      )
+    ranking = "p99 latency" if order == "tail" else "total time"
+    return TableRenderer(columns, mode, out).render(
+      rows, empty="No queries recorded yet.", preamble=f"Top {table} by {ranking}")
+
+  def next_page(self, mode="plain", out=None):
+    """
+      Print the next page of the last status listing.
 
-    return Logging.info(results)
+      Returns
+      -------
+        int: number of manuscripts listed.
+    """
+    return self.pager.next(self.conn, mode, out)
 
 
   def register_user(self,  user_type: str, fname: str, lname: str):
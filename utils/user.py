@@ -20,12 +20,14 @@ class User(ABC):
     """
     return NotImplemented
 
-  @abstractmethod
+  # the role's `CommandRegistry`, set by each subclass.
+  commands = None
+
   def handle_request(self, request: str):
     """
-      Interface for user handling a request string.
+      Handle a request string by dispatching it through the role's commands.
     """
-    return NotImplemented
+    return self.commands.dispatch(self, request)
 
   def __bool__(self):
     """
@@ -33,6 +35,17 @@ class User(ABC):
     """
     return NotImplemented
 
+  def release(self):
+    """
+      Return the user's borrowed database connection to its pool.
+
+      Safe to call more than once, and on users that never held a connection.
+    """
+    conn = getattr(self, "conn", None)
+    if conn is not None:
+      self.conn = None
+      conn.release()
+
 class InvalidUser(User):
   """
     Invalid users for whatever reason.